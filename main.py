@@ -181,7 +181,7 @@ def main():
     print(f"  - Similarity Metric: Cosine Similarity")
     print(f"  - Blockchain: SHA-256 Hashing + Local Ledger")
     print(f"\nExecution Time: {execution_time:.2f} seconds")
-    print(f"Credentials Issued: {len(ledger.ledger['credentials'])}")
+    print(f"Credentials Issued: {len(ledger)}")
     print(f"Recommendations Generated: {len(recommendations)}")
     
     # =========================================================================
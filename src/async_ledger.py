@@ -0,0 +1,204 @@
+"""
+SkillChain DX - Asyncio Credential Ledger
+Coroutine facade over CredentialLedger for asyncio services
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby, islice
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+from src.blockchain_verification import DEFAULT_ISSUER, CredentialLedger
+
+
+class AsyncCredentialLedger:
+    """
+    CredentialLedger operations as coroutines
+
+    Every call that touches storage or hashes runs on an executor, so the
+    event loop is never blocked by ledger I/O. Concurrent issue() calls are
+    coalesced: while one batch is being committed, new issuances queue up
+    and are committed together by the next bulk issuance, one durable
+    write per batch. Ledger methods are called with verbose=False, so
+    nothing is written to stdout.
+
+    Usage:
+        async with AsyncCredentialLedger(storage_format='jsonl') as ledger:
+            record = await ledger.issue('EMP001', 'TC001', 'Python for Data Analysis',
+                                        '2024-03-15')
+            result = await ledger.verify('EMP001', 'TC001', 'Python for Data Analysis',
+                                         '2024-03-15')
+    """
+
+    def __init__(self, ledger_path: str = 'data/credential_ledger.json',
+                 ledger: Optional[CredentialLedger] = None,
+                 executor: Optional[ThreadPoolExecutor] = None,
+                 max_workers: int = 4, max_batch: int = 10000, **ledger_options):
+        """
+        Open (or wrap) a ledger
+
+        Args:
+            ledger_path: Path passed to CredentialLedger
+            ledger: Existing ledger to wrap; overrides ledger_path/ledger_options
+            executor: Executor for blocking calls; by default a thread pool
+                of max_workers threads owned (and shut down) by this object
+            max_workers: Threads in the default executor
+            max_batch: Most issuances committed in one group commit
+            **ledger_options: Further CredentialLedger arguments (e.g.
+                storage_format, bloom_false_positive_rate)
+        """
+        self.ledger = ledger if ledger is not None else CredentialLedger(ledger_path,
+                                                                         **ledger_options)
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers,
+                                                        thread_name_prefix='ledger')
+        self.max_batch = max_batch
+        self._pending: List[Tuple[Tuple, bool, asyncio.Future]] = []
+        self._flusher: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> 'AsyncCredentialLedger':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _run(self, func, *args, **kwargs):
+        """Run a blocking call on the executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def issue(self, employee_id: str, course_id: str, course_name: str,
+                    completion_date: str, issuer: str = DEFAULT_ISSUER,
+                    idempotent: bool = True) -> Dict:
+        """
+        Issue a credential, committed together with concurrent issuances
+
+        Args:
+            employee_id: Employee identifier
+            course_id: Course identifier
+            course_name: Name of the course
+            completion_date: Date of completion
+            issuer: Credential issuer
+            idempotent: Return the existing record for an already active credential
+
+        Returns:
+            Credential record with hash
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(((employee_id, course_id, course_name, completion_date, issuer),
+                              idempotent, future))
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush())
+        return await future
+
+    async def _flush(self):
+        """Commit queued issuances, one bulk issuance per run of equal idempotent flags"""
+        while self._pending:
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            # Consecutive runs keep the submission order, and with it the ledger positions
+            for idempotent, run in groupby(batch, key=lambda entry: entry[1]):
+                group = list(run)
+                try:
+                    results = await self._run(self.ledger.issue_credentials_bulk,
+                                              [claim for claim, _, _ in group], idempotent,
+                                              verbose=False)
+                except Exception as e:
+                    for _, _, future in group:
+                        if not future.done():
+                            future.set_exception(e)
+                else:
+                    for (_, _, future), result in zip(group, results):
+                        if not future.done():
+                            future.set_result(result)
+
+    async def issue_bulk(self, records: Iterable[Tuple], idempotent: bool = True) -> List[Dict]:
+        """Issue many credentials with a single durable write (see issue_credentials_bulk)"""
+        return await self._run(self.ledger.issue_credentials_bulk, list(records), idempotent,
+                               verbose=False)
+
+    async def verify(self, employee_id: str, course_id: str, course_name: str,
+                     completion_date: str, issuer: str = DEFAULT_ISSUER) -> Dict:
+        """Verify a credential (see CredentialLedger.verify_credential)"""
+        return await self._run(self.ledger.verify_credential, employee_id, course_id,
+                               course_name, completion_date, issuer)
+
+    async def verify_bulk(self, claims: Iterable[Union[Dict, Tuple]], workers: int = 4,
+                          chunk_size: int = 1000) -> List[Dict]:
+        """Verify many claims and return every result, sorted by claim index"""
+        results = await self._run(lambda: list(self.ledger.verify_credentials_bulk(
+            claims, workers=workers, chunk_size=chunk_size)))
+        return sorted(results, key=lambda result: result['index'])
+
+    async def verify_stream(self, claims: Iterable[Union[Dict, Tuple]], workers: int = 4,
+                            chunk_size: int = 1000) -> AsyncIterator[Dict]:
+        """
+        Verify many claims, yielding results as they complete
+
+        Results are pulled from verify_credentials_bulk a chunk at a time on
+        the executor, so memory stays bounded for any number of claims.
+        """
+        results = self.ledger.verify_credentials_bulk(claims, workers=workers,
+                                                      chunk_size=chunk_size)
+        while True:
+            chunk = await self._run(lambda: list(islice(results, chunk_size)))
+            if not chunk:
+                return
+            for result in chunk:
+                yield result
+
+    async def revoke(self, credential_id: str, reason: str) -> Dict:
+        """Revoke a credential (see CredentialLedger.revoke_credential)"""
+        return await self._run(self.ledger.revoke_credential, credential_id, reason,
+                               verbose=False)
+
+    async def revoke_issuer(self, issuer: str, reason: str) -> List[Dict]:
+        """Revoke every active credential from an issuer"""
+        return await self._run(self.ledger.revoke_issuer, issuer, reason, verbose=False)
+
+    async def get_employee_credentials(self, employee_id: str) -> List[Dict]:
+        """Active credentials of an employee"""
+        return await self._run(self.ledger.get_employee_credentials, employee_id)
+
+    async def get_course_credentials(self, course_id: str) -> List[Dict]:
+        """Active credentials for a course"""
+        return await self._run(self.ledger.get_course_credentials, course_id)
+
+    async def get_issuer_credentials(self, issuer: str) -> List[Dict]:
+        """Active credentials from an issuer"""
+        return await self._run(self.ledger.get_issuer_credentials, issuer)
+
+    async def get_credentials_between(self, start: str, end: str,
+                                      course_id: Optional[str] = None) -> List[Dict]:
+        """Active credentials completed within an ISO date range (inclusive)"""
+        return await self._run(self.ledger.get_credentials_between, start, end, course_id)
+
+    async def get_inclusion_proof(self, credential_id: str) -> Optional[Dict]:
+        """Merkle inclusion proof of a credential"""
+        return await self._run(self.ledger.get_inclusion_proof, credential_id)
+
+    async def generate_verification_report(self, output_path: str, **options) -> Dict:
+        """Write the verification report (see CredentialLedger.generate_verification_report)"""
+        return await self._run(self.ledger.generate_verification_report, output_path,
+                               verbose=False, **options)
+
+    async def count(self) -> int:
+        """Number of records in the ledger"""
+        return await self._run(len, self.ledger)
+
+    async def refresh(self):
+        """Pick up credentials issued by other processes"""
+        await self._run(self.ledger.refresh)
+
+    async def compact(self):
+        """Compact the underlying storage"""
+        await self._run(self.ledger.compact)
+
+    async def close(self):
+        """Commit queued issuances, then close the ledger and the owned executor"""
+        if self._flusher is not None:
+            await self._flusher
+        await self._run(self.ledger.close)
+        if self._owns_executor:
+            self._executor.shutdown(wait=True)
@@ -3,48 +3,449 @@ SkillChain DX - Blockchain Credential Verification Module
 Lightweight implementation using SHA-256 hashing and local ledger
 """
 
+import csv
+import functools
+import gzip
 import hashlib
 import json
 import datetime
-from typing import Dict, List, Optional
+import os
+import pickle
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
 from pathlib import Path
 
+import numpy as np
+
+from src.bloom_filter import BloomFilter
+from src.ledger_backends import (BinaryLedgerBackend, JsonLedgerBackend, LazyJsonlLedgerBackend,
+                                 LedgerBackend, SegmentedLedgerBackend, SqliteLedgerBackend,
+                                 atomic_write, id_key)
+
+
+# prev_hash of the first record in a chain
+GENESIS_HASH = '0' * 64
+
+# Fields of a claimed credential, as read by read_claims (issuer is optional)
+CLAIM_FIELDS = ('employee_id', 'course_id', 'course_name', 'completion_date', 'issuer')
+DEFAULT_ISSUER = 'SkillChain DX Platform'
+
+# Valid values of a record's status
+CREDENTIAL_STATUSES = ('active', 'revoked', 'expired', 'suspended')
+
+
+def read_claims(source: Union[str, TextIO], file_format: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Stream claimed credentials from a CSV or JSON Lines file
+    
+    CSV files need a header row naming CLAIM_FIELDS columns; JSON Lines
+    files hold one object per line with those keys. Rows are read lazily,
+    so files of any size can be streamed into verify_credentials_bulk.
+    
+    Args:
+        source: File path, '-' for stdin, or an open text file
+        file_format: 'csv' or 'jsonl'; inferred from the file extension if None
+        
+    Yields:
+        One dict per claim
+    """
+    if file_format is None:
+        name = source if isinstance(source, str) else getattr(source, 'name', '')
+        file_format = 'jsonl' if str(name).endswith(('.jsonl', '.ndjson')) else 'csv'
+    if file_format not in ('csv', 'jsonl'):
+        raise ValueError(f"Unknown claims format: {file_format}")
+    
+    if isinstance(source, str):
+        f = sys.stdin if source == '-' else open(source, 'r', newline='')
+    else:
+        f = source
+    try:
+        if file_format == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    finally:
+        if isinstance(source, str) and source != '-':
+            f.close()
+
+
+def compute_credential_hash(data: Dict) -> str:
+    """SHA-256 hex hash of credential data, over its canonical (sorted-key) JSON"""
+    # Create canonical string representation
+    canonical_string = json.dumps(data, sort_keys=True)
+    
+    # Compute SHA-256 hash
+    hash_object = hashlib.sha256(canonical_string.encode())
+    return hash_object.hexdigest()
+
+
+def _chain_link(prev_hash: str, record: Dict) -> str:
+    """
+    Chain hash of a record given the chain hash before it
+    
+    Covers everything except the mutable status (and prev_hash itself,
+    which is the prev_hash argument). A missing field links as null, so a
+    malformed record breaks the chain instead of the ledger.
+    """
+    linked = {key: record.get(key) for key in ('credential_id', 'timestamp', 'data', 'hash')}
+    return hashlib.sha256((prev_hash + json.dumps(linked, sort_keys=True)).encode()).hexdigest()
+
+
+def _merkle_leaf(credential_hash: str) -> bytes:
+    """Merkle leaf for a credential hash (0x00 prefix separates leaves from nodes)"""
+    return hashlib.sha256(b'\x00' + bytes.fromhex(credential_hash)).digest()
+
+
+def _merkle_node(left: bytes, right: bytes) -> bytes:
+    """Merkle interior node over two children"""
+    return hashlib.sha256(b'\x01' + left + right).digest()
+
+
+def _merkle_levels(leaves: List[bytes]) -> List[List[bytes]]:
+    """
+    Build every level of a Merkle tree, leaves first and root last
+    
+    An unpaired node at the end of a level is promoted unchanged.
+    """
+    levels = [leaves]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [_merkle_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def verify_inclusion_proof(credential_hash: str, proof: Dict, root: str) -> bool:
+    """
+    Check that a credential hash is included under a batch Merkle root
+    
+    Needs only the proof path (O(log n) hashes), not the ledger. The root
+    must come from a trusted source (e.g. a published or anchored batch
+    root); the 'root' inside the proof is never trusted, since whoever
+    built the proof chose it.
+    
+    Args:
+        credential_hash: SHA-256 hex hash of the credential data
+        proof: Proof from CredentialLedger.get_inclusion_proof
+        root: Trusted (published) batch root
+        
+    Returns:
+        True if the path hashes up to the root; False without a root
+    """
+    if not root:
+        return False
+    node = _merkle_leaf(credential_hash)
+    for step in proof['path']:
+        sibling = bytes.fromhex(step['hash'])
+        node = _merkle_node(sibling, node) if step['side'] == 'left' else _merkle_node(node, sibling)
+    return node.hex() == root
+
+
+RECORD_FIELDS = ('credential_id', 'timestamp', 'data', 'hash', 'status')
+
+# Backend of a process-pool audit worker, set once by _init_audit_worker
+_audit_backend: Optional[LedgerBackend] = None
+
+
+def _init_audit_worker(backend: LedgerBackend):
+    """Process pool initializer: keep the worker's copy of the backend"""
+    global _audit_backend
+    _audit_backend = backend
+
+
+def _parse_timestamp(value) -> Optional[datetime.datetime]:
+    """Parse an ISO timestamp, or None if it is not one"""
+    try:
+        return datetime.datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _audit_chunk(start: int, end: int,
+                 backend: Optional[LedgerBackend] = None) -> Tuple[List[Dict], np.ndarray,
+                                                                  np.ndarray, np.ndarray]:
+    """
+    Run the per-record audit checks on positions start up to (excluding) end
+    
+    Args:
+        start: First position
+        end: Position after the last
+        backend: Backend to read; defaults to the process worker's backend
+        
+    Returns:
+        (findings, credential id fingerprints of every record, hash
+        fingerprints of the active records, positions of those active records)
+    """
+    backend = backend or _audit_backend
+    findings = []
+    id_prints = np.zeros(end - start, dtype=np.uint64)
+    hash_prints = []
+    active_positions = []
+    
+    def finding(position: int, record: Dict, check: str, message: str, **details) -> Dict:
+        findings.append({'position': position, 'credential_id': record.get('credential_id'),
+                         'check': check, 'message': message, **details})
+    
+    previous = _parse_timestamp(backend.get(start - 1).get('timestamp')) if start else None
+    for position, record in enumerate(backend.iter_records(start, end), start):
+        missing = [field for field in RECORD_FIELDS if field not in record]
+        data = record.get('data')
+        if isinstance(data, dict):
+            missing += [f"data.{field}" for field in CLAIM_FIELDS if field not in data]
+        else:
+            missing.append('data')
+        if missing:
+            finding(position, record, 'malformed_record',
+                    f"Missing fields: {', '.join(missing)}", missing=missing)
+        
+        id_prints[position - start] = id_key(str(record.get('credential_id')))
+        
+        if isinstance(data, dict) and 'hash' in record:
+            expected = compute_credential_hash(data)
+            if expected != record['hash']:
+                finding(position, record, 'hash_mismatch', 'hash does not match credential data',
+                        expected=expected, actual=record['hash'])
+        
+        status = record.get('status')
+        if status not in CREDENTIAL_STATUSES:
+            finding(position, record, 'invalid_status', f"Unknown status: {status!r}")
+        elif status == 'active' and 'hash' in record:
+            hash_prints.append(id_key(record['hash']))
+            active_positions.append(position)
+        
+        timestamp = _parse_timestamp(record.get('timestamp'))
+        if timestamp is None:
+            if 'timestamp' in record:
+                finding(position, record, 'invalid_timestamp',
+                        f"Not an ISO timestamp: {record['timestamp']!r}")
+            continue
+        # Naive and aware timestamps cannot be ordered against each other
+        if (previous is not None and (previous.tzinfo is None) == (timestamp.tzinfo is None)
+                and timestamp < previous):
+            finding(position, record, 'timestamp_out_of_order',
+                    'timestamp is earlier than the previous record',
+                    timestamp=record['timestamp'], previous_timestamp=previous.isoformat())
+        previous = timestamp
+    
+    return (findings, id_prints, np.array(hash_prints, dtype=np.uint64),
+            np.array(active_positions, dtype=np.int64))
+
 
 class CredentialLedger:
     """Simple blockchain-inspired credential verification system"""
     
-    def __init__(self, ledger_path: str = 'data/credential_ledger.json'):
+    STORAGE_FORMATS = ('json', 'jsonl', 'sqlite', 'binary', 'segmented')
+    
+    def __init__(self, ledger_path: str = 'data/credential_ledger.json',
+                 storage_format: str = 'json', compact_every: int = 10000,
+                 merkle_batch_size: int = 1024, checkpoint_every: int = 1000,
+                 backend: Optional[LedgerBackend] = None,
+                 bloom_false_positive_rate: Optional[float] = None,
+                 lazy: bool = False, segment_bytes: int = 16 * 1024 * 1024,
+                 segment_seconds: Optional[float] = None):
         """
         Initialize the credential ledger
         
         Args:
             ledger_path: Path to store the ledger file
+            storage_format: 'json' rewrites one JSON document on every
+                issuance and logs revocations to ledger_path + '.log';
+                'jsonl' keeps a JSON Lines snapshot at ledger_path plus an
+                append-only log at ledger_path + '.log'; 'sqlite' stores
+                records in an indexed SQLite database at ledger_path;
+                'binary' memory-maps fixed-width records at ledger_path
+                and logs new ones to ledger_path + '.log'; 'segmented'
+                seals the log into immutable binary segments listed in a
+                manifest at ledger_path
+            compact_every: Log entries after which a 'jsonl' or 'binary'
+                ledger is compacted into a fresh snapshot (or a 'json'
+                document is rewritten with its logged revocations)
+            merkle_batch_size: Consecutive records grouped under one Merkle root
+            checkpoint_every: Records between hash-chain checkpoints
+            backend: Custom LedgerBackend; overrides ledger_path/storage_format
+            bloom_false_positive_rate: If set, keep a Bloom filter over every
+                issued credential hash (revoked ones included) at this
+                false-positive rate, persisted at
+                ledger_path + '.bloom', so verify_credential can reject unknown
+                credentials without an index lookup
+            lazy: Open a 'jsonl' ledger through a persisted offset index
+                (ledger_path + '.idx') and read records on demand instead of
+                parsing the whole snapshot ('binary', 'segmented' and 'sqlite'
+                are always lazy)
+            segment_bytes: Log size at which a 'segmented' ledger seals its
+                active segment
+            segment_seconds: Age of the oldest unsealed record at which a
+                'segmented' ledger seals its active segment (None: size only)
         """
+        if backend is None:
+            if storage_format not in self.STORAGE_FORMATS:
+                raise ValueError(f"Unknown storage_format: {storage_format}")
+            if lazy and storage_format == 'json':
+                raise ValueError("Lazy loading needs a 'jsonl', 'binary' or 'sqlite' ledger")
+            if storage_format == 'sqlite':
+                backend = SqliteLedgerBackend(ledger_path)
+            elif storage_format == 'binary':
+                backend = BinaryLedgerBackend(ledger_path, compact_every)
+            elif storage_format == 'segmented':
+                backend = SegmentedLedgerBackend(ledger_path, segment_bytes, segment_seconds)
+            elif lazy:
+                backend = LazyJsonlLedgerBackend(ledger_path, compact_every)
+            else:
+                backend = JsonLedgerBackend(ledger_path, storage_format, compact_every)
         self.ledger_path = ledger_path
-        self.ledger = self._load_ledger()
+        self.storage_format = storage_format
+        self.backend = backend
+        self.merkle_batch_size = merkle_batch_size
+        self._batch_roots: Dict[int, str] = {}
+        self.checkpoint_every = checkpoint_every
+        self._chain_head = self._compute_chain_head()
+        self._chain_count = self.backend.count()
+        # Last validated (record count, chain head), kept outside the ledger
+        self.chain_state_path = f"{ledger_path}.chain"
+        self._trusted_head: Optional[Tuple[int, str]] = None
+        self._listeners: List[Callable[[str, Dict], None]] = []
+        # What listeners have been told about; later writes by other processes
+        # are published when this ledger next refreshes, issues or revokes
+        self._seen_count = self.backend.count()
+        self._seen_revoked = self.backend.count(status='revoked')
+        self._seen_revocations = len(self.backend.revocations)
+        # Group commit: issuers queue records; one thread writes the whole queue
+        self._commit_lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+        self._pending: List[Dict] = []
+        self.bloom_path = f"{ledger_path}.bloom"
+        self.bloom: Optional[BloomFilter] = None
+        if bloom_false_positive_rate is not None:
+            self._load_bloom(bloom_false_positive_rate)
+        
+    @property
+    def ledger(self) -> Dict:
+        """Raw in-memory ledger document (JSON backends only)"""
+        return self.backend.ledger
+    
+    def __len__(self) -> int:
+        """Number of records in the ledger"""
+        return self.backend.count()
+    
+    def compact(self):
+        """Compact the underlying storage (folds the log into its snapshot or a new segment)"""
+        self.backend.compact()
+        if self.bloom is not None:
+            self.bloom.save(self.bloom_path)
+    
+    def refresh(self):
+        """
+        Pick up credentials issued or revoked by other processes sharing this ledger
         
-    def _load_ledger(self) -> Dict:
-        """Load existing ledger or create new one"""
-        ledger_file = Path(self.ledger_path)
+        Listeners are notified of each of those changes, as for local ones.
+        """
+        self.backend.refresh()
+        self._update_bloom()
+        for event, record in self._external_changes():
+            self._notify(event, record)
+    
+    def close(self):
+        """Persist the Bloom filter and release the storage backend"""
+        if self.bloom is not None:
+            self.bloom.save(self.bloom_path)
+        self.backend.close()
+    
+    def _load_bloom(self, false_positive_rate: float):
+        """Load the persisted Bloom filter, rebuilding it if it does not fit the ledger"""
+        try:
+            bloom = BloomFilter.load(self.bloom_path)
+        except (FileNotFoundError, ValueError):
+            bloom = None
         
-        if ledger_file.exists():
-            with open(self.ledger_path, 'r') as f:
-                return json.load(f)
+        if (bloom is None or bloom.false_positive_rate != false_positive_rate
+                or not self._bloom_matches_ledger(bloom)):
+            self._rebuild_bloom(false_positive_rate)
         else:
-            return {
-                'credentials': [],
-                'metadata': {
-                    'created_at': datetime.datetime.now().isoformat(),
-                    'version': '1.0',
-                    'description': 'SkillChain DX Credential Ledger'
-                }
-            }
+            self.bloom = bloom
+            self._update_bloom()
+    
+    def _bloom_matches_ledger(self, bloom: BloomFilter) -> bool:
+        """Whether a persisted filter was built from (a prefix of) this ledger"""
+        if bloom.ledger_created_at != (self.backend.metadata.get('created_at') or ''):
+            return False  # another ledger, e.g. a restored or replaced file
+        if bloom.records > self.backend.count():
+            return False
+        if bloom.records == 0:
+            return True
+        return self.backend.get(bloom.records - 1).get('hash', '') == bloom.last_hash
+    
+    def _rebuild_bloom(self, false_positive_rate: float):
+        """Build a Bloom filter over all issued credential hashes and persist it"""
+        count = self.backend.count()
+        bloom = BloomFilter(max(2 * count, 1024), false_positive_rate)
+        bloom.ledger_created_at = self.backend.metadata.get('created_at') or ''
+        # Every status: a miss must mean "never issued", so revoked hashes stay in
+        for record in self.backend.iter_records():
+            if 'hash' in record:
+                bloom.add(record['hash'])
+            bloom.last_hash = record.get('hash', '')
+        bloom.records = count
+        self.bloom = bloom
+        bloom.save(self.bloom_path)
+    
+    def _update_bloom(self):
+        """Add hashes of records appended since the Bloom filter was last updated"""
+        if self.bloom is None:
+            return
+        count = self.backend.count()
+        if count > self.bloom.capacity:
+            # Past capacity the false-positive rate climbs; resize instead
+            self._rebuild_bloom(self.bloom.false_positive_rate)
+            return
+        for record in self.backend.iter_records(self.bloom.records):
+            if 'hash' in record:
+                self.bloom.add(record['hash'])
+            self.bloom.last_hash = record.get('hash', '')
+        self.bloom.records = count
+    
+    def add_listener(self, callback: Callable[[str, Dict], None]):
+        """
+        Register a callback for ledger changes
+        
+        Args:
+            callback: Called as callback(event, record), e.g. ('issued', record)
+        """
+        self._listeners.append(callback)
+    
+    def _notify(self, event: str, record: Dict):
+        """Publish a ledger change to all listeners"""
+        for callback in self._listeners:
+            callback(event, record)
     
-    def _save_ledger(self):
-        """Save ledger to file"""
-        Path(self.ledger_path).parent.mkdir(parents=True, exist_ok=True)
-        with open(self.ledger_path, 'w') as f:
-            json.dump(self.ledger, f, indent=2)
+    def _external_changes(self) -> List[Tuple[str, Dict]]:
+        """
+        Events for records and revocations listeners have not been told about
+        
+        These were written by other processes and picked up by a refresh
+        (explicit, or on taking the write lock). Call under the write lock or
+        after a refresh; the seen marks move past the returned events.
+        """
+        events = []
+        count = self.backend.count()
+        if count != self._seen_count:
+            events += [('issued', record) for record in self.backend.iter_records(self._seen_count)]
+            self._seen_count = count
+        revoked = self.backend.count(status='revoked')
+        if revoked != self._seen_revoked:
+            revocations = self.backend.revocations
+            events += [('revoked', self.backend.get(revocation['position']))
+                       for revocation in revocations[self._seen_revocations:]]
+            self._seen_revocations = len(revocations)
+            self._seen_revoked = revoked
+        return events
     
     def _compute_hash(self, data: Dict) -> str:
         """
@@ -56,16 +457,12 @@ class CredentialLedger:
         Returns:
             Hexadecimal hash string
         """
-        # Create canonical string representation
-        canonical_string = json.dumps(data, sort_keys=True)
-        
-        # Compute SHA-256 hash
-        hash_object = hashlib.sha256(canonical_string.encode())
-        return hash_object.hexdigest()
+        return compute_credential_hash(data)
     
     def issue_credential(self, employee_id: str, course_id: str, 
                         course_name: str, completion_date: str,
-                        issuer: str = 'SkillChain DX Platform') -> Dict:
+                        issuer: str = 'SkillChain DX Platform',
+                        idempotent: bool = True, verbose: bool = True) -> Dict:
         """
         Issue a new credential and add to ledger
         
@@ -75,6 +472,9 @@ class CredentialLedger:
             course_name: Name of the course
             completion_date: Date of completion
             issuer: Credential issuer
+            idempotent: Return the existing record instead of issuing a
+                duplicate when an active credential has the same hash
+            verbose: Print the outcome
             
         Returns:
             Credential record with hash
@@ -92,22 +492,508 @@ class CredentialLedger:
         credential_hash = self._compute_hash(credential_data)
         
         # Create full credential record
-        credential_record = {
-            'credential_id': f"CRED_{len(self.ledger['credentials']) + 1:04d}",
-            'timestamp': datetime.datetime.now().isoformat(),
+        credential_record = self._build_record(
+            credential_data, credential_hash, datetime.datetime.now().isoformat())
+        
+        # Add to ledger
+        result = self._append_records([credential_record], idempotent)[0]
+        if not verbose:
+            return result
+        
+        if result is credential_record:
+            print(f"✓ Credential issued: {result['credential_id']}")
+        else:
+            print(f"✓ Credential already issued: {result['credential_id']}")
+        print(f"  Hash: {credential_hash[:16]}...")
+        
+        return result
+    
+    def issue_credentials_bulk(self, records: Iterable[Tuple],
+                               idempotent: bool = True, verbose: bool = True) -> List[Dict]:
+        """
+        Issue many credentials with a single durable write
+        
+        Args:
+            records: Iterable of (employee_id, course_id, course_name,
+                completion_date[, issuer]) tuples
+            idempotent: Skip credentials whose hash is already active in the
+                ledger (or repeated in records) and return the existing record
+            verbose: Print how many credentials were issued
+            
+        Returns:
+            Issued (or existing) credential records, in input order
+        """
+        credential_data = []
+        for employee_id, course_id, course_name, completion_date, *issuer in records:
+            credential_data.append({
+                'employee_id': employee_id,
+                'course_id': course_id,
+                'course_name': course_name,
+                'completion_date': completion_date,
+                'issuer': issuer[0] if issuer else 'SkillChain DX Platform'
+            })
+        
+        hashes = list(map(self._compute_hash, credential_data))
+        timestamp = datetime.datetime.now().isoformat()
+        issued = [self._build_record(data, credential_hash, timestamp)
+                  for data, credential_hash in zip(credential_data, hashes)]
+        
+        results = self._append_records(issued, idempotent)
+        if verbose:
+            new = sum(1 for record, result in zip(issued, results) if result is record)
+            print(f"✓ Issued {new} credentials in bulk ({len(results) - new} already issued)")
+        return results
+    
+    def revoke_credential(self, credential_id: str, reason: str, verbose: bool = True) -> Dict:
+        """
+        Revoke a credential
+        
+        The revocation is appended as an event; the record itself is not
+        rewritten, and its hash-chain link and Merkle leaf stay valid because
+        neither covers the status.
+        
+        Args:
+            credential_id: Credential identifier
+            reason: Why the credential is revoked
+            verbose: Print the revocation
+            
+        Returns:
+            The revocation event (the existing one if already revoked)
+            
+        Raises:
+            ValueError: If the credential id is unknown
+        """
+        with self.backend.write_lock():
+            position = self.backend.position_of(credential_id)
+            if position is None:
+                raise ValueError(f"Unknown credential: {credential_id}")
+            if self.backend.is_revoked(position):
+                return next(r for r in reversed(self.backend.revocations)
+                            if r['position'] == position)
+            revocation = self._revoke_positions([position], reason)[0]
+        if verbose:
+            print(f"✓ Credential revoked: {credential_id}")
+        return revocation
+    
+    def revoke_issuer(self, issuer: str, reason: str, verbose: bool = True) -> List[Dict]:
+        """
+        Revoke every active credential from an issuer with a single write
+        
+        Args:
+            issuer: Issuer whose credentials are revoked, e.g. after a compromise
+            reason: Why the credentials are revoked
+            verbose: Print how many credentials were revoked
+            
+        Returns:
+            Revocation events, in ledger order
+        """
+        with self.backend.write_lock():
+            positions = [self.backend.position_of(record['credential_id'])
+                         for record in self.backend.issuer_records(issuer)]
+            revocations = self._revoke_positions(positions, reason)
+        if verbose:
+            print(f"✓ Revoked {len(revocations)} credentials from issuer: {issuer}")
+        return revocations
+    
+    def _revoke_positions(self, positions: List[int], reason: str) -> List[Dict]:
+        """Append revocation events for records (under the write lock) and notify"""
+        if not positions:
+            return []
+        external = self._external_changes()
+        revoked_at = datetime.datetime.now().isoformat()
+        revocations = [{
+            'credential_id': self.backend.get(position)['credential_id'],
+            'position': position,
+            'reason': reason,
+            'revoked_at': revoked_at
+        } for position in positions]
+        self.backend.revoke(revocations)
+        self._seen_revoked += len(revocations)
+        self._seen_revocations += len(revocations)
+        
+        for event, record in external:
+            self._notify(event, record)
+        for position in positions:
+            self._notify('revoked', self.backend.get(position))
+        return revocations
+    
+    def _build_record(self, credential_data: Dict, credential_hash: str,
+                      timestamp: str) -> Dict:
+        """Create the ledger record for a credential; its id is allocated on commit"""
+        return {
+            'credential_id': None,
+            'timestamp': timestamp,
             'data': credential_data,
             'hash': credential_hash,
             'status': 'active'
         }
+    
+    @staticmethod
+    def _credential_id(position: int) -> str:
+        """Credential id for the record at a ledger position"""
+        return f"CRED_{position + 1:04d}"
+    
+    def _append_records(self, records: List[Dict], idempotent: bool = True) -> List[Dict]:
+        """
+        Chain new records and persist them with their checkpoints
         
-        # Add to ledger
-        self.ledger['credentials'].append(credential_record)
-        self._save_ledger()
+        Concurrent callers are group-committed: whichever thread takes the
+        commit lock writes every queued batch at once, so they all share one
+        durable write (one fsync or one transaction).
         
-        print(f"✓ Credential issued: {credential_record['credential_id']}")
-        print(f"  Hash: {credential_hash[:16]}...")
+        Returns:
+            For each record, itself if it was appended, or the existing active
+            record with the same hash if idempotent and one exists
+        """
+        if not records:
+            return []
+        pending = {'records': records, 'idempotent': idempotent,
+                   'done': False, 'error': None, 'results': None}
+        with self._pending_lock:
+            self._pending.append(pending)
+        
+        with self._commit_lock:
+            if not pending['done']:
+                with self._pending_lock:
+                    group, self._pending = self._pending, []
+                batch = [(record, entry['idempotent'])
+                         for entry in group for record in entry['records']]
+                try:
+                    results, events = self._commit(batch)
+                except Exception as error:
+                    for entry in group:
+                        entry['error'] = error
+                else:
+                    offset = 0
+                    for entry in group:
+                        entry['results'] = results[offset:offset + len(entry['records'])]
+                        offset += len(entry['records'])
+                    for event, record in events:
+                        self._notify(event, record)
+                for entry in group:
+                    entry['done'] = True
+        
+        if pending['error'] is not None:
+            raise pending['error']
+        return pending['results']
+    
+    def _find_active(self, credential_hash: str) -> Optional[Dict]:
+        """First active record with a credential hash, or None"""
+        if self.bloom is not None and credential_hash not in self.bloom:
+            return None
+        for record in self.backend.find_by_hash(credential_hash):
+            return record
+        return None
+    
+    def _commit(self, batch: List[Tuple[Dict, bool]]) -> Tuple[List[Dict], List[Tuple[str, Dict]]]:
+        """
+        Allocate ids, chain and durably append records under the write lock
+        
+        Ids follow the ledger position, which is only read while the lock is
+        held, so ids stay unique and monotonic across processes. Duplicate
+        checks run under the same lock, so concurrent identical issues
+        produce one record.
+        
+        Args:
+            batch: (record, idempotent) pairs
+            
+        Returns:
+            (result per batch entry, events to publish: changes by other
+            processes picked up on locking, then the records appended)
+        """
+        with self.backend.write_lock():
+            self._sync_chain_head()
+            self._update_bloom()
+            events = self._external_changes()
+            
+            results = []
+            records = []
+            appended_hashes: Dict[str, Dict] = {}
+            for record, idempotent in batch:
+                if idempotent:
+                    existing = (appended_hashes.get(record['hash'])
+                                or self._find_active(record['hash']))
+                    if existing is not None:
+                        results.append(existing)
+                        continue
+                appended_hashes.setdefault(record['hash'], record)
+                records.append(record)
+                results.append(record)
+            if not records:
+                return results, events
+            
+            start = self._chain_count
+            head = self._chain_head
+            checkpoints = []
+            for offset, record in enumerate(records):
+                position = start + offset
+                record['credential_id'] = self._credential_id(position)
+                record['prev_hash'] = head
+                head = _chain_link(head, record)
+                if (position + 1) % self.checkpoint_every == 0:
+                    checkpoints.append(self._make_checkpoint(position + 1, head))
+            
+            self.backend.append(records, checkpoints)
+            self._chain_head = head
+            self._chain_count = start + len(records)
+            self._seen_count = self._chain_count
+            self._update_bloom()
+        return results, events + [('issued', record) for record in records]
+    
+    def _sync_chain_head(self):
+        """Recompute the chain head if other processes appended records"""
+        if self.backend.count() != self._chain_count:
+            self._chain_head = self._compute_chain_head()
+            self._chain_count = self.backend.count()
+    
+    def _compute_chain_head(self) -> str:
+        """
+        Chain hash of the last record
+        
+        Records written before chaining have no prev_hash; they are folded into
+        the chain in order, so the first chained record also protects them.
+        Once the last record carries a prev_hash this is O(1).
+        """
+        start = self.backend.count()
+        while start > 0 and 'prev_hash' not in self.backend.get(start - 1):
+            start -= 1
+        
+        head = self.backend.get(start - 1)['prev_hash'] if start > 0 else GENESIS_HASH
+        for record in self.backend.iter_records(max(start - 1, 0)):
+            head = _chain_link(head, record)
+        return head
+    
+    def _make_checkpoint(self, record_count: int, head: str) -> Dict:
+        """Checkpoint entry for the chain head after record_count records"""
+        return {
+            'records': record_count,
+            'head': head,
+            'created_at': datetime.datetime.now().isoformat()
+        }
+    
+    def create_checkpoint(self) -> Dict:
+        """
+        Record a checkpoint at the current chain head
         
-        return credential_record
+        Returns:
+            The checkpoint entry
+        """
+        with self.backend.write_lock():
+            self._sync_chain_head()
+            checkpoint = self._make_checkpoint(self._chain_count, self._chain_head)
+            self.backend.add_checkpoint(checkpoint)
+        return checkpoint
+    
+    def _load_trusted_head(self) -> Optional[Tuple[int, str]]:
+        """Last validated (record count, head) of this ledger, or None if there is none"""
+        if self._trusted_head is not None:
+            return self._trusted_head
+        try:
+            with open(self.chain_state_path, 'r') as f:
+                saved = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        # Saved for another ledger at this path, or for records since removed
+        if (saved.get('created_at') != self.backend.metadata.get('created_at')
+                or not 0 < saved.get('records', 0) <= self.backend.count()):
+            return None
+        self._trusted_head = (saved['records'], saved['head'])
+        return self._trusted_head
+    
+    def _save_trusted_head(self, record_count: int, head: str):
+        """Remember a validated (record count, head) in memory and in the .chain sidecar"""
+        self._trusted_head = (record_count, head)
+        state = {'created_at': self.backend.metadata.get('created_at'),
+                 'records': record_count, 'head': head}
+        atomic_write(self.chain_state_path, lambda f: json.dump(state, f))
+    
+    def validate_chain(self, since_checkpoint: Optional[int] = None) -> Dict:
+        """
+        Validate the hash chain from a trusted point to the end of the ledger
+        
+        Each record's hash must match its data and its prev_hash must match the
+        chain hash of the record before it; checkpoints passed on the way must
+        match the recomputed head. The head reached is saved outside the ledger
+        (ledger_path + '.chain'), so the next default call only checks records
+        appended since; checkpoints stored in the ledger are never trusted as
+        a starting point unless asked for.
+        
+        Args:
+            since_checkpoint: Record count of a stored checkpoint to start
+                from; 0 revalidates from genesis, None starts from the last
+                validated head (or genesis if there is none)
+            
+        Returns:
+            Validation result dictionary
+        """
+        total = self.backend.count()
+        checkpoints = {cp['records']: cp['head'] for cp in self.backend.checkpoints}
+        trusted = self._load_trusted_head() if since_checkpoint is None else None
+        if since_checkpoint is None:
+            since_checkpoint = trusted[0] if trusted is not None else 0
+        
+        def failure(position: int, record: Dict, reason: str) -> Dict:
+            if passed is not None:
+                # Records up to a checkpoint passed on the way are still good
+                self._save_trusted_head(*passed)
+            return {
+                'valid': False,
+                'from_record': since_checkpoint,
+                'checked_records': position - since_checkpoint,
+                'failed_credential_id': record.get('credential_id'),
+                'failed_position': position,
+                'reason': reason,
+                'last_good_checkpoint': last_good
+            }
+        
+        last_good = self._trusted_head[0] if self._trusted_head is not None else None
+        passed: Optional[Tuple[int, str]] = None
+        if since_checkpoint == 0:
+            head = GENESIS_HASH
+        elif trusted is not None or since_checkpoint in checkpoints:
+            head = trusted[1] if trusted is not None else checkpoints[since_checkpoint]
+            boundary = self.backend.get(since_checkpoint - 1)
+            if 'prev_hash' in boundary and _chain_link(boundary['prev_hash'], boundary) != head:
+                return failure(since_checkpoint - 1, boundary, 'record does not match trusted head')
+        else:
+            raise ValueError(f"No checkpoint at record {since_checkpoint}")
+        
+        records = self.backend.iter_records(since_checkpoint, total)
+        for position, record in enumerate(records, start=since_checkpoint):
+            if 'hash' not in record or self._compute_hash(record.get('data')) != record['hash']:
+                return failure(position, record, 'hash does not match credential data')
+            if record.get('prev_hash', head) != head:
+                return failure(position, record, 'prev_hash does not match previous record')
+            head = _chain_link(head, record)
+            if checkpoints.get(position + 1, head) != head:
+                return failure(position, record, 'checkpoint head does not match chain')
+            if position + 1 in checkpoints:
+                last_good = position + 1
+                passed = (last_good, head)
+        
+        if total > 0:
+            self._save_trusted_head(total, head)
+        return {
+            'valid': True,
+            'from_record': since_checkpoint,
+            'checked_records': total - since_checkpoint,
+            'head': head,
+            'last_good_checkpoint': last_good
+        }
+    
+    def audit(self, findings_path: str = 'results/ledger_audit.jsonl',
+              workers: Optional[int] = None, chunk_size: int = 50000) -> Dict:
+        """
+        Audit every record of the ledger in parallel chunks
+        
+        Each chunk recomputes record hashes from their data and checks the
+        record fields, status values and that timestamps never go backwards.
+        Chunks run on a process pool when the backend can be pickled (the
+        built-in backends reopen the ledger from its path in each worker),
+        otherwise on a thread pool. Duplicate credential ids (any status) and
+        duplicate hashes among active records are found by sorting 64-bit
+        fingerprints collected from the chunks, then confirmed on the records.
+        
+        Args:
+            findings_path: JSON Lines file receiving one finding per line,
+                ordered by position; gzipped if it ends in '.gz'
+            workers: Worker processes (default: one per CPU)
+            chunk_size: Records per task
+            
+        Returns:
+            Summary with the 'records' audited, the number of 'findings',
+            counts 'by_check', 'chunks', 'workers', 'elapsed_seconds' and
+            'findings_path'
+        """
+        start_time = time.time()
+        workers = workers or os.cpu_count() or 1
+        total = self.backend.count()
+        bounds = [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+        
+        executor = None
+        if workers > 1 and len(bounds) > 1:
+            try:
+                pickle.dumps(self.backend)
+                executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_audit_worker,
+                                               initargs=(self.backend,))
+                task = _audit_chunk
+            except (pickle.PicklingError, TypeError, AttributeError):
+                executor = None
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=workers)
+            task = functools.partial(_audit_chunk, backend=self.backend)
+        
+        findings = []
+        id_prints, hash_prints, active_positions = [], [], []
+        with executor:
+            for chunk_findings, ids, hashes, positions in executor.map(
+                    task, [start for start, _ in bounds], [end for _, end in bounds]):
+                findings.extend(chunk_findings)
+                id_prints.append(ids)
+                hash_prints.append(hashes)
+                active_positions.append(positions)
+        
+        if bounds:
+            findings.extend(self._audit_duplicates(
+                np.concatenate(id_prints), np.arange(total), 'credential_id',
+                'duplicate_credential_id'))
+            findings.extend(self._audit_duplicates(
+                np.concatenate(hash_prints), np.concatenate(active_positions), 'hash',
+                'duplicate_active_hash'))
+        findings.sort(key=lambda finding: (finding['position'], finding['check']))
+        
+        Path(findings_path).parent.mkdir(parents=True, exist_ok=True)
+        with (gzip.open(findings_path, 'wt') if findings_path.endswith('.gz')
+              else open(findings_path, 'w')) as f:
+            for finding in findings:
+                f.write(json.dumps(finding) + '\n')
+        
+        by_check: Dict[str, int] = {}
+        for finding in findings:
+            by_check[finding['check']] = by_check.get(finding['check'], 0) + 1
+        summary = {
+            'records': total,
+            'findings': len(findings),
+            'by_check': by_check,
+            'chunks': len(bounds),
+            'workers': workers,
+            'elapsed_seconds': round(time.time() - start_time, 3),
+            'findings_path': findings_path
+        }
+        print(f"✓ Audited {total} records in {summary['elapsed_seconds']:.2f} seconds: "
+              f"{len(findings)} findings saved to {findings_path}")
+        return summary
+    
+    def _audit_duplicates(self, prints: np.ndarray, positions: np.ndarray,
+                          field: str, check: str) -> List[Dict]:
+        """
+        Findings for records repeating an earlier record's field value
+        
+        Args:
+            prints: Fingerprints of the field values
+            positions: Position of the record behind each fingerprint
+            field: Record field compared ('credential_id' or 'hash')
+            check: Name of the finding
+            
+        Returns:
+            One finding per repeat, pointing at the first position holding the value
+        """
+        _, inverse, counts = np.unique(prints, return_inverse=True, return_counts=True)
+        candidates = positions[counts[inverse] > 1]
+        # Equal fingerprints are only candidates; compare the actual values
+        first: Dict[str, int] = {}
+        findings = []
+        for position in sorted(candidates.tolist()):
+            record = self.backend.get(position)
+            value = str(record.get(field))
+            if value not in first:
+                first[value] = position
+                continue
+            findings.append({'position': position, 'credential_id': record.get('credential_id'),
+                             'check': check,
+                             'message': f"{field} repeats the record at position {first[value]}",
+                             'first_position': first[value]})
+        return findings
     
     def verify_credential(self, employee_id: str, course_id: str, 
                          course_name: str, completion_date: str,
@@ -137,9 +1023,22 @@ class CredentialLedger:
         # Compute hash
         verification_hash = self._compute_hash(credential_data)
         
-        # Search ledger
-        for record in self.ledger['credentials']:
-            if record['hash'] == verification_hash and record['status'] == 'active':
+        return self._verify_hash(verification_hash)
+    
+    def _verify_hash(self, verification_hash: str) -> Dict:
+        """Verification result for a credential hash"""
+        # A Bloom filter miss means the hash was never issued; skip the index
+        if self.bloom is not None and verification_hash not in self.bloom:
+            return {
+                'verified': False,
+                'hash': verification_hash,
+                'message': 'Credential not found in ledger'
+            }
+        
+        # Look up ledger
+        records = self.backend.find_by_hash(verification_hash, status=None)
+        for record in records:
+            if record['status'] == 'active':
                 return {
                     'verified': True,
                     'credential_id': record['credential_id'],
@@ -148,12 +1047,173 @@ class CredentialLedger:
                     'message': 'Credential verified successfully'
                 }
         
+        if any(record['status'] == 'revoked' for record in records):
+            return {
+                'verified': False,
+                'revoked': True,
+                'credential_id': records[-1]['credential_id'],
+                'hash': verification_hash,
+                'message': 'Credential has been revoked'
+            }
+        
         return {
             'verified': False,
             'hash': verification_hash,
             'message': 'Credential not found in ledger'
         }
     
+    @staticmethod
+    def _claim_data(claim: Union[Dict, Tuple]) -> Dict:
+        """Credential data for a claim dict or (employee_id, ..., [issuer]) tuple"""
+        if isinstance(claim, dict):
+            data = {field: claim[field] for field in CLAIM_FIELDS[:-1]}
+            data['issuer'] = claim.get('issuer') or DEFAULT_ISSUER
+            return data
+        employee_id, course_id, course_name, completion_date, *issuer = claim
+        return {
+            'employee_id': employee_id,
+            'course_id': course_id,
+            'course_name': course_name,
+            'completion_date': completion_date,
+            'issuer': issuer[0] if issuer else DEFAULT_ISSUER
+        }
+    
+    def _verify_claims(self, start: int, claims: List) -> List[Dict]:
+        """Verify one chunk of claims; start is the index of its first claim"""
+        results = []
+        for index, claim in enumerate(claims, start):
+            try:
+                data = self._claim_data(claim)
+            except (KeyError, TypeError, ValueError) as e:
+                results.append({'index': index, 'verified': False,
+                                'message': f"Malformed claim: {e!r}"})
+                continue
+            results.append({'index': index, **self._verify_hash(self._compute_hash(data))})
+        return results
+    
+    def verify_credentials_bulk(self, claims: Iterable[Union[Dict, Tuple]],
+                                workers: int = 4, chunk_size: int = 1000) -> Iterator[Dict]:
+        """
+        Verify many claimed credentials on a thread pool, streaming results
+        
+        Claims are hashed and looked up in chunks; at most 2 * workers chunks
+        are in flight, so memory stays bounded however long the input is.
+        Results are yielded as chunks complete and may be out of input order.
+        
+        Args:
+            claims: Claim dicts (e.g. from read_claims) or (employee_id,
+                course_id, course_name, completion_date[, issuer]) tuples
+            workers: Worker threads
+            chunk_size: Claims per task
+            
+        Yields:
+            verify_credential results plus the claim's 0-based 'index';
+            malformed claims yield verified=False with a message
+        """
+        claims = iter(claims)
+        start = 0
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            in_flight = set()
+            while True:
+                chunk = list(islice(claims, chunk_size))
+                if chunk:
+                    in_flight.add(executor.submit(self._verify_claims, start, chunk))
+                    start += len(chunk)
+                if not chunk or len(in_flight) >= 2 * workers:
+                    if not in_flight:
+                        break
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from future.result()
+    
+    def _batch_levels(self, batch: int) -> List[List[bytes]]:
+        """Merkle tree levels for one batch of records"""
+        start = batch * self.merkle_batch_size
+        records = self.backend.iter_records(start, start + self.merkle_batch_size)
+        return _merkle_levels([_merkle_leaf(record['hash']) for record in records])
+    
+    def get_batch_root(self, batch: int) -> str:
+        """
+        Get the Merkle root of a batch of records
+        
+        Roots of full (sealed) batches never change and are cached; the root
+        of the last, still filling batch is recomputed on each call.
+        
+        Args:
+            batch: Batch number (records batch*size .. (batch+1)*size - 1)
+            
+        Returns:
+            Hexadecimal Merkle root
+        """
+        if batch in self._batch_roots:
+            return self._batch_roots[batch]
+        
+        root = self._batch_levels(batch)[-1][0].hex()
+        if (batch + 1) * self.merkle_batch_size <= self.backend.count():
+            self._batch_roots[batch] = root
+        return root
+    
+    def get_batch_roots(self) -> List[Dict]:
+        """
+        List the Merkle root of every batch, for publishing to verifiers
+        
+        Returns:
+            One entry per batch with its record range and root
+        """
+        total = self.backend.count()
+        batches = []
+        for batch in range((total + self.merkle_batch_size - 1) // self.merkle_batch_size):
+            start = batch * self.merkle_batch_size
+            end = min(start + self.merkle_batch_size, total)
+            batches.append({
+                'batch': batch,
+                'first_credential_id': self.backend.get(start)['credential_id'],
+                'last_credential_id': self.backend.get(end - 1)['credential_id'],
+                'size': end - start,
+                'sealed': end - start == self.merkle_batch_size,
+                'root': self.get_batch_root(batch)
+            })
+        return batches
+    
+    def get_inclusion_proof(self, credential_id: str) -> Optional[Dict]:
+        """
+        Build a Merkle inclusion proof for a credential
+        
+        Inclusion shows the record was written to the ledger; it says nothing
+        about its current status.
+        
+        Args:
+            credential_id: Credential identifier
+            
+        Returns:
+            Proof dictionary for verify_inclusion_proof, or None if unknown
+        """
+        position = self.backend.position_of(credential_id)
+        if position is None:
+            return None
+        
+        batch, index = divmod(position, self.merkle_batch_size)
+        levels = self._batch_levels(batch)
+        path = []
+        for level in levels[:-1]:
+            sibling = index ^ 1
+            if sibling < len(level):
+                path.append({
+                    'side': 'left' if sibling < index else 'right',
+                    'hash': level[sibling].hex()
+                })
+            index //= 2
+        
+        return {
+            'credential_id': credential_id,
+            'hash': self.backend.get(position)['hash'],
+            'batch': batch,
+            'leaf_index': position % self.merkle_batch_size,
+            'path': path,
+            'root': levels[-1][0].hex(),
+            'sealed': len(levels[0]) == self.merkle_batch_size
+        }
+    
     def get_employee_credentials(self, employee_id: str) -> List[Dict]:
         """
         Get all credentials for an employee
@@ -164,42 +1224,138 @@ class CredentialLedger:
         Returns:
             List of credential records
         """
-        credentials = []
-        for record in self.ledger['credentials']:
-            if (record['data']['employee_id'] == employee_id and 
-                record['status'] == 'active'):
-                credentials.append(record)
+        return self.backend.employee_records(employee_id)
+    
+    def get_course_credentials(self, course_id: str) -> List[Dict]:
+        """
+        Get all active credentials for a course
         
-        return credentials
+        Args:
+            course_id: Course identifier
+            
+        Returns:
+            List of credential records, in issue order
+        """
+        return self.backend.course_records(course_id)
     
-    def generate_verification_report(self, output_path: str = 'results/verification_report.json'):
-        """Generate verification report for all credentials"""
+    def get_issuer_credentials(self, issuer: str) -> List[Dict]:
+        """
+        Get all active credentials from an issuer
+        
+        Args:
+            issuer: Issuer name
+            
+        Returns:
+            List of credential records, in issue order
+        """
+        return self.backend.issuer_records(issuer)
+    
+    def get_credentials_between(self, start: str, end: str,
+                                course_id: Optional[str] = None) -> List[Dict]:
+        """
+        Get active credentials completed within a date range
+        
+        Args:
+            start: First completion date, inclusive (YYYY-MM-DD)
+            end: Last completion date, inclusive (YYYY-MM-DD)
+            course_id: Only return credentials for this course
+            
+        Returns:
+            List of credential records, ordered by completion date
+            
+        Raises:
+            ValueError: If start or end is not an ISO date
+        """
+        records = self.backend.records_between(start, end)
+        if course_id is not None:
+            records = [r for r in records if r['data']['course_id'] == course_id]
+        return records
+    
+    @staticmethod
+    def _report_entry(record: Dict) -> Dict:
+        """Verification report entry for one credential record"""
+        return {
+            'credential_id': record['credential_id'],
+            'course_name': record['data']['course_name'],
+            'completion_date': record['data']['completion_date'],
+            'hash': record['hash'][:16] + '...',
+            'status': record['status'],
+            'verified': record['status'] == 'active'
+        }
+    
+    def generate_verification_report(self, output_path: str = 'results/verification_report.json',
+                                     streaming: bool = False, compress: Optional[bool] = None,
+                                     verbose: bool = True):
+        """
+        Generate verification report for all credentials
+        
+        Args:
+            output_path: Report file
+            streaming: Write each employee's section as soon as it is read,
+                keeping memory bounded by the largest employee's credentials;
+                summary counters are computed in the same pass and written
+                after the sections
+            compress: gzip the report; defaults to True if output_path ends in '.gz'
+            verbose: Print where the report was saved
+            
+        Returns:
+            The report dictionary, or only its summary counters when streaming
+        """
+        if compress is None:
+            compress = output_path.endswith('.gz')
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        if streaming:
+            with (gzip.open(output_path, 'wt') if compress else open(output_path, 'w')) as f:
+                summary = self._stream_verification_report(f)
+            if verbose:
+                print(f"Verification report saved to {output_path}")
+            return summary
+        
         report = {
-            'total_credentials': len(self.ledger['credentials']),
-            'active_credentials': sum(1 for c in self.ledger['credentials'] if c['status'] == 'active'),
-            'ledger_created': self.ledger['metadata']['created_at'],
+            'total_credentials': self.backend.count(),
+            'active_credentials': self.backend.count(status='active'),
+            'revoked_credentials': self.backend.count(status='revoked'),
+            'ledger_created': self.backend.metadata['created_at'],
             'credentials_by_employee': {}
         }
         
         # Group by employee
-        for record in self.ledger['credentials']:
-            emp_id = record['data']['employee_id']
-            if emp_id not in report['credentials_by_employee']:
-                report['credentials_by_employee'][emp_id] = []
-            
-            report['credentials_by_employee'][emp_id].append({
-                'credential_id': record['credential_id'],
-                'course_name': record['data']['course_name'],
-                'completion_date': record['data']['completion_date'],
-                'hash': record['hash'][:16] + '...',
-                'verified': True
-            })
+        for emp_id, records in self.backend.iter_employee_groups():
+            report['credentials_by_employee'][emp_id] = [self._report_entry(record)
+                                                         for record in records]
         
         # Save report
-        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, 'w') as f:
+        with (gzip.open(output_path, 'wt') if compress else open(output_path, 'w')) as f:
             json.dump(report, f, indent=2)
-        
-        print(f"Verification report saved to {output_path}")
+        if verbose:
+            print(f"Verification report saved to {output_path}")
         return report
+    
+    def _stream_verification_report(self, f: TextIO) -> Dict:
+        """Write the report one employee section at a time; returns its summary"""
+        summary = {
+            'total_credentials': 0,
+            'active_credentials': 0,
+            'revoked_credentials': 0,
+            'employees': 0,
+            'ledger_created': self.backend.metadata['created_at']
+        }
+        
+        f.write('{\n  "ledger_created": ' + json.dumps(summary['ledger_created']) +
+                ',\n  "credentials_by_employee": {')
+        for emp_id, records in self.backend.iter_employee_groups():
+            entries = [self._report_entry(record) for record in records]
+            f.write(('\n' if summary['employees'] == 0 else ',\n') +
+                    f"    {json.dumps(emp_id)}: {json.dumps(entries)}")
+            summary['employees'] += 1
+            summary['total_credentials'] += len(entries)
+            summary['active_credentials'] += sum(1 for e in entries if e['status'] == 'active')
+            summary['revoked_credentials'] += sum(1 for e in entries if e['status'] == 'revoked')
+        
+        f.write('\n  }')
+        for key in ('total_credentials', 'active_credentials', 'revoked_credentials', 'employees'):
+            f.write(f',\n  "{key}": {summary[key]}')
+        f.write('\n}\n')
+        return summary
 
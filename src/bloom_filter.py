@@ -0,0 +1,108 @@
+"""
+SkillChain DX - Bloom Filter
+Compact probabilistic set used to reject unknown credentials quickly
+"""
+
+import hashlib
+import math
+import struct
+from typing import Iterable
+
+from src.ledger_backends import atomic_write
+
+
+class BloomFilter:
+    """
+    Bloom filter over strings (e.g. credential hashes)
+
+    Membership tests never give false negatives; false positives occur at
+    about false_positive_rate while no more than capacity items are added.
+    Bit positions use double hashing over one SHA-256 digest per item.
+    """
+
+    MAGIC = b'SKCLBLM2'
+    # magic, capacity, hashes, count, rate, records, last record hash,
+    # length of the ledger's created_at (which follows the header)
+    HEADER = struct.Struct('<8sQQQdQ32sH')
+
+    def __init__(self, capacity: int, false_positive_rate: float = 0.01):
+        """
+        Size an empty filter
+
+        Args:
+            capacity: Number of items the filter is sized for
+            false_positive_rate: Target false-positive rate at capacity (0 < rate < 1)
+        """
+        if not 0 < false_positive_rate < 1:
+            raise ValueError("false_positive_rate must be between 0 and 1")
+        self.capacity = max(int(capacity), 1)
+        self.false_positive_rate = false_positive_rate
+        self.num_bits = max(8, math.ceil(-self.capacity * math.log(false_positive_rate)
+                                         / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+        # Ledger records covered so far (the first `records` positions); kept by the owner
+        self.records = 0
+        # Identity of the ledger covered: its created_at and the hash of record `records - 1`
+        self.ledger_created_at = ''
+        self.last_hash = ''
+
+    def _positions(self, item: str) -> Iterable[int]:
+        """Bit positions for an item"""
+        digest = hashlib.sha256(item.encode()).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:16], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def add(self, item: str):
+        """Add an item"""
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(item))
+
+    def save(self, path: str):
+        """Write the filter to a file (atomically replaced)"""
+        created_at = self.ledger_created_at.encode()
+        header = self.HEADER.pack(self.MAGIC, self.capacity, self.num_hashes, self.count,
+                                  self.false_positive_rate, self.records,
+                                  bytes.fromhex(self.last_hash), len(created_at))
+
+        def write(f):
+            f.write(header)
+            f.write(created_at)
+            f.write(self.bits)
+
+        atomic_write(path, write, binary=True)
+
+    @classmethod
+    def load(cls, path: str) -> 'BloomFilter':
+        """
+        Read a filter written by save
+
+        Raises:
+            ValueError: If the file is not a valid Bloom filter
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        if len(data) < cls.HEADER.size:
+            raise ValueError(f"Not a Bloom filter file: {path}")
+        (magic, capacity, num_hashes, count, rate, records,
+         last_hash, created_at_size) = cls.HEADER.unpack_from(data)
+        if magic != cls.MAGIC:
+            raise ValueError(f"Not a Bloom filter file: {path}")
+
+        bloom = cls(capacity, rate)
+        bits_offset = cls.HEADER.size + created_at_size
+        if num_hashes != bloom.num_hashes or len(data) - bits_offset != len(bloom.bits):
+            raise ValueError(f"Bloom filter file does not match its header: {path}")
+        bloom.bits[:] = data[bits_offset:]
+        bloom.count = count
+        bloom.records = records
+        bloom.ledger_created_at = data[cls.HEADER.size:bits_offset].decode()
+        bloom.last_hash = last_hash.hex() if records else ''
+        return bloom
@@ -0,0 +1,279 @@
+"""
+SkillChain DX - Ledger Anchoring
+Publishes Merkle roots of sealed ledger batches to an EVM chain and verifies against them
+"""
+
+import datetime
+import json
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.blockchain_verification import CredentialLedger, verify_inclusion_proof
+
+try:
+    from web3 import Web3
+except ImportError:  # web3 is optional; only needed for anchoring
+    Web3 = None
+
+
+def _require_web3():
+    """Raise a helpful error when web3 is missing"""
+    if Web3 is None:
+        raise ImportError("Ledger anchoring requires web3: pip install web3")
+
+
+def _same_address(address: Optional[str], expected: str) -> bool:
+    """Compare account addresses, ignoring checksum capitalization"""
+    return address is not None and address.lower() == expected.lower()
+
+
+class LedgerAnchor:
+    """
+    Anchor sealed Merkle batches of a CredentialLedger to an EVM chain
+
+    Each sealed batch (merkle_batch_size records) is anchored by one
+    zero-value transaction whose input data is PAYLOAD: a magic tag, the
+    batch number, the batch size and the batch's Merkle root. No contract
+    is needed, so any EVM endpoint (a dev node, a testnet, eth-tester) can
+    be used. Anchors are recorded in ledger_path + '.anchors' as JSON Lines.
+
+    A credential is then verified against the chain by checking its Merkle
+    inclusion proof against the root read back from the anchoring
+    transaction, so one transaction covers thousands of credentials. The
+    transaction is only trusted if it succeeded, was sent by the anchoring
+    account to the anchor address on the expected chain, and is buried
+    under at least `confirmations` blocks.
+    """
+
+    PAYLOAD = struct.Struct('>8sQI32s')
+    MAGIC = b'SKCLANC1'
+
+    def __init__(self, ledger: CredentialLedger, web3, account: Optional[str] = None,
+                 private_key: Optional[str] = None, anchor_address: Optional[str] = None,
+                 anchor_path: Optional[str] = None, confirmations: int = 12):
+        """
+        Set up anchoring for a ledger
+
+        Args:
+            ledger: Ledger whose batch roots are anchored
+            web3: Connected Web3 instance
+            account: Sending account; defaults to the node's first account
+                (or the private key's address)
+            private_key: Sign transactions locally with this key instead of
+                relying on an unlocked node account
+            anchor_address: Recipient of anchoring transactions (default: the sender)
+            anchor_path: Anchor record file (default: ledger_path + '.anchors')
+            confirmations: Blocks, counting its own, an anchoring transaction
+                must be buried under before credentials are verified against it
+        """
+        _require_web3()
+        self.ledger = ledger
+        self.web3 = web3
+        self.private_key = private_key
+        if account is None:
+            account = (web3.eth.account.from_key(private_key).address if private_key
+                       else web3.eth.accounts[0])
+        self.account = account
+        self.anchor_address = anchor_address or account
+        self.anchor_path = anchor_path or f"{ledger.ledger_path}.anchors"
+        self.confirmations = confirmations
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.anchors: Dict[int, Dict] = {}
+        if Path(self.anchor_path).exists():
+            with open(self.anchor_path, 'r') as f:
+                for line in f:
+                    if line.strip():
+                        anchor = json.loads(line)
+                        self.anchors[anchor['batch']] = anchor
+
+    @classmethod
+    def local_chain(cls, ledger: CredentialLedger, **options) -> 'LedgerAnchor':
+        """
+        Anchor to a fresh in-process test chain (needs eth-tester[py-evm])
+
+        The test chain mines one block per transaction, so confirmations
+        defaults to 1 here.
+
+        Args:
+            ledger: Ledger whose batch roots are anchored
+            **options: Further LedgerAnchor arguments
+
+        Returns:
+            LedgerAnchor using web3's EthereumTesterProvider
+        """
+        _require_web3()
+        options.setdefault('confirmations', 1)
+        return cls(ledger, Web3(Web3.EthereumTesterProvider()), **options)
+
+    def pending_batches(self) -> List[int]:
+        """Sealed batches not yet anchored, oldest first"""
+        sealed = self.ledger.backend.count() // self.ledger.merkle_batch_size
+        return [batch for batch in range(sealed) if batch not in self.anchors]
+
+    def _send(self, payload: bytes):
+        """Submit an anchoring transaction and wait for its receipt"""
+        eth = self.web3.eth
+        transaction = {'from': self.account, 'to': self.anchor_address, 'value': 0,
+                       'data': '0x' + payload.hex()}
+        if self.private_key is None:
+            tx_hash = eth.send_transaction(transaction)
+        else:
+            transaction.update({
+                'nonce': eth.get_transaction_count(self.account),
+                'chainId': eth.chain_id,
+                'gasPrice': eth.gas_price
+            })
+            transaction['gas'] = eth.estimate_gas(transaction)
+            signed = eth.account.sign_transaction(transaction, self.private_key)
+            tx_hash = eth.send_raw_transaction(signed.rawTransaction)
+        return eth.wait_for_transaction_receipt(tx_hash)
+
+    def anchor_pending(self) -> List[Dict]:
+        """
+        Anchor every sealed batch that has no anchor yet, one transaction each
+
+        Nothing is printed, so this can run on the background thread;
+        callers report the returned anchors as they see fit.
+
+        Returns:
+            The new anchor records
+        """
+        with self._lock:
+            self.ledger.refresh()
+            size = self.ledger.merkle_batch_size
+            new = []
+            for batch in self.pending_batches():
+                root = self.ledger.get_batch_root(batch)
+                payload = self.PAYLOAD.pack(self.MAGIC, batch, size, bytes.fromhex(root))
+                receipt = self._send(payload)
+                if receipt['status'] != 1:
+                    raise RuntimeError(f"Anchoring transaction for batch {batch} failed")
+                anchor = {
+                    'batch': batch,
+                    'size': size,
+                    'root': root,
+                    'tx_hash': Web3.to_hex(receipt['transactionHash']),
+                    'block_number': receipt['blockNumber'],
+                    'chain_id': self.web3.eth.chain_id,
+                    'from': self.account,
+                    'to': self.anchor_address,
+                    'anchored_at': datetime.datetime.now().isoformat()
+                }
+                with open(self.anchor_path, 'a') as f:
+                    f.write(json.dumps(anchor) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                self.anchors[batch] = anchor
+                new.append(anchor)
+        return new
+
+    def start(self, interval: float = 60.0):
+        """
+        Anchor new sealed batches every interval seconds on a background thread
+
+        Args:
+            interval: Seconds between anchoring rounds
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval):
+                self.anchor_pending()
+
+        self._thread = threading.Thread(target=run, name='ledger-anchor', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background anchoring thread (an in-flight round completes first)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def read_anchor(self, tx_hash: str) -> Dict:
+        """
+        Decode an anchoring transaction from the chain
+
+        Anyone can send a transaction carrying the anchor payload, so the
+        transaction must also have succeeded and have been sent by this
+        anchor's account to its anchor address.
+
+        Args:
+            tx_hash: Transaction hash (hex)
+
+        Returns:
+            {'batch', 'size', 'root', 'block_number', 'chain_id'} as stored
+            on chain ('chain_id' is None for pre-EIP-155 transactions)
+
+        Raises:
+            ValueError: If the transaction is not a ledger anchor of this account
+        """
+        eth = self.web3.eth
+        transaction = eth.get_transaction(tx_hash)
+        # Nodes name the calldata 'input'; eth-tester names it 'data'
+        data = transaction['input'] if 'input' in transaction else transaction['data']
+        data = bytes.fromhex(data[2:]) if isinstance(data, str) else bytes(data)
+        if len(data) != self.PAYLOAD.size or not data.startswith(self.MAGIC):
+            raise ValueError(f"Transaction {tx_hash} is not a ledger anchor")
+        if not (_same_address(transaction.get('from'), self.account)
+                and _same_address(transaction.get('to'), self.anchor_address)):
+            raise ValueError(f"Transaction {tx_hash} was not sent by the anchoring account "
+                             f"to the anchor address")
+        if transaction.get('blockNumber') is None:
+            raise ValueError(f"Transaction {tx_hash} is not mined yet")
+        if eth.get_transaction_receipt(tx_hash)['status'] != 1:
+            raise ValueError(f"Transaction {tx_hash} failed")
+        _, batch, size, root = self.PAYLOAD.unpack(data)
+        return {'batch': batch, 'size': size, 'root': root.hex(),
+                'block_number': transaction['blockNumber'],
+                'chain_id': transaction.get('chainId')}
+
+    def verify_credential(self, credential_id: str) -> Dict:
+        """
+        Verify a credential against the root anchored on chain for its batch
+
+        Args:
+            credential_id: Credential identifier
+
+        Returns:
+            Result with 'verified', a 'message' and, when anchored, the
+            'batch', 'tx_hash', 'block_number' and the credential 'status'
+        """
+        proof = self.ledger.get_inclusion_proof(credential_id)
+        if proof is None:
+            return {'verified': False, 'message': 'Credential not found in ledger'}
+        anchor = self.anchors.get(proof['batch'])
+        if anchor is None:
+            return {'verified': False, 'batch': proof['batch'],
+                    'message': 'Credential batch is not anchored yet'}
+
+        result = {'batch': proof['batch'], 'tx_hash': anchor['tx_hash']}
+        try:
+            on_chain = self.read_anchor(anchor['tx_hash'])
+        except ValueError as e:
+            return dict(result, verified=False, message=str(e))
+        result['block_number'] = on_chain['block_number']
+        chain_id = self.web3.eth.chain_id
+        if chain_id != anchor['chain_id'] or on_chain['chain_id'] not in (None, chain_id):
+            return dict(result, verified=False, message='Anchor is on a different chain')
+        depth = self.web3.eth.block_number - on_chain['block_number'] + 1
+        if depth < self.confirmations:
+            return dict(result, verified=False,
+                        message=f"Anchor has {depth} of {self.confirmations} confirmations")
+        if on_chain['batch'] != proof['batch'] or on_chain['size'] != self.ledger.merkle_batch_size:
+            return dict(result, verified=False, message='Anchor does not cover this batch')
+        if not verify_inclusion_proof(proof['hash'], proof, root=on_chain['root']):
+            return dict(result, verified=False,
+                        message='Credential does not match the anchored batch root')
+
+        status = self.ledger.backend.get(self.ledger.backend.position_of(credential_id))['status']
+        return dict(result, verified=True, status=status,
+                    message=f"Credential included in batch anchored in block "
+                            f"{on_chain['block_number']}")
@@ -0,0 +1,2273 @@
+"""
+SkillChain DX - Ledger Storage Backends
+Pluggable persistence and indexed queries for the credential ledger
+"""
+
+import bisect
+import datetime
+import hashlib
+import heapq
+import io
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import threading
+from contextlib import contextmanager
+from itertools import groupby, islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; locking is then per process only
+    fcntl = None
+
+
+def new_ledger_metadata() -> Dict:
+    """Metadata for a newly created ledger"""
+    return {
+        'created_at': datetime.datetime.now().isoformat(),
+        'version': '1.0',
+        'description': 'SkillChain DX Credential Ledger'
+    }
+
+
+# Fields the indexes read; records missing any are left out of the indexes
+# (they stay readable by position, and CredentialLedger.audit reports them)
+INDEXED_FIELDS = ('credential_id', 'hash', 'status')
+INDEXED_DATA_FIELDS = ('employee_id', 'course_id', 'issuer', 'completion_date')
+
+
+def is_indexable(record: Dict) -> bool:
+    """Whether a record has every field the indexes read"""
+    data = record.get('data')
+    return (isinstance(data, dict) and all(field in record for field in INDEXED_FIELDS)
+            and all(field in data for field in INDEXED_DATA_FIELDS))
+
+
+def _fsync_dir(path: str):
+    """Flush a directory entry so a rename into it survives a crash"""
+    if os.name != 'posix':
+        return
+    fd = os.open(str(Path(path).parent), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path: str, write, binary: bool = False):
+    """
+    Replace a file atomically: write a temp file, fsync it, rename it over path
+
+    Args:
+        path: Destination file
+        write: Callable that writes the content to an open file
+        binary: Open the temp file in binary instead of text mode
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb' if binary else 'w') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(path)
+
+
+def file_version(path: str) -> Optional[Tuple]:
+    """Identity of a file version (None if missing); atomic replaces change the inode"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+class FileLock:
+    """
+    Re-entrant exclusive lock across threads and processes
+
+    Threads serialize on an RLock; processes on flock() of a lock file.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Lock file path (created if missing)
+        """
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
+
+
+class LedgerLog:
+    """
+    Append-only JSON Lines log of ledger operations
+
+    Each line is one entry numbered by a log sequence number (lsn), e.g.
+    {'lsn': 7, 'op': 'issue', 'record': {...}}. The log remembers the byte
+    offset it has read up to, so entries appended by other processes can
+    be replayed incrementally.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Log file path
+        """
+        self.path = path
+        self.reset()
+
+    def reset(self, last_lsn: int = 0):
+        """Forget the read position; entries up to last_lsn count as applied"""
+        self.offset = 0
+        self.entries = 0
+        self.last_lsn = last_lsn
+
+    def size(self) -> int:
+        """Current size of the log file in bytes"""
+        return os.path.getsize(self.path) if Path(self.path).exists() else 0
+
+    def replay(self, apply: Callable[[Dict], None]):
+        """
+        Apply entries from the last read offset onwards
+
+        A torn final line (left by a crash mid-append) is truncated so new
+        appends stay readable; an unreadable line before the end is
+        corruption and is never discarded.
+
+        Args:
+            apply: Called with each entry not yet applied (lsn > last_lsn)
+
+        Raises:
+            ValueError: If a line other than the last cannot be parsed
+        """
+        if not Path(self.path).exists():
+            return
+
+        with open(self.path, 'rb+') as f:
+            f.seek(self.offset)
+            for line in iter(f.readline, b''):
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError('incomplete log line')
+                    entry = json.loads(line)
+                except ValueError:
+                    if f.tell() < os.fstat(f.fileno()).st_size:
+                        raise ValueError(f"Corrupt ledger log entry at byte {self.offset} of "
+                                         f"{self.path}; valid entries follow it") from None
+                    # Torn final write from a crash: drop it
+                    f.truncate(self.offset)
+                    break
+                self.offset += len(line)
+                self.entries += 1
+                if entry['lsn'] <= self.last_lsn:
+                    continue  # already folded into the snapshot
+                apply(entry)
+                self.last_lsn = entry['lsn']
+
+    def append(self, entries: List[Dict]):
+        """
+        Durably append entries with a single fsync
+
+        Args:
+            entries: Log entries without lsn, e.g. {'op': 'issue', 'record': {...}}
+        """
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        lines = []
+        for entry in entries:
+            self.last_lsn += 1
+            lines.append(json.dumps({'lsn': self.last_lsn, **entry}) + '\n')
+
+        data = ''.join(lines).encode()
+        with open(self.path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        self.offset += len(data)
+        self.entries += len(lines)
+
+    def truncate(self):
+        """Empty the log after its entries were folded into a snapshot"""
+        open(self.path, 'w').close()
+        self.offset = 0
+        self.entries = 0
+
+
+class RevocationBitmap:
+    """Dense bitmap of revoked record positions (bit n set = position n revoked)"""
+
+    def __init__(self):
+        self.bits = bytearray()
+        self.count = 0
+
+    def add(self, position: int) -> bool:
+        """Mark a position revoked; False if it already was"""
+        byte, mask = position >> 3, 1 << (position & 7)
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(byte + 1 - len(self.bits)))
+        if self.bits[byte] & mask:
+            return False
+        self.bits[byte] |= mask
+        self.count += 1
+        return True
+
+    def __contains__(self, position: int) -> bool:
+        byte = position >> 3
+        return byte < len(self.bits) and bool(self.bits[byte] & (1 << (position & 7)))
+
+
+class LedgerBackend:
+    """
+    Storage backend interface for CredentialLedger
+
+    Records are addressed by position, their 0-based order of issuance.
+    Query methods take an optional status filter (None matches any status).
+    """
+
+    def count(self, status: Optional[str] = None) -> int:
+        """Number of records, optionally only those with a given status"""
+        raise NotImplementedError
+
+    def get(self, position: int) -> Dict:
+        """Record at a position"""
+        raise NotImplementedError
+
+    def iter_records(self, start: int = 0, end: Optional[int] = None) -> Iterator[Dict]:
+        """Records from position start up to (excluding) end, in order"""
+        raise NotImplementedError
+
+    def position_of(self, credential_id: str) -> Optional[int]:
+        """Position of a credential id, or None if unknown"""
+        raise NotImplementedError
+
+    def find_by_hash(self, credential_hash: str, status: Optional[str] = 'active') -> List[Dict]:
+        """Records with a given credential hash"""
+        raise NotImplementedError
+
+    def employee_records(self, employee_id: str, status: Optional[str] = 'active') -> List[Dict]:
+        """Records issued to an employee, in issue order"""
+        raise NotImplementedError
+
+    def iter_employee_groups(self) -> Iterator[Tuple[str, List[Dict]]]:
+        """(employee_id, records) pairs covering every record"""
+        raise NotImplementedError
+
+    def course_records(self, course_id: str, status: Optional[str] = 'active') -> List[Dict]:
+        """Records for a course, in issue order"""
+        raise NotImplementedError
+
+    def issuer_records(self, issuer: str, status: Optional[str] = 'active') -> List[Dict]:
+        """Records from an issuer, in issue order"""
+        raise NotImplementedError
+
+    def records_between(self, start: str, end: str, status: Optional[str] = 'active') -> List[Dict]:
+        """
+        Records completed between two ISO dates (inclusive)
+
+        Records whose completion_date is not an ISO date never match.
+
+        Returns:
+            Records ordered by completion date, then issue order
+
+        Raises:
+            ValueError: If start or end is not an ISO (YYYY-MM-DD) date
+        """
+        raise NotImplementedError
+
+    @contextmanager
+    def write_lock(self):
+        """
+        Hold the ledger exclusively across threads and processes
+
+        State written by other processes is picked up on entry, so positions
+        allocated inside the lock are unique. append and add_checkpoint must
+        be called inside it.
+        """
+        raise NotImplementedError
+        yield
+
+    def refresh(self):
+        """Pick up records written by other processes"""
+
+    def append(self, records: List[Dict], checkpoints: List[Dict]):
+        """Durably append new records and hash-chain checkpoints in one commit"""
+        raise NotImplementedError
+
+    def add_checkpoint(self, checkpoint: Dict):
+        """Durably store a hash-chain checkpoint"""
+        raise NotImplementedError
+
+    def revoke(self, revocations: List[Dict]):
+        """
+        Durably append revocation events and mark their records revoked
+
+        Args:
+            revocations: Events {'credential_id', 'position', 'reason', 'revoked_at'}
+                for records that are not yet revoked
+        """
+        raise NotImplementedError
+
+    def is_revoked(self, position: int) -> bool:
+        """Whether the record at a position is revoked"""
+        raise NotImplementedError
+
+    @property
+    def revocations(self) -> List[Dict]:
+        """Revocation events, oldest first"""
+        raise NotImplementedError
+
+    @property
+    def metadata(self) -> Dict:
+        """Ledger metadata (created_at, version, description)"""
+        raise NotImplementedError
+
+    @property
+    def checkpoints(self) -> List[Dict]:
+        """Hash-chain checkpoints, oldest first"""
+        raise NotImplementedError
+
+    def compact(self):
+        """Reclaim space or fold logs, where the backend supports it"""
+
+    def close(self):
+        """Release files or connections held by the backend"""
+
+
+class JsonLedgerBackend(LedgerBackend):
+    """
+    In-memory ledger persisted as JSON, with dict indexes for lookups
+
+    'json' rewrites one pretty-printed document on every issuance and
+    checkpoint; revocations are only appended to ledger_path + '.log' and
+    folded into the document by the next rewrite. 'jsonl' keeps a JSON
+    Lines snapshot at ledger_path plus an append-only log at
+    ledger_path + '.log' that is folded into the snapshot every
+    compact_every entries.
+    """
+
+    def __init__(self, ledger_path: str, storage_format: str = 'json',
+                 compact_every: int = 10000):
+        """
+        Load the ledger and build its indexes
+
+        Args:
+            ledger_path: Path of the ledger (snapshot) file
+            storage_format: 'json' or 'jsonl'
+            compact_every: Log entries between 'jsonl' compactions
+        """
+        self.ledger_path = ledger_path
+        self.storage_format = storage_format
+        self.log_path = f"{ledger_path}.log"
+        self.compact_every = compact_every
+        self._log = LedgerLog(self.log_path)
+        self._lock = FileLock(f"{ledger_path}.lock")
+        with self._lock:
+            self._reload()
+
+    def __getstate__(self) -> Dict:
+        # Pickle as the path; the copy reloads the ledger from disk
+        return {'ledger_path': self.ledger_path, 'storage_format': self.storage_format,
+                'compact_every': self.compact_every}
+
+    def __setstate__(self, state: Dict):
+        self.__init__(**state)
+
+    def _reload(self):
+        """(Re)load the whole ledger from disk and rebuild the indexes"""
+        self._log.reset()
+        self.ledger = self._load_ledger()
+        self._file_signature = file_version(self.ledger_path)
+        self._build_indexes()
+
+    @contextmanager
+    def write_lock(self):
+        with self._lock:
+            self.refresh()
+            yield
+
+    def refresh(self):
+        """
+        Pick up changes made by other processes
+
+        A replaced 'json' document or 'jsonl' snapshot is reloaded in full;
+        otherwise only log entries past the last read offset are replayed.
+        """
+        with self._lock:
+            if file_version(self.ledger_path) != self._file_signature:
+                self._reload()
+            else:
+                log_size = self._log.size()
+                if log_size < self._log.offset:
+                    self._reload()  # log truncated by another process's compaction
+                elif log_size > self._log.offset:
+                    start = len(self.ledger['credentials'])
+                    revocations = len(self.ledger['revocations'])
+                    self._log.replay(lambda entry: self._apply_log_entry(self.ledger, entry))
+                    if len(self.ledger['revocations']) > revocations:
+                        self._build_indexes()  # statuses of indexed records changed
+                    else:
+                        for position in range(start, len(self.ledger['credentials'])):
+                            self._index_record(position, self.ledger['credentials'][position])
+
+    def _build_indexes(self):
+        """Build lookup indexes over the loaded credential records"""
+        self._id_index: Dict[str, int] = {}
+        self._hash_index: Dict[str, List[int]] = {}
+        self._employee_index: Dict[str, List[int]] = {}
+        self._course_index: Dict[str, List[int]] = {}
+        self._issuer_index: Dict[str, List[int]] = {}
+        # (date ordinal, position) pairs sorted for range queries; ISO dates only
+        self._date_index: List[Tuple[int, int]] = []
+        self._status_counts: Dict[str, int] = {}
+        self._revoked = RevocationBitmap()
+        for position, record in enumerate(self.ledger['credentials']):
+            self._index_record(position, record, sort_dates=False)
+        self._date_index.sort()
+
+    def _index_record(self, position: int, record: Dict, sort_dates: bool = True):
+        """Add one record (at its position in the ledger) to the indexes"""
+        if not is_indexable(record):
+            return  # malformed; still readable by position, e.g. for the audit
+        # Positions are kept for every status; lookups check status on the record
+        data = record['data']
+        self._id_index[record['credential_id']] = position
+        self._hash_index.setdefault(record['hash'], []).append(position)
+        self._employee_index.setdefault(data['employee_id'], []).append(position)
+        self._course_index.setdefault(data['course_id'], []).append(position)
+        self._issuer_index.setdefault(data['issuer'], []).append(position)
+        ordinal = date_ordinal(data['completion_date'])
+        if ordinal is not None:
+            if sort_dates:
+                bisect.insort(self._date_index, (ordinal, position))
+            else:
+                self._date_index.append((ordinal, position))
+        self._status_counts[record['status']] = self._status_counts.get(record['status'], 0) + 1
+        if record['status'] == 'revoked':
+            self._revoked.add(position)
+
+    def _new_ledger(self) -> Dict:
+        """Create an empty ledger"""
+        return {
+            'credentials': [],
+            'checkpoints': [],
+            'revocations': [],
+            'metadata': new_ledger_metadata()
+        }
+
+    def _load_ledger(self) -> Dict:
+        """Load existing ledger or create new one"""
+        if self.storage_format == 'jsonl':
+            return self._load_jsonl_ledger()
+
+        ledger_file = Path(self.ledger_path)
+
+        if ledger_file.exists():
+            with open(self.ledger_path, 'r') as f:
+                ledger = json.load(f)
+            ledger.setdefault('checkpoints', [])
+            ledger.setdefault('revocations', [])
+            # Revocations logged after the document was last written
+            self._log.reset(ledger.pop('last_lsn', 0))
+        else:
+            ledger = self._new_ledger()
+        self._log.replay(lambda entry: self._apply_log_entry(ledger, entry))
+        return ledger
+
+    def _load_jsonl_ledger(self) -> Dict:
+        """
+        Load a JSON Lines snapshot and replay the append-only log over it
+
+        The snapshot's first line holds the metadata and the last log sequence
+        number (lsn) it includes; each following line is one credential record.
+        A legacy pretty-printed JSON ledger at ledger_path is read as the
+        snapshot and rewritten as JSON Lines on the next compaction.
+        """
+        ledger = self._new_ledger()
+
+        if Path(self.ledger_path).exists():
+            with open(self.ledger_path, 'r') as f:
+                first_line = f.readline()
+                if first_line.strip() == '{':
+                    f.seek(0)
+                    ledger = json.load(f)
+                    ledger.setdefault('checkpoints', [])
+                    ledger.setdefault('revocations', [])
+                elif first_line:
+                    header = json.loads(first_line)
+                    ledger['metadata'] = header['metadata']
+                    ledger['checkpoints'] = header.get('checkpoints', [])
+                    ledger['revocations'] = header.get('revocations', [])
+                    self._log.reset(header['last_lsn'])
+                    ledger['credentials'] = [json.loads(line) for line in f if line.strip()]
+
+        self._log.replay(lambda entry: self._apply_log_entry(ledger, entry))
+        return ledger
+
+    def _apply_log_entry(self, ledger: Dict, entry: Dict):
+        """Replay one log entry onto an in-memory ledger"""
+        if entry['op'] == 'issue':
+            ledger['credentials'].append(entry['record'])
+        elif entry['op'] == 'checkpoint':
+            ledger['checkpoints'].append(entry['checkpoint'])
+        elif entry['op'] == 'revoke':
+            revocation = entry['revocation']
+            ledger['credentials'][revocation['position']]['status'] = 'revoked'
+            ledger['revocations'].append(revocation)
+        else:
+            raise ValueError(f"Unknown ledger log operation: {entry['op']}")
+
+    def _save_ledger(self):
+        """
+        Save ledger to file
+
+        A 'json' document records the last log lsn it includes, so logged
+        revocations it already holds are skipped if a crash leaves the log
+        untruncated.
+        """
+        if self.storage_format == 'jsonl':
+            self.compact()
+            return
+
+        atomic_write(self.ledger_path, lambda f: json.dump(
+            dict(self.ledger, last_lsn=self._log.last_lsn), f, indent=2))
+        self._file_signature = file_version(self.ledger_path)
+        if self._log.entries:
+            self._log.truncate()
+
+    def _append_log(self, entries: List[Dict]):
+        """Durably append entries to the ledger log, compacting when it grows large"""
+        self._log.append(entries)
+        if self._log.entries >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """
+        Fold the log into a new JSON Lines snapshot and truncate the log
+
+        The snapshot is written to a temporary file and renamed into place,
+        and it records the last lsn it contains, so a crash before the log
+        is truncated only causes already-applied entries to be skipped.
+        A 'json' ledger folds its logged revocations into a rewritten document.
+        """
+        if self.storage_format != 'jsonl':
+            with self._lock:
+                self.refresh()
+                if self._log.entries:
+                    self._save_ledger()
+            return
+
+        def write_snapshot(f):
+            f.write(json.dumps({'metadata': self.ledger['metadata'],
+                                'checkpoints': self.ledger['checkpoints'],
+                                'revocations': self.ledger['revocations'],
+                                'last_lsn': self._log.last_lsn}) + '\n')
+            for record in self.ledger['credentials']:
+                f.write(json.dumps(record) + '\n')
+
+        with self._lock:
+            self.refresh()
+            atomic_write(self.ledger_path, write_snapshot)
+            self._log.truncate()
+            self._file_signature = file_version(self.ledger_path)
+
+    def count(self, status: Optional[str] = None) -> int:
+        if status is None:
+            return len(self.ledger['credentials'])
+        return self._status_counts.get(status, 0)
+
+    def get(self, position: int) -> Dict:
+        return self.ledger['credentials'][position]
+
+    def iter_records(self, start: int = 0, end: Optional[int] = None) -> Iterator[Dict]:
+        return islice(self.ledger['credentials'], start, end)
+
+    def position_of(self, credential_id: str) -> Optional[int]:
+        return self._id_index.get(credential_id)
+
+    def _select(self, positions: List[int], status: Optional[str]) -> List[Dict]:
+        """Records at positions, filtered by status"""
+        records = [self.ledger['credentials'][p] for p in positions]
+        return [r for r in records if status is None or r['status'] == status]
+
+    def find_by_hash(self, credential_hash: str, status: Optional[str] = 'active') -> List[Dict]:
+        return self._select(self._hash_index.get(credential_hash, []), status)
+
+    def employee_records(self, employee_id: str, status: Optional[str] = 'active') -> List[Dict]:
+        return self._select(self._employee_index.get(employee_id, []), status)
+
+    def iter_employee_groups(self) -> Iterator[Tuple[str, List[Dict]]]:
+        for employee_id, positions in self._employee_index.items():
+            yield employee_id, self._select(positions, None)
+
+    def course_records(self, course_id: str, status: Optional[str] = 'active') -> List[Dict]:
+        return self._select(self._course_index.get(course_id, []), status)
+
+    def issuer_records(self, issuer: str, status: Optional[str] = 'active') -> List[Dict]:
+        return self._select(self._issuer_index.get(issuer, []), status)
+
+    def records_between(self, start: str, end: str, status: Optional[str] = 'active') -> List[Dict]:
+        low, high = date_bounds(start, end)
+        first = bisect.bisect_left(self._date_index, (low,))
+        last = bisect.bisect_left(self._date_index, (high + 1,))
+        return self._select([position for _, position in self._date_index[first:last]], status)
+
+    def append(self, records: List[Dict], checkpoints: List[Dict]):
+        start = len(self.ledger['credentials'])
+        self.ledger['credentials'].extend(records)
+        self.ledger['checkpoints'].extend(checkpoints)
+        for offset, record in enumerate(records):
+            self._index_record(start + offset, record)
+
+        if self.storage_format == 'jsonl':
+            self._append_log([{'op': 'issue', 'record': record} for record in records] +
+                             [{'op': 'checkpoint', 'checkpoint': cp} for cp in checkpoints])
+        else:
+            self._save_ledger()
+
+    def add_checkpoint(self, checkpoint: Dict):
+        self.ledger['checkpoints'].append(checkpoint)
+        if self.storage_format == 'jsonl':
+            self._append_log([{'op': 'checkpoint', 'checkpoint': checkpoint}])
+        else:
+            self._save_ledger()
+
+    def revoke(self, revocations: List[Dict]):
+        for revocation in revocations:
+            record = self.ledger['credentials'][revocation['position']]
+            self._status_counts[record['status']] -= 1
+            self._status_counts['revoked'] = self._status_counts.get('revoked', 0) + 1
+            record['status'] = 'revoked'
+            self._revoked.add(revocation['position'])
+        self.ledger['revocations'].extend(revocations)
+
+        # Both formats log revocations instead of rewriting the ledger file
+        self._append_log([{'op': 'revoke', 'revocation': revocation}
+                          for revocation in revocations])
+
+    def is_revoked(self, position: int) -> bool:
+        return position in self._revoked
+
+    @property
+    def revocations(self) -> List[Dict]:
+        return self.ledger['revocations']
+
+    @property
+    def metadata(self) -> Dict:
+        return self.ledger['metadata']
+
+    @property
+    def checkpoints(self) -> List[Dict]:
+        return self.ledger['checkpoints']
+
+
+def date_ordinal(value: str) -> Optional[int]:
+    """
+    Date ordinal of an ISO (YYYY-MM-DD) date string
+
+    Returns:
+        The ordinal, or None if value is not an ISO date that round-trips
+    """
+    try:
+        date = datetime.date.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return date.toordinal() if date.isoformat() == value else None
+
+
+def date_bounds(start: str, end: str) -> Tuple[int, int]:
+    """
+    Date ordinals of an inclusive ISO date range
+
+    Raises:
+        ValueError: If start or end is not an ISO (YYYY-MM-DD) date
+    """
+    low, high = date_ordinal(start), date_ordinal(end)
+    if low is None or high is None:
+        raise ValueError(f"Dates must be ISO dates (YYYY-MM-DD): {start!r}, {end!r}")
+    return low, high
+
+
+def _search_range(buffer, offset: int, count: int, entry: struct.Struct, low, high,
+                  keys: bool = False) -> List:
+    """
+    Binary-search a sorted column of (key, position) entries for a key range
+
+    Args:
+        buffer: Buffer holding the column (e.g. an mmap)
+        offset: Byte offset of the column in buffer
+        count: Number of entries
+        entry: Struct of one (key, position) entry
+        low: Smallest key to include
+        high: Largest key to include
+        keys: Return (key, position) pairs instead of positions
+
+    Returns:
+        Positions of entries with low <= key <= high, in (key, position) order
+    """
+    lo, hi = 0, count
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if entry.unpack_from(buffer, offset + mid * entry.size)[0] < low:
+            lo = mid + 1
+        else:
+            hi = mid
+
+    positions = []
+    while lo < count:
+        found, position = entry.unpack_from(buffer, offset + lo * entry.size)
+        if found > high:
+            break
+        positions.append((found, position) if keys else position)
+        lo += 1
+    return positions
+
+
+def id_key(value: str) -> int:
+    """64-bit key of an id for the sorted id columns"""
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'little')
+
+
+def _search_column(buffer, offset: int, count: int, entry: struct.Struct, key) -> List[int]:
+    """Positions of all entries with key in a sorted (key, position) column, ascending"""
+    return _search_range(buffer, offset, count, entry, key, key)
+
+
+class BinaryLedgerFile:
+    """
+    Read-only, memory-mapped view of a fixed-width binary ledger file
+
+    Layout (little-endian), after a header of section offsets:
+      - records: one RECORD per credential in position order: raw 32-byte
+        hash and prev_hash, interned string ids of employee, course, course
+        name and issuer, the completion date as a date ordinal, the heap
+        offset of credential_id + timestamp, a status byte and flags
+      - hash column: (hash, position) pairs sorted by hash
+      - credential id column: (64-bit id key, position) pairs sorted by key
+      - employee, course and issuer columns: (string id, position) pairs
+        sorted by id
+      - date column: (date ordinal, position) pairs sorted by date, with
+        ordinal 0 for completion dates that are not ISO dates
+      - string table: (heap offset, length) per interned string
+      - heap: UTF-8 bytes of credential ids, timestamps and interned strings
+      - trailer: JSON with metadata, checkpoints, revocation events and
+        per-status counts
+
+    Opening maps the file and reads only the header and trailer; records
+    and strings are decoded on access and lookups binary-search the sorted
+    columns, so open time does not grow with the ledger and processes
+    mapping the same file share its pages.
+    """
+
+    MAGIC = b'SKCLBIN3'
+    HEADER = struct.Struct('<8s14Q')
+    # Version 2 files lack the id column; they are still readable and are
+    # rewritten as the current version on the next compaction
+    LEGACY_MAGIC = b'SKCLBIN2'
+    LEGACY_HEADER = struct.Struct('<8s13Q')
+    RECORD = struct.Struct('<32s32sIIIIIQHHBB')
+    HASH_ENTRY = struct.Struct('<32sI')
+    ID_ENTRY = struct.Struct('<II')
+    KEY_ENTRY = struct.Struct('<QI')
+    # Heap offset and credential_id length, at RECORD_ID_OFFSET within a RECORD
+    RECORD_ID = struct.Struct('<QH')
+    RECORD_ID_OFFSET = struct.calcsize('<32s32s5I')
+    STRING_ENTRY = struct.Struct('<QI')
+    STATUSES = ('active', 'revoked', 'expired', 'suspended')
+    HAS_PREV_HASH = 0x01
+    DATE_AS_STRING = 0x02
+
+    def __init__(self, path: str):
+        """
+        Map a binary ledger file
+
+        Args:
+            path: Path of a file written by BinaryLedgerFile.write
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic = self._mm[:len(self.MAGIC)]
+        header = self.LEGACY_HEADER if magic == self.LEGACY_MAGIC else self.HEADER
+        if magic in (self.MAGIC, self.LEGACY_MAGIC) and len(self._mm) < header.size:
+            self._mm.close()
+            raise ValueError(f"Truncated binary ledger file: {path}")
+        if magic == self.MAGIC:
+            (_, self.count, self.last_lsn, self._records_offset, self._hash_offset,
+             self._id_offset, self._employee_offset, self._course_offset, self._issuer_offset,
+             self._date_offset, self._strings_offset, self._string_count, self._heap_offset,
+             trailer_offset, trailer_length) = self.HEADER.unpack_from(self._mm, 0)
+        elif magic == self.LEGACY_MAGIC:
+            (_, self.count, self.last_lsn, self._records_offset, self._hash_offset,
+             self._employee_offset, self._course_offset, self._issuer_offset, self._date_offset,
+             self._strings_offset, self._string_count, self._heap_offset,
+             trailer_offset, trailer_length) = self.LEGACY_HEADER.unpack_from(self._mm, 0)
+            self._id_offset = None
+        else:
+            self._mm.close()
+            raise ValueError(f"Not a binary ledger file of version {self.MAGIC[-1:].decode()}: {path}")
+        # The trailer is written last, so a short write leaves it incomplete
+        if trailer_offset + trailer_length != len(self._mm):
+            self._mm.close()
+            raise ValueError(f"Truncated binary ledger file: {path}")
+        trailer = json.loads(self._mm[trailer_offset:trailer_offset + trailer_length])
+        self.metadata: Dict = trailer['metadata']
+        self.checkpoints: List[Dict] = trailer['checkpoints']
+        self.revocations: List[Dict] = trailer.get('revocations', [])
+        self.status_counts: Dict[str, int] = trailer['status_counts']
+        self._strings: Dict[int, str] = {}
+        self._string_ids: Optional[Dict[str, int]] = None
+        self._legacy_ids: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def is_snapshot(cls, path: str) -> bool:
+        """Whether path holds a binary ledger file (of any layout version)"""
+        with open(path, 'rb') as f:
+            return f.read(len(cls.MAGIC) - 1) == cls.MAGIC[:-1]
+
+    def close(self):
+        """Unmap the file"""
+        self._mm.close()
+
+    def _string(self, string_id: int) -> str:
+        """Interned string by id"""
+        value = self._strings.get(string_id)
+        if value is None:
+            offset, length = self.STRING_ENTRY.unpack_from(
+                self._mm, self._strings_offset + string_id * self.STRING_ENTRY.size)
+            start = self._heap_offset + offset
+            value = self._strings[string_id] = self._mm[start:start + length].decode()
+        return value
+
+    def _string_id(self, value: str) -> Optional[int]:
+        """Id of an interned string; the reverse map is built on first use"""
+        if self._string_ids is None:
+            self._string_ids = {self._string(i): i for i in range(self._string_count)}
+        return self._string_ids.get(value)
+
+    def record(self, position: int) -> Dict:
+        """Decode the record at a position"""
+        if not 0 <= position < self.count:
+            raise IndexError(f"No ledger record at position {position}")
+        (credential_hash, prev_hash, employee, course, course_name, issuer, date_value,
+         heap_offset, id_length, timestamp_length, status, flags) = self.RECORD.unpack_from(
+            self._mm, self._records_offset + position * self.RECORD.size)
+        start = self._heap_offset + heap_offset
+        text = self._mm[start:start + id_length + timestamp_length]
+        if flags & self.DATE_AS_STRING:
+            completion_date = self._string(date_value)
+        else:
+            completion_date = datetime.date.fromordinal(date_value).isoformat()
+
+        record = {
+            'credential_id': text[:id_length].decode(),
+            'timestamp': text[id_length:].decode(),
+            'data': {
+                'employee_id': self._string(employee),
+                'course_id': self._string(course),
+                'course_name': self._string(course_name),
+                'completion_date': completion_date,
+                'issuer': self._string(issuer)
+            },
+            'hash': credential_hash.hex(),
+            'status': self.STATUSES[status]
+        }
+        if flags & self.HAS_PREV_HASH:
+            record['prev_hash'] = prev_hash.hex()
+        return record
+
+    def status(self, position: int) -> str:
+        """Status of the record at a position, read from its status byte"""
+        offset = self._records_offset + position * self.RECORD.size + self.RECORD.size - 2
+        return self.STATUSES[self._mm[offset]]
+
+    def _credential_id(self, position: int) -> str:
+        """Credential id of the record at a position, without decoding the rest"""
+        heap_offset, id_length = self.RECORD_ID.unpack_from(
+            self._mm, self._records_offset + position * self.RECORD.size + self.RECORD_ID_OFFSET)
+        start = self._heap_offset + heap_offset
+        return self._mm[start:start + id_length].decode()
+
+    def position_of(self, credential_id: str) -> Optional[int]:
+        """Position of a credential id, or None"""
+        if self._id_offset is None:
+            # Version 2 file: index the ids once (until it is compacted as version 3)
+            if self._legacy_ids is None:
+                self._legacy_ids = {self._credential_id(p): p for p in range(self.count)}
+            return self._legacy_ids.get(credential_id)
+        for position in _search_column(self._mm, self._id_offset, self.count,
+                                       self.KEY_ENTRY, id_key(credential_id)):
+            if self._credential_id(position) == credential_id:
+                return position
+        return None
+
+    def hash_positions(self, credential_hash: str) -> List[int]:
+        """Positions of records with a credential hash"""
+        try:
+            key = bytes.fromhex(credential_hash)
+        except ValueError:
+            return []
+        return _search_column(self._mm, self._hash_offset, self.count, self.HASH_ENTRY, key)
+
+    def _string_positions(self, column_offset: int, value: str) -> List[int]:
+        """Positions whose string field equals value, via a sorted string-id column"""
+        string_id = self._string_id(value)
+        if string_id is None:
+            return []
+        return _search_column(self._mm, column_offset, self.count, self.ID_ENTRY, string_id)
+
+    def employee_positions(self, employee_id: str) -> List[int]:
+        """Positions of records issued to an employee"""
+        return self._string_positions(self._employee_offset, employee_id)
+
+    def course_positions(self, course_id: str) -> List[int]:
+        """Positions of records for a course"""
+        return self._string_positions(self._course_offset, course_id)
+
+    def issuer_positions(self, issuer: str) -> List[int]:
+        """Positions of records from an issuer"""
+        return self._string_positions(self._issuer_offset, issuer)
+
+    def date_entries(self, start: int, end: int) -> List[Tuple[int, int]]:
+        """(date ordinal, position) of records completed between two date ordinals (inclusive)"""
+        return _search_range(self._mm, self._date_offset, self.count, self.ID_ENTRY,
+                             max(start, 1), end, keys=True)
+
+    def date_positions(self, start: int, end: int) -> List[int]:
+        """Positions of records completed between two date ordinals (inclusive), by date"""
+        return [position for _, position in self.date_entries(start, end)]
+
+    def iter_employee_positions(self) -> Iterator[Tuple[str, List[int]]]:
+        """(employee_id, positions) for every employee, walking the employee column"""
+        entries = (self.ID_ENTRY.unpack_from(self._mm, self._employee_offset + i * self.ID_ENTRY.size)
+                   for i in range(self.count))
+        for string_id, group in groupby(entries, key=lambda entry: entry[0]):
+            yield self._string(string_id), [position for _, position in group]
+
+    def iter_sorted_employee_positions(self) -> Iterator[Tuple[str, List[int]]]:
+        """
+        (employee_id, positions) for every employee, in employee_id order
+
+        Only each employee's run in the employee column (id, first entry,
+        length) is held in memory; positions are read as each group is yielded.
+        """
+        entries = (self.ID_ENTRY.unpack_from(self._mm, self._employee_offset + i * self.ID_ENTRY.size)
+                   for i in range(self.count))
+        runs = []
+        first = 0
+        for string_id, group in groupby(entries, key=lambda entry: entry[0]):
+            length = sum(1 for _ in group)
+            runs.append((self._string(string_id), first, length))
+            first += length
+        runs.sort()
+        for employee_id, first, length in runs:
+            offset = self._employee_offset + first * self.ID_ENTRY.size
+            yield employee_id, [self.ID_ENTRY.unpack_from(self._mm, offset + i * self.ID_ENTRY.size)[1]
+                                for i in range(length)]
+
+    @classmethod
+    def write(cls, f, records: Iterable[Dict], checkpoints: List[Dict],
+              metadata: Dict, last_lsn: int = 0, revocations: List[Dict] = ()):
+        """
+        Serialize records into the binary layout
+
+        Args:
+            f: File opened for binary writing
+            records: Ledger records in position order
+            checkpoints: Hash-chain checkpoints
+            metadata: Ledger metadata
+            last_lsn: Last log sequence number folded into the file
+            revocations: Revocation events (record statuses already reflect them)
+        """
+        string_ids: Dict[str, int] = {}
+        intern = lambda value: string_ids.setdefault(value, len(string_ids))
+        rows = bytearray()
+        heap = bytearray()
+        hash_column = []
+        id_column = []
+        employee_column = []
+        course_column = []
+        issuer_column = []
+        date_column = []
+        status_counts: Dict[str, int] = {}
+
+        for position, record in enumerate(records):
+            data = record['data']
+            if record['status'] not in cls.STATUSES:
+                raise ValueError(f"Unsupported credential status: {record['status']}")
+            credential_hash = bytes.fromhex(record['hash'])
+            prev_hash = record.get('prev_hash')
+            if len(credential_hash) != 32 or (prev_hash is not None and len(prev_hash) != 64):
+                raise ValueError(f"{record['credential_id']}: hashes must be SHA-256 hex digests")
+
+            flags = cls.HAS_PREV_HASH if prev_hash is not None else 0
+            ordinal = date_ordinal(data['completion_date'])
+            if ordinal is None:
+                flags |= cls.DATE_AS_STRING
+                date_value = intern(data['completion_date'])
+            else:
+                date_value = ordinal
+            credential_id = record['credential_id'].encode()
+            timestamp = record['timestamp'].encode()
+            employee = intern(data['employee_id'])
+            course = intern(data['course_id'])
+            issuer = intern(data['issuer'])
+
+            rows += cls.RECORD.pack(
+                credential_hash, bytes.fromhex(prev_hash) if prev_hash else bytes(32),
+                employee, course, intern(data['course_name']), issuer, date_value,
+                len(heap), len(credential_id), len(timestamp),
+                cls.STATUSES.index(record['status']), flags)
+            heap += credential_id + timestamp
+            hash_column.append((credential_hash, position))
+            id_column.append((id_key(record['credential_id']), position))
+            employee_column.append((employee, position))
+            course_column.append((course, position))
+            issuer_column.append((issuer, position))
+            date_column.append((ordinal or 0, position))
+            status_counts[record['status']] = status_counts.get(record['status'], 0) + 1
+
+        string_table = bytearray()
+        for value in string_ids:
+            encoded = value.encode()
+            string_table += cls.STRING_ENTRY.pack(len(heap), len(encoded))
+            heap += encoded
+
+        trailer = json.dumps({'metadata': metadata, 'checkpoints': checkpoints,
+                              'revocations': list(revocations),
+                              'status_counts': status_counts}).encode()
+        count = len(hash_column)
+        records_offset = cls.HEADER.size
+        hash_offset = records_offset + len(rows)
+        id_offset = hash_offset + count * cls.HASH_ENTRY.size
+        employee_offset = id_offset + count * cls.KEY_ENTRY.size
+        course_offset = employee_offset + count * cls.ID_ENTRY.size
+        issuer_offset = course_offset + count * cls.ID_ENTRY.size
+        date_offset = issuer_offset + count * cls.ID_ENTRY.size
+        strings_offset = date_offset + count * cls.ID_ENTRY.size
+        heap_offset = strings_offset + len(string_table)
+        trailer_offset = heap_offset + len(heap)
+
+        f.write(cls.HEADER.pack(cls.MAGIC, count, last_lsn, records_offset, hash_offset,
+                                id_offset, employee_offset, course_offset, issuer_offset, date_offset,
+                                strings_offset, len(string_ids), heap_offset,
+                                trailer_offset, len(trailer)))
+        f.write(rows)
+        f.write(b''.join(cls.HASH_ENTRY.pack(*entry) for entry in sorted(hash_column)))
+        f.write(b''.join(cls.KEY_ENTRY.pack(*entry) for entry in sorted(id_column)))
+        for column in (employee_column, course_column, issuer_column, date_column):
+            f.write(b''.join(cls.ID_ENTRY.pack(*entry) for entry in sorted(column)))
+        f.write(string_table)
+        f.write(heap)
+        f.write(trailer)
+
+
+class IndexedJsonlFile:
+    """
+    Read-only view of a JSON Lines ledger snapshot through a persisted index
+
+    The snapshot is the 'jsonl' format written by JsonLedgerBackend: a
+    header line with metadata, checkpoints, revocations and last_lsn, then
+    one record per line. The index at path + '.idx' holds, per record, the
+    byte offset of its line and a status byte, plus sorted (key, position)
+    columns for the raw hash, the credential id, the employee id, the course
+    id, the issuer and the completion date ordinal (0 when not an ISO date).
+    Ids are keyed by a 64-bit BLAKE2b digest and confirmed against the record.
+
+    Both files are memory-mapped and only the header line is parsed on
+    open; records are decoded on access. The index is rebuilt with one scan
+    of the snapshot whenever it does not match the snapshot's file version.
+    """
+
+    MAGIC = b'SKCLIDX2'
+    HEADER = struct.Struct('<8s4Q')
+    OFFSET = struct.Struct('<Q')
+    HASH_ENTRY = struct.Struct('<32sI')
+    KEY_ENTRY = struct.Struct('<QI')
+    STATUSES = BinaryLedgerFile.STATUSES
+    OTHER_STATUS = 255
+
+    def __init__(self, path: str):
+        """
+        Map a JSON Lines snapshot and its index, building the index if stale
+
+        Args:
+            path: Path of the snapshot file
+        """
+        self.path = path
+        self.index_path = f"{path}.idx"
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header_end = self._mm.find(b'\n')
+        header = json.loads(self._mm[:header_end if header_end != -1 else len(self._mm)])
+        self.metadata: Dict = header['metadata']
+        self.checkpoints: List[Dict] = header.get('checkpoints', [])
+        self.revocations: List[Dict] = header.get('revocations', [])
+        self.last_lsn: int = header['last_lsn']
+
+        self._index = self._open_index(len(self._mm) if header_end == -1 else header_end + 1)
+        self.count = self.HEADER.unpack_from(self._index, 0)[4]
+        self._offsets_offset = self.HEADER.size
+        self._statuses_offset = self._offsets_offset + self.count * self.OFFSET.size
+        self._hash_offset = self._statuses_offset + self.count
+        self._id_offset = self._hash_offset + self.count * self.HASH_ENTRY.size
+        self._employee_offset = self._id_offset + self.count * self.KEY_ENTRY.size
+        self._course_offset = self._employee_offset + self.count * self.KEY_ENTRY.size
+        self._issuer_offset = self._course_offset + self.count * self.KEY_ENTRY.size
+        self._date_offset = self._issuer_offset + self.count * self.KEY_ENTRY.size
+
+        statuses = self._index[self._statuses_offset:self._hash_offset]
+        self.status_counts: Dict[str, int] = {}
+        for code, status in enumerate(self.STATUSES):
+            if statuses.count(code):
+                self.status_counts[status] = statuses.count(code)
+        position = statuses.find(self.OTHER_STATUS)
+        while position != -1:
+            record = self.record(position)
+            if is_indexable(record):
+                self.status_counts[record['status']] = self.status_counts.get(record['status'], 0) + 1
+            position = statuses.find(self.OTHER_STATUS, position + 1)
+
+    @classmethod
+    def is_snapshot(cls, path: str) -> bool:
+        """Whether path holds a JSON Lines snapshot (not a pretty-printed JSON ledger)"""
+        with open(path, 'rb') as f:
+            first_line = f.readline()
+        return first_line.strip() not in (b'', b'{')
+
+    def _open_index(self, data_offset: int) -> mmap.mmap:
+        """Map the index, rebuilding it first if missing or stale"""
+        version = file_version(self.path)
+        try:
+            with open(self.index_path, 'rb') as f:
+                index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, inode, mtime_ns, size, _ = self.HEADER.unpack_from(index, 0)
+            if magic == self.MAGIC and (inode, mtime_ns, size) == version:
+                return index
+            index.close()
+        except (FileNotFoundError, ValueError, struct.error):
+            pass
+
+        self._build_index(data_offset, version)
+        with open(self.index_path, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _build_index(self, data_offset: int, version: Tuple):
+        """Scan the snapshot once and persist its index"""
+        offsets = bytearray()
+        statuses = bytearray()
+        hash_column = []
+        id_column = []
+        employee_column = []
+        course_column = []
+        issuer_column = []
+        date_column = []
+
+        offset = data_offset
+        while offset < len(self._mm):
+            end = self._mm.find(b'\n', offset)
+            end = len(self._mm) if end == -1 else end
+            line = self._mm[offset:end]
+            if line.strip():
+                record = json.loads(line)
+                position = len(statuses)
+                offsets += self.OFFSET.pack(offset)
+                if not is_indexable(record):
+                    # Malformed: keep its offset, with placeholder keys in the columns
+                    statuses.append(self.OTHER_STATUS)
+                    hash_column.append((bytes(32), position))
+                    for column in (id_column, employee_column, course_column,
+                                   issuer_column, date_column):
+                        column.append((0, position))
+                    offset = end + 1
+                    continue
+                statuses.append(self.STATUSES.index(record['status'])
+                                if record['status'] in self.STATUSES else self.OTHER_STATUS)
+                hash_column.append((bytes.fromhex(record['hash']), position))
+                id_column.append((id_key(record['credential_id']), position))
+                employee_column.append((id_key(record['data']['employee_id']), position))
+                course_column.append((id_key(record['data']['course_id']), position))
+                issuer_column.append((id_key(record['data']['issuer']), position))
+                date_column.append((date_ordinal(record['data']['completion_date']) or 0, position))
+            offset = end + 1
+
+        def write(f):
+            f.write(self.HEADER.pack(self.MAGIC, *version, len(statuses)))
+            f.write(offsets)
+            f.write(statuses)
+            f.write(b''.join(self.HASH_ENTRY.pack(*entry) for entry in sorted(hash_column)))
+            for column in (id_column, employee_column, course_column, issuer_column, date_column):
+                f.write(b''.join(self.KEY_ENTRY.pack(*entry) for entry in sorted(column)))
+
+        atomic_write(self.index_path, write, binary=True)
+
+    def close(self):
+        """Unmap the snapshot and its index"""
+        self._index.close()
+        self._mm.close()
+
+    def record(self, position: int) -> Dict:
+        """Read and decode the record at a position"""
+        if not 0 <= position < self.count:
+            raise IndexError(f"No ledger record at position {position}")
+        start = self.OFFSET.unpack_from(self._index, self._offsets_offset + position * self.OFFSET.size)[0]
+        end = self._mm.find(b'\n', start)
+        return json.loads(self._mm[start:len(self._mm) if end == -1 else end])
+
+    def status(self, position: int) -> str:
+        """Status of the record at a position, from the index"""
+        code = self._index[self._statuses_offset + position]
+        return self.STATUSES[code] if code != self.OTHER_STATUS else self.record(position).get('status')
+
+    def position_of(self, credential_id: str) -> Optional[int]:
+        """Position of a credential id, or None"""
+        for position in _search_column(self._index, self._id_offset, self.count,
+                                       self.KEY_ENTRY, id_key(credential_id)):
+            if self.record(position)['credential_id'] == credential_id:
+                return position
+        return None
+
+    def hash_positions(self, credential_hash: str) -> List[int]:
+        """Positions of records with a credential hash"""
+        try:
+            key = bytes.fromhex(credential_hash)
+        except ValueError:
+            return []
+        return _search_column(self._index, self._hash_offset, self.count, self.HASH_ENTRY, key)
+
+    def _field_positions(self, column_offset: int, field: str, value: str) -> List[int]:
+        """Positions whose data field equals value, via a sorted key column"""
+        positions = _search_column(self._index, column_offset, self.count,
+                                   self.KEY_ENTRY, id_key(value))
+        return [p for p in positions if self.record(p)['data'][field] == value]
+
+    def employee_positions(self, employee_id: str) -> List[int]:
+        """Positions of records issued to an employee"""
+        return self._field_positions(self._employee_offset, 'employee_id', employee_id)
+
+    def course_positions(self, course_id: str) -> List[int]:
+        """Positions of records for a course"""
+        return self._field_positions(self._course_offset, 'course_id', course_id)
+
+    def issuer_positions(self, issuer: str) -> List[int]:
+        """Positions of records from an issuer"""
+        return self._field_positions(self._issuer_offset, 'issuer', issuer)
+
+    def date_positions(self, start: int, end: int) -> List[int]:
+        """Positions of records completed between two date ordinals (inclusive), by date"""
+        return _search_range(self._index, self._date_offset, self.count, self.KEY_ENTRY,
+                             max(start, 1), end)
+
+    def iter_employee_positions(self) -> Iterator[Tuple[str, List[int]]]:
+        """(employee_id, positions) for every employee, walking the employee column"""
+        entries = (self.KEY_ENTRY.unpack_from(self._index, self._employee_offset + i * self.KEY_ENTRY.size)
+                   for i in range(self.count))
+        for _, group in groupby(entries, key=lambda entry: entry[0]):
+            by_employee: Dict[str, List[int]] = {}
+            for _, position in group:
+                record = self.record(position)
+                if is_indexable(record):
+                    by_employee.setdefault(record['data']['employee_id'], []).append(position)
+            yield from by_employee.items()
+
+    @classmethod
+    def write(cls, f, records: Iterable[Dict], checkpoints: List[Dict],
+              metadata: Dict, last_lsn: int = 0, revocations: List[Dict] = ()):
+        """
+        Serialize records as a JSON Lines snapshot
+
+        Args:
+            f: File opened for binary writing
+            records: Ledger records in position order
+            checkpoints: Hash-chain checkpoints
+            metadata: Ledger metadata
+            last_lsn: Last log sequence number folded into the file
+            revocations: Revocation events (record statuses already reflect them)
+        """
+        f.write((json.dumps({'metadata': metadata,
+                             'checkpoints': checkpoints,
+                             'revocations': list(revocations),
+                             'last_lsn': last_lsn}) + '\n').encode())
+        for record in records:
+            f.write((json.dumps(record) + '\n').encode())
+
+
+class SegmentedLedgerFile:
+    """
+    Read-only view over the sealed segments of a segmented ledger
+
+    The manifest at path lists the sealed segments in position order; each
+    segment is an immutable BinaryLedgerFile under path + '.segments' with
+    its own sorted index columns, and the manifest records its first
+    position, record count, size and SHA-256 digest. Positions and lookups
+    span all segments. A segment's trailer holds the checkpoints and
+    revocation events logged while it was active; revocations of records
+    in earlier segments are applied over their stored status.
+    """
+
+    FORMAT = 'skillchain-segments/1'
+
+    def __init__(self, path: str):
+        """
+        Read the manifest and map every sealed segment
+
+        Args:
+            path: Path of the manifest file
+        """
+        self.path = path
+        self.segment_dir = f"{path}.segments"
+        for attempt in range(3):
+            with open(path, 'r') as f:
+                self.manifest: Dict = json.load(f)
+            try:
+                self._files = self._open_segments()
+                break
+            except FileNotFoundError:
+                # Another process merged segments after we read the manifest
+                if attempt == 2:
+                    raise
+        self.metadata: Dict = self.manifest['metadata']
+        self.last_lsn: int = self.manifest['last_lsn']
+        self._starts = [segment['start'] for segment in self.manifest['segments']]
+        self.count = sum(segment['count'] for segment in self.manifest['segments'])
+        self.checkpoints: List[Dict] = [cp for f in self._files for cp in f.checkpoints]
+        self.revocations: List[Dict] = [r for f in self._files for r in f.revocations]
+
+        self.status_counts: Dict[str, int] = {}
+        for f in self._files:
+            for status, count in f.status_counts.items():
+                self.status_counts[status] = self.status_counts.get(status, 0) + count
+        self._revoked = RevocationBitmap()
+        for revocation in self.revocations:
+            position = revocation['position']
+            if not self._revoked.add(position):
+                continue
+            stored = self._stored_status(position)
+            if stored != 'revoked':
+                self.status_counts[stored] -= 1
+                self.status_counts['revoked'] = self.status_counts.get('revoked', 0) + 1
+
+    def _open_segments(self) -> List[BinaryLedgerFile]:
+        """Map the segments listed in the manifest"""
+        files = []
+        try:
+            for segment in self.manifest['segments']:
+                files.append(BinaryLedgerFile(os.path.join(self.segment_dir, segment['file'])))
+        except FileNotFoundError:
+            for f in files:
+                f.close()
+            raise
+        return files
+
+    @classmethod
+    def is_snapshot(cls, path: str) -> bool:
+        """Whether path holds a segment manifest (not a pretty-printed JSON ledger)"""
+        try:
+            with open(path, 'r') as f:
+                return json.load(f).get('format') == cls.FORMAT
+        except (ValueError, AttributeError):
+            return False
+
+    def close(self):
+        """Unmap every segment"""
+        for f in self._files:
+            f.close()
+
+    def _locate(self, position: int) -> Tuple[BinaryLedgerFile, int]:
+        """Segment holding a position and the position within it"""
+        if not 0 <= position < self.count:
+            raise IndexError(f"No ledger record at position {position}")
+        # Empty segments share their start with the next one; bisect_right skips them
+        index = bisect.bisect_right(self._starts, position) - 1
+        return self._files[index], position - self._starts[index]
+
+    def _stored_status(self, position: int) -> str:
+        """Status as written in the record's segment"""
+        f, local = self._locate(position)
+        return f.status(local)
+
+    def record(self, position: int) -> Dict:
+        """Decode the record at a position"""
+        f, local = self._locate(position)
+        record = f.record(local)
+        if position in self._revoked:
+            record['status'] = 'revoked'
+        return record
+
+    def status(self, position: int) -> str:
+        """Status of the record at a position"""
+        return 'revoked' if position in self._revoked else self._stored_status(position)
+
+    def position_of(self, credential_id: str) -> Optional[int]:
+        """Position of a credential id, or None"""
+        # Ids are normally CRED_<position + 1>; check that slot before searching segments
+        if credential_id.startswith('CRED_') and credential_id[5:].isdigit():
+            position = int(credential_id[5:]) - 1
+            if 0 <= position < self.count and self.record(position)['credential_id'] == credential_id:
+                return position
+        for start, f in zip(self._starts, self._files):
+            position = f.position_of(credential_id)
+            if position is not None:
+                return start + position
+        return None
+
+    def _positions(self, lookup: Callable[[BinaryLedgerFile], List[int]]) -> List[int]:
+        """Global positions from a per-segment lookup, ascending"""
+        return [start + position for start, f in zip(self._starts, self._files)
+                for position in lookup(f)]
+
+    def hash_positions(self, credential_hash: str) -> List[int]:
+        """Positions of records with a credential hash"""
+        return self._positions(lambda f: f.hash_positions(credential_hash))
+
+    def employee_positions(self, employee_id: str) -> List[int]:
+        """Positions of records issued to an employee"""
+        return self._positions(lambda f: f.employee_positions(employee_id))
+
+    def course_positions(self, course_id: str) -> List[int]:
+        """Positions of records for a course"""
+        return self._positions(lambda f: f.course_positions(course_id))
+
+    def issuer_positions(self, issuer: str) -> List[int]:
+        """Positions of records from an issuer"""
+        return self._positions(lambda f: f.issuer_positions(issuer))
+
+    def date_positions(self, start: int, end: int) -> List[int]:
+        """Positions of records completed between two date ordinals (inclusive), by date"""
+        entries = [(ordinal, first + position) for first, f in zip(self._starts, self._files)
+                   for ordinal, position in f.date_entries(start, end)]
+        return [position for _, position in sorted(entries)]
+
+    def iter_employee_positions(self) -> Iterator[Tuple[str, List[int]]]:
+        """
+        (employee_id, positions) for every employee across all segments
+
+        Each segment streams its employees in employee_id order and the
+        streams are merged, so no more than one group per segment is
+        materialized at a time instead of a map of every position.
+        """
+        def segment_groups(start: int, f: BinaryLedgerFile):
+            for employee_id, positions in f.iter_sorted_employee_positions():
+                yield employee_id, [start + p for p in positions]
+
+        # Ties keep segment order, so merged positions stay ascending
+        merged = heapq.merge(*(segment_groups(start, f) for start, f in zip(self._starts, self._files)),
+                             key=lambda group: group[0])
+        for employee_id, groups in groupby(merged, key=lambda group: group[0]):
+            yield employee_id, [p for _, positions in groups for p in positions]
+
+
+class SnapshotLedgerBackend(LedgerBackend):
+    """
+    Ledger stored in a lazily read snapshot file plus an append log
+
+    Subclasses set SNAPSHOT to the snapshot view class (BinaryLedgerFile or
+    IndexedJsonlFile). The snapshot is only rewritten on compaction.
+    Records issued since then are appended to a JSON Lines log at
+    ledger_path + '.log' and kept in memory until compact_every log entries
+    have accumulated. Revocations since then are log entries too, tracked
+    in a RevocationBitmap over positions. A legacy JSON ledger at
+    ledger_path is read into memory and converted on the next compaction.
+    Backends pickle as their path, so they can be handed to worker
+    processes, which map the same files read-only.
+    """
+
+    SNAPSHOT = None
+
+    def __init__(self, ledger_path: str, compact_every: int = 10000):
+        """
+        Open the snapshot and replay its log
+
+        Args:
+            ledger_path: Path of the snapshot file
+            compact_every: Log entries between compactions
+        """
+        self.ledger_path = ledger_path
+        self.log_path = f"{ledger_path}.log"
+        self.compact_every = compact_every
+        self._log = LedgerLog(self.log_path)
+        self._lock = FileLock(f"{ledger_path}.lock")
+        self._base = None
+        with self._lock:
+            self._reload()
+
+    def __getstate__(self) -> Dict:
+        return {'ledger_path': self.ledger_path, 'compact_every': self.compact_every}
+
+    def __setstate__(self, state: Dict):
+        self.__init__(state['ledger_path'], state['compact_every'])
+
+    def _reload(self):
+        """(Re)open the snapshot and replay the log over it"""
+        self._base = None  # an old mapping is closed once no reader still holds it
+        self._base_count = 0
+        self._metadata = new_ledger_metadata()
+        self._tail: List[Dict] = []
+        self._tail_checkpoints: List[Dict] = []
+        self._tail_ids: Dict[str, int] = {}
+        self._tail_hashes: Dict[str, List[int]] = {}
+        self._tail_employees: Dict[str, List[int]] = {}
+        self._tail_courses: Dict[str, List[int]] = {}
+        self._tail_issuers: Dict[str, List[int]] = {}
+        self._tail_dates: List[Tuple[int, int]] = []
+        self._tail_revocations: List[Dict] = []
+        self._revoked = RevocationBitmap()
+        self._status_counts: Dict[str, int] = {}
+
+        last_lsn = 0
+        if Path(self.ledger_path).exists() and os.path.getsize(self.ledger_path) > 0:
+            if self.SNAPSHOT.is_snapshot(self.ledger_path):
+                self._base = self.SNAPSHOT(self.ledger_path)
+                self._base_count = self._base.count
+                self._metadata = self._base.metadata
+                self._status_counts = dict(self._base.status_counts)
+                last_lsn = self._base.last_lsn
+            else:
+                with open(self.ledger_path, 'r') as f:
+                    legacy = json.load(f)
+                self._metadata = legacy['metadata']
+                self._tail_checkpoints.extend(legacy.get('checkpoints', []))
+                self._tail_revocations.extend(legacy.get('revocations', []))
+                for record in legacy['credentials']:
+                    self._add_tail(record)
+
+        self._file_signature = file_version(self.ledger_path)
+        self._log.reset(last_lsn)
+        self._log.replay(self._apply_log_entry)
+
+    def _add_tail(self, record: Dict):
+        """Add a record not yet in the snapshot and index it"""
+        position = self._base_count + len(self._tail)
+        self._tail.append(record)
+        self._tail_ids[record['credential_id']] = position
+        self._tail_hashes.setdefault(record['hash'], []).append(position)
+        self._tail_employees.setdefault(record['data']['employee_id'], []).append(position)
+        self._tail_courses.setdefault(record['data']['course_id'], []).append(position)
+        self._tail_issuers.setdefault(record['data']['issuer'], []).append(position)
+        ordinal = date_ordinal(record['data']['completion_date'])
+        if ordinal is not None:
+            bisect.insort(self._tail_dates, (ordinal, position))
+        self._status_counts[record['status']] = self._status_counts.get(record['status'], 0) + 1
+
+    def _apply_revocation(self, revocation: Dict):
+        """Mark a record revoked without touching the snapshot"""
+        position = revocation['position']
+        if position < self._base_count:
+            status = 'revoked' if position in self._revoked else self._base.status(position)
+        else:
+            status = self._tail[position - self._base_count]['status']
+            self._tail[position - self._base_count]['status'] = 'revoked'
+        self._revoked.add(position)
+        self._status_counts[status] -= 1
+        self._status_counts['revoked'] = self._status_counts.get('revoked', 0) + 1
+        self._tail_revocations.append(revocation)
+
+    def _apply_log_entry(self, entry: Dict):
+        """Replay one log entry onto the in-memory tail"""
+        if entry['op'] == 'issue':
+            self._add_tail(entry['record'])
+        elif entry['op'] == 'checkpoint':
+            self._tail_checkpoints.append(entry['checkpoint'])
+        elif entry['op'] == 'revoke':
+            self._apply_revocation(entry['revocation'])
+        else:
+            raise ValueError(f"Unknown ledger log operation: {entry['op']}")
+
+    @contextmanager
+    def write_lock(self):
+        with self._lock:
+            self.refresh()
+            yield
+
+    def refresh(self):
+        with self._lock:
+            log_size = self._log.size()
+            if (file_version(self.ledger_path) != self._file_signature
+                    or log_size < self._log.offset):
+                self._reload()
+            elif log_size > self._log.offset:
+                self._log.replay(self._apply_log_entry)
+
+    def count(self, status: Optional[str] = None) -> int:
+        if status is None:
+            return self._base_count + len(self._tail)
+        return self._status_counts.get(status, 0)
+
+    def get(self, position: int) -> Dict:
+        if position < 0:
+            position += self.count()
+        if position < self._base_count:
+            record = self._base.record(position)
+            if position in self._revoked:
+                record['status'] = 'revoked'
+            return record
+        return self._tail[position - self._base_count]
+
+    def iter_records(self, start: int = 0, end: Optional[int] = None) -> Iterator[Dict]:
+        end = self.count() if end is None else min(end, self.count())
+        for position in range(start, end):
+            yield self.get(position)
+
+    def position_of(self, credential_id: str) -> Optional[int]:
+        if credential_id in self._tail_ids:
+            return self._tail_ids[credential_id]
+        return self._base.position_of(credential_id) if self._base else None
+
+    def _select(self, positions: List[int], status: Optional[str]) -> List[Dict]:
+        """Records at positions, filtered by status"""
+        records = [self.get(p) for p in positions]
+        return [r for r in records if status is None or r['status'] == status]
+
+    def find_by_hash(self, credential_hash: str, status: Optional[str] = 'active') -> List[Dict]:
+        positions = self._base.hash_positions(credential_hash) if self._base else []
+        return self._select(positions + self._tail_hashes.get(credential_hash, []), status)
+
+    def employee_records(self, employee_id: str, status: Optional[str] = 'active') -> List[Dict]:
+        positions = self._base.employee_positions(employee_id) if self._base else []
+        return self._select(positions + self._tail_employees.get(employee_id, []), status)
+
+    def iter_employee_groups(self) -> Iterator[Tuple[str, List[Dict]]]:
+        seen = set()
+        if self._base:
+            for employee_id, positions in self._base.iter_employee_positions():
+                seen.add(employee_id)
+                yield employee_id, self._select(
+                    positions + self._tail_employees.get(employee_id, []), None)
+        for employee_id, positions in self._tail_employees.items():
+            if employee_id not in seen:
+                yield employee_id, self._select(positions, None)
+
+    def course_records(self, course_id: str, status: Optional[str] = 'active') -> List[Dict]:
+        positions = self._base.course_positions(course_id) if self._base else []
+        return self._select(positions + self._tail_courses.get(course_id, []), status)
+
+    def issuer_records(self, issuer: str, status: Optional[str] = 'active') -> List[Dict]:
+        positions = self._base.issuer_positions(issuer) if self._base else []
+        return self._select(positions + self._tail_issuers.get(issuer, []), status)
+
+    def records_between(self, start: str, end: str, status: Optional[str] = 'active') -> List[Dict]:
+        low, high = date_bounds(start, end)
+        positions = self._base.date_positions(low, high) if self._base else []
+        first = bisect.bisect_left(self._tail_dates, (low,))
+        last = bisect.bisect_left(self._tail_dates, (high + 1,))
+        positions += [position for _, position in self._tail_dates[first:last]]
+        # Both runs are in (date, position) order and tail positions follow the
+        # snapshot's, so a stable sort on the ISO date string merges them
+        records = sorted(self._select(positions, None),
+                         key=lambda record: record['data']['completion_date'])
+        return [r for r in records if status is None or r['status'] == status]
+
+    def append(self, records: List[Dict], checkpoints: List[Dict]):
+        for record in records:
+            self._add_tail(record)
+        self._tail_checkpoints.extend(checkpoints)
+        self._log.append([{'op': 'issue', 'record': record} for record in records] +
+                         [{'op': 'checkpoint', 'checkpoint': cp} for cp in checkpoints])
+        if self._compact_due():
+            self.compact()
+
+    def add_checkpoint(self, checkpoint: Dict):
+        self.append([], [checkpoint])
+
+    def revoke(self, revocations: List[Dict]):
+        for revocation in revocations:
+            self._apply_revocation(revocation)
+        self._log.append([{'op': 'revoke', 'revocation': revocation}
+                          for revocation in revocations])
+        if self._compact_due():
+            self.compact()
+
+    def _compact_due(self) -> bool:
+        """Whether the log has grown enough to be folded into the snapshot"""
+        return self._log.entries >= self.compact_every
+
+    def is_revoked(self, position: int) -> bool:
+        if position in self._revoked:
+            return True
+        if position < self._base_count:
+            return self._base.status(position) == 'revoked'
+        return self._tail[position - self._base_count]['status'] == 'revoked'
+
+    @property
+    def revocations(self) -> List[Dict]:
+        base = self._base.revocations if self._base else []
+        return base + self._tail_revocations
+
+    @property
+    def metadata(self) -> Dict:
+        return self._metadata
+
+    @property
+    def checkpoints(self) -> List[Dict]:
+        base = self._base.checkpoints if self._base else []
+        return base + self._tail_checkpoints
+
+    def compact(self):
+        """Rewrite the snapshot with every record and truncate the log"""
+        with self._lock:
+            self.refresh()
+            atomic_write(self.ledger_path, lambda f: self.SNAPSHOT.write(
+                f, self.iter_records(), self.checkpoints, self._metadata,
+                self._log.last_lsn, self.revocations), binary=True)
+            self._log.truncate()
+            self._reload()
+
+    def close(self):
+        if self._base is not None:
+            self._base.close()
+            self._base = None
+
+
+class BinaryLedgerBackend(SnapshotLedgerBackend):
+    """Ledger in a memory-mapped BinaryLedgerFile ('binary' storage format)"""
+
+    SNAPSHOT = BinaryLedgerFile
+
+
+class LazyJsonlLedgerBackend(SnapshotLedgerBackend):
+    """
+    'jsonl' ledger opened through an IndexedJsonlFile instead of parsed
+
+    Uses the same snapshot and log files as JsonLedgerBackend in 'jsonl'
+    mode, plus the index at ledger_path + '.idx', so startup cost and
+    resident memory follow the index rather than the record payload.
+    """
+
+    SNAPSHOT = IndexedJsonlFile
+
+
+class SegmentedLedgerBackend(SnapshotLedgerBackend):
+    """
+    Ledger stored as sealed, immutable segments plus an active log ('segmented')
+
+    New records go to the active segment, the JSON Lines log at
+    ledger_path + '.log'. Once the log reaches segment_bytes, or its oldest
+    record is segment_seconds old, the active segment is sealed: its
+    records are written to a new BinaryLedgerFile in ledger_path +
+    '.segments' and appended to the manifest at ledger_path, and the log
+    starts over. Opening the ledger maps the sealed segments' indexes and
+    replays only the active log. Runs of adjacent segments smaller than
+    merge_below bytes are merged by a background thread, so time-based
+    rotation does not leave many tiny files. Sealed segments never change
+    once listed, so backups and replicas can copy each one exactly once
+    (see sealed_segments and verify_segments).
+    """
+
+    SNAPSHOT = SegmentedLedgerFile
+
+    def __init__(self, ledger_path: str, segment_bytes: int = 16 * 1024 * 1024,
+                 segment_seconds: Optional[float] = None,
+                 merge_below: Optional[int] = None, background_merge: bool = True):
+        """
+        Open the sealed segments and replay the active log
+
+        Args:
+            ledger_path: Path of the segment manifest
+            segment_bytes: Active log size at which the segment is sealed
+            segment_seconds: Age of the oldest active record at which the
+                segment is sealed (None: seal by size only)
+            merge_below: Sealed segments smaller than this are merged with
+                their neighbours (default: segment_bytes // 4)
+            background_merge: Merge on a background thread after sealing;
+                if False, merging runs inline in compact()
+        """
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.merge_below = segment_bytes // 4 if merge_below is None else merge_below
+        self.background_merge = background_merge
+        self.segment_dir = f"{ledger_path}.segments"
+        self._merge_thread: Optional[threading.Thread] = None
+        super().__init__(ledger_path)
+
+    def __getstate__(self) -> Dict:
+        return {'ledger_path': self.ledger_path, 'segment_bytes': self.segment_bytes,
+                'segment_seconds': self.segment_seconds, 'merge_below': self.merge_below,
+                'background_merge': self.background_merge}
+
+    def __setstate__(self, state: Dict):
+        self.__init__(**state)
+
+    def _compact_due(self) -> bool:
+        if self._log.size() >= self.segment_bytes:
+            return True
+        if self.segment_seconds is None or not self._tail:
+            return False
+        opened = datetime.datetime.fromisoformat(self._tail[0]['timestamp'])
+        return (datetime.datetime.now() - opened).total_seconds() >= self.segment_seconds
+
+    def _read_manifest(self) -> Dict:
+        """Current manifest on disk, or a new empty one"""
+        if Path(self.ledger_path).exists() and SegmentedLedgerFile.is_snapshot(self.ledger_path):
+            with open(self.ledger_path, 'r') as f:
+                return json.load(f)
+        return {'format': SegmentedLedgerFile.FORMAT, 'metadata': self._metadata,
+                'last_lsn': 0, 'next_seq': 0, 'segments': []}
+
+    def _write_manifest(self, manifest: Dict):
+        """Atomically replace the manifest"""
+        atomic_write(self.ledger_path, lambda f: json.dump(manifest, f, indent=2))
+
+    def _write_segment(self, seq: List[int], start: int, records: List[Dict],
+                       checkpoints: List[Dict], revocations: List[Dict]) -> Dict:
+        """Write a sealed segment file and return its manifest entry"""
+        buffer = io.BytesIO()
+        BinaryLedgerFile.write(buffer, records, checkpoints, self._metadata,
+                               revocations=revocations)
+        data = buffer.getvalue()
+        name = (f"segment-{seq[0]:06d}.bin" if seq[0] == seq[1]
+                else f"segment-{seq[0]:06d}-{seq[1]:06d}.bin")
+        Path(self.segment_dir).mkdir(parents=True, exist_ok=True)
+        atomic_write(os.path.join(self.segment_dir, name), lambda f: f.write(data), binary=True)
+        return {
+            'file': name,
+            'seq': seq,
+            'start': start,
+            'count': len(records),
+            'bytes': len(data),
+            'sha256': hashlib.sha256(data).hexdigest(),
+            'sealed_at': datetime.datetime.now().isoformat()
+        }
+
+    def compact(self):
+        """Seal the active segment, then merge small sealed segments"""
+        with self._lock:
+            self.refresh()
+            if self._tail or self._tail_checkpoints or self._tail_revocations:
+                manifest = self._read_manifest()
+                seq = manifest['next_seq']
+                manifest['segments'].append(self._write_segment(
+                    [seq, seq], self._base_count, self._tail,
+                    self._tail_checkpoints, self._tail_revocations))
+                manifest['next_seq'] = seq + 1
+                manifest['last_lsn'] = self._log.last_lsn
+                self._write_manifest(manifest)
+                self._log.truncate()
+                self._reload()
+
+        if not self.background_merge:
+            self.merge_segments()
+        elif self._merge_thread is None or not self._merge_thread.is_alive():
+            self._merge_thread = threading.Thread(target=self.merge_segments,
+                                                  name='ledger-segment-merge', daemon=True)
+            self._merge_thread.start()
+
+    def _merge_runs(self, segments: List[Dict]) -> List[List[Dict]]:
+        """Runs of two or more adjacent small segments that fit in one segment"""
+        runs = []
+        run: List[Dict] = []
+        size = 0
+        for segment in segments:
+            if segment['bytes'] < self.merge_below and size + segment['bytes'] <= self.segment_bytes:
+                run.append(segment)
+                size += segment['bytes']
+                continue
+            if len(run) > 1:
+                runs.append(run)
+            run, size = ([segment], segment['bytes']) if segment['bytes'] < self.merge_below else ([], 0)
+        if len(run) > 1:
+            runs.append(run)
+        return runs
+
+    def merge_segments(self) -> int:
+        """
+        Merge runs of adjacent small sealed segments into single segments
+
+        Segments are read and merged without holding the ledger lock; the
+        manifest is then swapped under the lock unless another process has
+        changed those segments meanwhile. Readers that still map the old
+        segment files keep valid data until their next refresh.
+
+        Returns:
+            Number of segment files merged away
+        """
+        with self._lock:
+            segments = self._read_manifest()['segments']
+
+        merged = 0
+        for run in self._merge_runs(segments):
+            records, checkpoints, revocations = [], [], []
+            try:
+                for segment in run:
+                    f = BinaryLedgerFile(os.path.join(self.segment_dir, segment['file']))
+                    records.extend(f.record(position) for position in range(f.count))
+                    checkpoints.extend(f.checkpoints)
+                    revocations.extend(f.revocations)
+                    f.close()
+            except FileNotFoundError:
+                continue  # already merged by another process
+            entry = self._write_segment([run[0]['seq'][0], run[-1]['seq'][1]], run[0]['start'],
+                                        records, checkpoints, revocations)
+
+            names = [segment['file'] for segment in run]
+            with self._lock:
+                manifest = self._read_manifest()
+                current = [segment['file'] for segment in manifest['segments']]
+                index = current.index(names[0]) if names[0] in current else -1
+                if index == -1 or current[index:index + len(names)] != names:
+                    if entry['file'] not in current:
+                        os.remove(os.path.join(self.segment_dir, entry['file']))
+                    continue
+                manifest['segments'][index:index + len(names)] = [entry]
+                self._write_manifest(manifest)
+            for name in names:
+                try:
+                    os.remove(os.path.join(self.segment_dir, name))
+                except FileNotFoundError:
+                    pass
+            merged += len(names)
+        return merged
+
+    def sealed_segments(self) -> List[Dict]:
+        """
+        Manifest entries of the sealed segments, in position order
+
+        Each entry has the segment 'file' name (under ledger_path +
+        '.segments'), its first position ('start'), 'count', 'bytes',
+        'sha256' digest and 'sealed_at' time.
+        """
+        return [dict(segment) for segment in self._read_manifest()['segments']]
+
+    def verify_segments(self) -> List[str]:
+        """
+        Check every sealed segment against its manifest digest
+
+        Returns:
+            Names of segment files that are missing or do not match
+        """
+        failed = []
+        for segment in self.sealed_segments():
+            digest = hashlib.sha256()
+            try:
+                with open(os.path.join(self.segment_dir, segment['file']), 'rb') as f:
+                    for block in iter(lambda: f.read(1024 * 1024), b''):
+                        digest.update(block)
+            except FileNotFoundError:
+                failed.append(segment['file'])
+                continue
+            if digest.hexdigest() != segment['sha256']:
+                failed.append(segment['file'])
+        return failed
+
+    def close(self):
+        if self._merge_thread is not None:
+            self._merge_thread.join()
+            self._merge_thread = None
+        super().close()
+
+
+class SqliteLedgerBackend(LedgerBackend):
+    """
+    Ledger stored in an indexed SQLite table
+
+    Nothing is cached in Python, so memory use stays flat as the ledger
+    grows; lookups and filters run as indexed SQL queries. The database
+    runs in WAL mode and appends are batched into one transaction. Each
+    thread gets its own connection; writers serialize on SQLite's own
+    database lock, which also covers other processes.
+
+    Commits are fsynced (synchronous=FULL) like the other backends' writes,
+    so an acknowledged issuance survives power loss. synchronous='NORMAL'
+    trades that for faster commits: WAL still protects against corruption,
+    but the last commits before a power failure can be lost.
+    """
+
+    SYNCHRONOUS_MODES = ('FULL', 'EXTRA', 'NORMAL')
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS credentials (
+            position INTEGER PRIMARY KEY,
+            credential_id TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            employee_id TEXT NOT NULL,
+            course_id TEXT NOT NULL,
+            course_name TEXT NOT NULL,
+            completion_date TEXT NOT NULL,
+            issuer TEXT NOT NULL,
+            hash TEXT NOT NULL,
+            prev_hash TEXT,
+            status TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_credentials_id ON credentials (credential_id);
+        CREATE INDEX IF NOT EXISTS idx_credentials_hash ON credentials (hash);
+        CREATE INDEX IF NOT EXISTS idx_credentials_employee ON credentials (employee_id);
+        CREATE INDEX IF NOT EXISTS idx_credentials_course ON credentials (course_id);
+        CREATE INDEX IF NOT EXISTS idx_credentials_completion ON credentials (completion_date);
+        CREATE INDEX IF NOT EXISTS idx_credentials_issuer ON credentials (issuer);
+        CREATE INDEX IF NOT EXISTS idx_credentials_status ON credentials (status);
+        CREATE TABLE IF NOT EXISTS checkpoints (
+            records INTEGER PRIMARY KEY,
+            head TEXT NOT NULL,
+            created_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS metadata (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS revocations (
+            position INTEGER PRIMARY KEY,
+            credential_id TEXT NOT NULL,
+            reason TEXT NOT NULL,
+            revoked_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_revocations_time ON revocations (revoked_at);
+    """
+
+    COLUMNS = ('position, credential_id, timestamp, employee_id, course_id, course_name, '
+               'completion_date, issuer, hash, prev_hash, status')
+
+    def __init__(self, db_path: str, synchronous: str = 'FULL'):
+        """
+        Open (or create) the ledger database
+
+        Args:
+            db_path: Path of the SQLite database file
+            synchronous: SQLite synchronous mode: 'FULL' (default) or 'EXTRA'
+                make every commit durable; 'NORMAL' may lose the latest
+                commits on power loss
+
+        Raises:
+            ValueError: If synchronous is not one of SYNCHRONOUS_MODES
+        """
+        if synchronous not in self.SYNCHRONOUS_MODES:
+            raise ValueError(f"Unknown synchronous mode: {synchronous}")
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.db_path = db_path
+        self.synchronous = synchronous
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self.conn.executescript(self.SCHEMA)
+        with self.write_lock():
+            for key, value in new_ledger_metadata().items():
+                self.conn.execute('INSERT OR IGNORE INTO metadata (key, value) VALUES (?, ?)',
+                                  (key, value))
+
+    def __getstate__(self) -> Dict:
+        # Pickle as the path; connections are per process and thread
+        return {'db_path': self.db_path, 'synchronous': self.synchronous}
+
+    def __setstate__(self, state: Dict):
+        self.__init__(**state)
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """This thread's connection, opened on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit mode: transactions are opened explicitly by write_lock
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'PRAGMA synchronous={self.synchronous}')
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def write_lock(self):
+        """
+        Run the enclosed writes as one IMMEDIATE transaction
+
+        BEGIN IMMEDIATE takes the database write lock up front, so counts
+        read inside the block stay valid until COMMIT.
+        """
+        conn = self.conn
+        if self._local.depth:
+            self._local.depth += 1
+            try:
+                yield
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn.execute('BEGIN IMMEDIATE')
+        self._local.depth = 1
+        try:
+            yield
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        else:
+            conn.execute('COMMIT')
+        finally:
+            self._local.depth = 0
+
+    @staticmethod
+    def _to_record(row: Tuple) -> Dict:
+        """Rebuild a ledger record dict from a table row"""
+        (_, credential_id, timestamp, employee_id, course_id, course_name,
+         completion_date, issuer, credential_hash, prev_hash, status) = row
+        record = {
+            'credential_id': credential_id,
+            'timestamp': timestamp,
+            'data': {
+                'employee_id': employee_id,
+                'course_id': course_id,
+                'course_name': course_name,
+                'completion_date': completion_date,
+                'issuer': issuer
+            },
+            'hash': credential_hash,
+            'status': status
+        }
+        if prev_hash is not None:
+            record['prev_hash'] = prev_hash
+        return record
+
+    @staticmethod
+    def _to_row(position: int, record: Dict) -> Tuple:
+        """Flatten a ledger record into a table row"""
+        data = record['data']
+        return (position, record['credential_id'], record['timestamp'],
+                data['employee_id'], data['course_id'], data['course_name'],
+                data['completion_date'], data['issuer'],
+                record['hash'], record.get('prev_hash'), record['status'])
+
+    def _query(self, where: str, params: Tuple, status: Optional[str],
+               order: str = 'position') -> List[Dict]:
+        """Select records matching a WHERE clause, optionally filtered by status"""
+        if status is not None:
+            where += ' AND status = ?'
+            params += (status,)
+        rows = self.conn.execute(
+            f'SELECT {self.COLUMNS} FROM credentials WHERE {where} ORDER BY {order}', params)
+        return [self._to_record(row) for row in rows]
+
+    def count(self, status: Optional[str] = None) -> int:
+        if status is None:
+            # Positions are dense from 0, so this is a primary-key lookup, not a scan
+            return self.conn.execute(
+                'SELECT COALESCE(MAX(position) + 1, 0) FROM credentials').fetchone()[0]
+        return self.conn.execute('SELECT COUNT(*) FROM credentials WHERE status = ?',
+                                 (status,)).fetchone()[0]
+
+    def get(self, position: int) -> Dict:
+        if position < 0:
+            position += self.count()
+        row = self.conn.execute(f'SELECT {self.COLUMNS} FROM credentials WHERE position = ?',
+                                (position,)).fetchone()
+        if row is None:
+            raise IndexError(f"No ledger record at position {position}")
+        return self._to_record(row)
+
+    def iter_records(self, start: int = 0, end: Optional[int] = None) -> Iterator[Dict]:
+        end = self.count() if end is None else end
+        rows = self.conn.execute(
+            f'SELECT {self.COLUMNS} FROM credentials WHERE position >= ? AND position < ? '
+            f'ORDER BY position', (start, end))
+        for row in rows:
+            yield self._to_record(row)
+
+    def position_of(self, credential_id: str) -> Optional[int]:
+        row = self.conn.execute('SELECT position FROM credentials WHERE credential_id = ?',
+                                (credential_id,)).fetchone()
+        return row[0] if row else None
+
+    def find_by_hash(self, credential_hash: str, status: Optional[str] = 'active') -> List[Dict]:
+        return self._query('hash = ?', (credential_hash,), status)
+
+    def employee_records(self, employee_id: str, status: Optional[str] = 'active') -> List[Dict]:
+        return self._query('employee_id = ?', (employee_id,), status)
+
+    def iter_employee_groups(self) -> Iterator[Tuple[str, List[Dict]]]:
+        rows = self.conn.execute(
+            f'SELECT {self.COLUMNS} FROM credentials ORDER BY employee_id, position')
+        records = (self._to_record(row) for row in rows)
+        for employee_id, group in groupby(records, key=lambda r: r['data']['employee_id']):
+            yield employee_id, list(group)
+
+    def course_records(self, course_id: str, status: Optional[str] = 'active') -> List[Dict]:
+        return self._query('course_id = ?', (course_id,), status)
+
+    def issuer_records(self, issuer: str, status: Optional[str] = 'active') -> List[Dict]:
+        return self._query('issuer = ?', (issuer,), status)
+
+    def records_between(self, start: str, end: str, status: Optional[str] = 'active') -> List[Dict]:
+        date_bounds(start, end)
+        # BETWEEN on ISO strings is a range scan of the completion_date index;
+        # non-ISO values that happen to sort inside the range are dropped after
+        records = self._query('completion_date BETWEEN ? AND ?', (start, end), status,
+                              order='completion_date, position')
+        return [r for r in records if date_ordinal(r['data']['completion_date']) is not None]
+
+    def append(self, records: List[Dict], checkpoints: List[Dict]):
+        with self.write_lock():
+            start = self.count()
+            self.conn.executemany(
+                f'INSERT INTO credentials ({self.COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (self._to_row(start + offset, record) for offset, record in enumerate(records)))
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO checkpoints (records, head, created_at) VALUES (?, ?, ?)',
+                ((cp['records'], cp['head'], cp['created_at']) for cp in checkpoints))
+
+    def add_checkpoint(self, checkpoint: Dict):
+        self.append([], [checkpoint])
+
+    def revoke(self, revocations: List[Dict]):
+        with self.write_lock():
+            self.conn.executemany(
+                'INSERT INTO revocations (position, credential_id, reason, revoked_at) '
+                'VALUES (?, ?, ?, ?)',
+                ((r['position'], r['credential_id'], r['reason'], r['revoked_at'])
+                 for r in revocations))
+            self.conn.executemany("UPDATE credentials SET status = 'revoked' WHERE position = ?",
+                                  ((r['position'],) for r in revocations))
+
+    def is_revoked(self, position: int) -> bool:
+        row = self.conn.execute('SELECT 1 FROM revocations WHERE position = ?',
+                                (position,)).fetchone()
+        return row is not None
+
+    @property
+    def revocations(self) -> List[Dict]:
+        rows = self.conn.execute('SELECT credential_id, position, reason, revoked_at '
+                                 'FROM revocations ORDER BY revoked_at, position')
+        return [{'credential_id': credential_id, 'position': position,
+                 'reason': reason, 'revoked_at': revoked_at}
+                for credential_id, position, reason, revoked_at in rows]
+
+    @property
+    def metadata(self) -> Dict:
+        return dict(self.conn.execute('SELECT key, value FROM metadata'))
+
+    @property
+    def checkpoints(self) -> List[Dict]:
+        rows = self.conn.execute('SELECT records, head, created_at FROM checkpoints ORDER BY records')
+        return [{'records': records, 'head': head, 'created_at': created_at}
+                for records, head, created_at in rows]
+
+    def compact(self):
+        self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
@@ -0,0 +1,408 @@
+"""
+SkillChain DX - Ledger Replica Synchronization
+Brings a read replica of the credential ledger up to date by comparing range digests
+"""
+
+import datetime
+import hashlib
+import json
+import weakref
+from pathlib import Path
+from typing import Dict, List, Optional, TextIO, Tuple, Union
+
+from src.blockchain_verification import CredentialLedger
+from src.ledger_backends import atomic_write
+
+
+def record_digest(record: Dict) -> bytes:
+    """SHA-256 digest of a record, including its status"""
+    return hashlib.sha256(json.dumps(record, sort_keys=True).encode()).digest()
+
+
+class RangeDigests:
+    """
+    Digests of position ranges of a ledger
+
+    A range digest is the SHA-256 of the digests of its records in order,
+    so it changes when any record in the range is added, altered or revoked.
+    Digests of full, aligned ranges of range_size records are cached and
+    dropped when a revocation touches their range; records are otherwise
+    never rewritten, so a cached digest stays valid.
+
+    Use for_ledger() to share one instance per ledger and range size across
+    syncs and to persist its cache in ledger_path + '.digests', so a sync
+    with nothing to do only hashes the last, partial range.
+    """
+
+    # Shared instances by ledger, then by range size
+    _shared: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+
+    def __init__(self, ledger: CredentialLedger, range_size: int = 4096,
+                 cache_path: Optional[str] = None):
+        """
+        Args:
+            ledger: Ledger whose records are digested
+            range_size: Records per cached range
+            cache_path: File the cached digests are loaded from and saved to
+                (None: keep them in memory only)
+        """
+        self.ledger = ledger
+        self.range_size = range_size
+        self.cache_path = cache_path
+        self._cache: Dict[int, str] = {}
+        self._revoked_seen: set = set()
+        self._dirty = False
+        if cache_path is not None:
+            self._load()
+
+    @classmethod
+    def for_ledger(cls, ledger: CredentialLedger, range_size: int = 4096) -> 'RangeDigests':
+        """
+        The shared, persisted RangeDigests of a ledger
+
+        Args:
+            ledger: Ledger whose records are digested
+            range_size: Records per cached range
+
+        Returns:
+            The instance created by the first call for this ledger and range size
+        """
+        by_size = cls._shared.setdefault(ledger, {})
+        if range_size not in by_size:
+            # A proxy, so the shared instance does not keep its ledger alive
+            by_size[range_size] = cls(weakref.proxy(ledger), range_size,
+                                      f"{ledger.ledger_path}.digests")
+        return by_size[range_size]
+
+    def _load(self):
+        """Load cached digests saved for this ledger and range size, if any"""
+        if not Path(self.cache_path).exists():
+            return
+        try:
+            with open(self.cache_path, 'r') as f:
+                saved = json.load(f)
+        except ValueError:
+            return  # unreadable cache: recompute
+        if (saved.get('range_size') != self.range_size
+                or saved.get('created_at') != self.ledger.backend.metadata.get('created_at')):
+            return  # another ledger or range size
+        full_ranges = self.ledger.backend.count() // self.range_size
+        self._cache = {int(index): digest for index, digest in saved['ranges'].items()
+                       if int(index) < full_ranges}
+        self._revoked_seen = set(saved['revoked'])
+
+    def save(self):
+        """Persist the cached digests (a no-op without cache_path or changes)"""
+        if self.cache_path is None or not self._dirty:
+            return
+        state = {'range_size': self.range_size,
+                 'created_at': self.ledger.backend.metadata.get('created_at'),
+                 'revoked': sorted(self._revoked_seen),
+                 'ranges': {str(index): digest for index, digest in sorted(self._cache.items())}}
+        atomic_write(self.cache_path, lambda f: json.dump(state, f))
+        self._dirty = False
+
+    def invalidate_revoked(self):
+        """Drop cached ranges holding records revoked since the last call"""
+        # Revocations are matched by position: synced events may sort before older ones
+        for revocation in self.ledger.backend.revocations:
+            position = revocation['position']
+            if position not in self._revoked_seen:
+                self._revoked_seen.add(position)
+                self._cache.pop(position // self.range_size, None)
+                self._dirty = True
+
+    def digest(self, start: int, end: int) -> str:
+        """Digest of the records from position start up to (excluding) end"""
+        end = min(end, self.ledger.backend.count())
+        cacheable = start % self.range_size == 0 and end - start == self.range_size
+        if cacheable and start // self.range_size in self._cache:
+            return self._cache[start // self.range_size]
+
+        digest = hashlib.sha256()
+        for record in self.ledger.backend.iter_records(start, end):
+            digest.update(record_digest(record))
+        value = digest.hexdigest()
+        if cacheable:
+            self._cache[start // self.range_size] = value
+            self._dirty = True
+        return value
+
+
+class SyncServer:
+    """
+    Answers replica sync requests from a primary ledger
+
+    Requests and responses are JSON-serializable dicts, so any transport
+    that can carry JSON (a direct call, pipes, sockets, HTTP) can connect a
+    replica to the primary.
+    """
+
+    def __init__(self, ledger: CredentialLedger, range_size: int = 4096):
+        """
+        Args:
+            ledger: The primary ledger
+            range_size: Records per cached digest range
+        """
+        self.ledger = ledger
+        self.digests = RangeDigests.for_ledger(ledger, range_size)
+
+    def handle(self, request: Dict) -> Dict:
+        """
+        Answer one request
+
+        Operations ('op'):
+            'status': record count and revocation count
+            'digests': digest of each [start, end) range in 'ranges'
+            'records': records from 'start' up to (excluding) 'end'
+            'revocations': latest revocation event for each of 'positions'
+            'checkpoints': checkpoints covering more than 'after' records
+
+        Returns:
+            The response, or {'error': message} for a bad request
+        """
+        backend = self.ledger.backend
+        op = request.get('op')
+        try:
+            if op == 'status':
+                self.ledger.refresh()
+                self.digests.invalidate_revoked()
+                return {'count': backend.count(), 'revocations': len(backend.revocations)}
+            if op == 'digests':
+                return {'digests': [self.digests.digest(start, end)
+                                    for start, end in request['ranges']]}
+            if op == 'records':
+                return {'records': list(backend.iter_records(request['start'], request['end']))}
+            if op == 'revocations':
+                wanted = set(request['positions'])
+                events = {event['position']: event for event in backend.revocations
+                          if event['position'] in wanted}
+                return {'revocations': list(events.values())}
+            if op == 'checkpoints':
+                return {'checkpoints': [cp for cp in backend.checkpoints
+                                        if cp['records'] > request['after']]}
+        except (KeyError, TypeError, ValueError) as e:
+            return {'error': f"Bad {op} request: {e}"}
+        return {'error': f"Unknown sync operation: {op}"}
+
+    def serve(self, reader: TextIO, writer: TextIO):
+        """
+        Answer JSON Lines requests from reader until it is closed
+
+        Args:
+            reader: Text stream of one JSON request per line
+            writer: Text stream the JSON responses are written to, one per line
+        """
+        try:
+            for line in reader:
+                if line.strip():
+                    writer.write(json.dumps(self.handle(json.loads(line))) + '\n')
+                    writer.flush()
+        finally:
+            self.digests.save()
+
+
+class SyncTransport:
+    """
+    How a replica reaches the primary's SyncServer
+
+    Subclasses implement request(); the sync protocol only needs this one
+    round trip.
+    """
+
+    def request(self, message: Dict) -> Dict:
+        """Send a request and return the primary's response"""
+        raise NotImplementedError
+
+
+class LocalTransport(SyncTransport):
+    """
+    Transport to a primary ledger opened in this process
+
+    Responses are passed through JSON like on any other transport, so the
+    replica never shares record objects with the primary.
+    """
+
+    def __init__(self, primary: Union[CredentialLedger, SyncServer]):
+        """
+        Args:
+            primary: Primary ledger, or a SyncServer over it
+        """
+        self.server = primary if isinstance(primary, SyncServer) else SyncServer(primary)
+
+    def request(self, message: Dict) -> Dict:
+        return json.loads(json.dumps(self.server.handle(message)))
+
+
+class StreamTransport(SyncTransport):
+    """
+    Transport over a pair of text streams speaking JSON Lines
+
+    The other end runs SyncServer.serve, e.g. over a socket or the stdin
+    and stdout of `ssh primary python sync_ledger.py --serve LEDGER`.
+    """
+
+    def __init__(self, reader: TextIO, writer: TextIO):
+        """
+        Args:
+            reader: Stream the responses are read from
+            writer: Stream the requests are written to
+        """
+        self.reader = reader
+        self.writer = writer
+
+    def request(self, message: Dict) -> Dict:
+        self.writer.write(json.dumps(message) + '\n')
+        self.writer.flush()
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("Sync server closed the connection")
+        return json.loads(line)
+
+
+def _call(transport: SyncTransport, message: Dict, stats: Dict) -> Dict:
+    """Make a request (counted in stats), raising on an error response"""
+    stats['requests'] += 1
+    response = transport.request(message)
+    if 'error' in response:
+        raise RuntimeError(f"Sync request failed: {response['error']}")
+    return response
+
+
+def _differing_ranges(local: RangeDigests, transport: SyncTransport, count: int,
+                      leaf_size: int, fanout: int, stats: Dict) -> List[Tuple[int, int]]:
+    """
+    Find the ranges below count whose digests differ, down to leaf_size records
+
+    Differing ranges are split into fanout parts and compared again, so a
+    single changed record costs about log(count) digest rounds rather than
+    transferring its whole range.
+    """
+    ranges = [(start, min(start + local.range_size, count))
+              for start in range(0, count, local.range_size)]
+    differing = []
+    while ranges:
+        remote = _call(transport, {'op': 'digests', 'ranges': ranges}, stats)['digests']
+        stats['ranges_compared'] += len(ranges)
+        split = []
+        for (start, end), digest in zip(ranges, remote):
+            if local.digest(start, end) == digest:
+                continue
+            if end - start <= leaf_size:
+                differing.append((start, end))
+                continue
+            step = max(leaf_size, -(-(end - start) // fanout))
+            split.extend((s, min(s + step, end)) for s in range(start, end, step))
+        ranges = split
+    return sorted(differing)
+
+
+def sync_ledger(replica: CredentialLedger,
+                source: Union[CredentialLedger, SyncTransport],
+                range_size: int = 4096, leaf_size: int = 64, fanout: int = 16,
+                batch_size: int = 1000, digests: Optional[RangeDigests] = None) -> Dict:
+    """
+    Bring a replica up to date with the primary ledger
+
+    Records the replica lacks are copied in batches together with their
+    checkpoints. For records both sides hold, range digests are compared
+    and only ranges that differ are transferred: revocations missing on
+    the replica are replayed from the primary's revocation events. Records
+    that differ in any other way mean the copies have diverged; they are
+    reported as conflicts and left untouched.
+
+    Args:
+        replica: Replica ledger; it should only ever be written by sync_ledger
+        source: Primary ledger, or a transport to one
+        range_size: Records per top-level digest range (match the primary
+            SyncServer's range_size so its cached digests are used)
+        leaf_size: Range size below which differing records are transferred
+        fanout: Parts a differing range is split into per round
+        batch_size: Records per transfer request
+        digests: RangeDigests over the replica (default: its shared,
+            persisted RangeDigests.for_ledger instance)
+
+    Returns:
+        Sync statistics: records 'appended', records 'revoked',
+        'records_transferred', 'ranges_compared', 'requests' made and
+        'conflicts' (positions whose records diverged)
+
+    Raises:
+        ValueError: If the replica holds more records than the primary
+    """
+    if isinstance(source, SyncTransport):
+        transport = source
+    else:
+        transport = LocalTransport(SyncServer(source, range_size))
+    if digests is None:
+        digests = RangeDigests.for_ledger(replica, range_size)
+    stats = {'appended': 0, 'revoked': 0, 'records_transferred': 0,
+             'ranges_compared': 0, 'requests': 0, 'conflicts': []}
+    backend = replica.backend
+
+    with backend.write_lock():
+        remote_count = _call(transport, {'op': 'status'}, stats)['count']
+        local_count = backend.count()
+        if local_count > remote_count:
+            raise ValueError(f"Replica has {local_count} records but the primary only "
+                             f"{remote_count}; the copies have diverged")
+        digests.invalidate_revoked()
+
+        # Records both copies hold: transfer only ranges whose digests differ
+        to_revoke = []
+        for start, end in _differing_ranges(digests, transport, local_count,
+                                            leaf_size, fanout, stats):
+            remote = _call(transport, {'op': 'records', 'start': start, 'end': end},
+                           stats)['records']
+            stats['records_transferred'] += len(remote)
+            for position, (mine, theirs) in enumerate(zip(backend.iter_records(start, end), remote),
+                                                      start):
+                if mine == theirs:
+                    continue
+                if (theirs['status'] == 'revoked' and mine['status'] != 'revoked'
+                        and dict(mine, status='revoked') == theirs):
+                    to_revoke.append(position)
+                else:
+                    stats['conflicts'].append(position)
+
+        # Records only the primary holds: copy them with their checkpoints
+        checkpoints = _call(transport, {'op': 'checkpoints', 'after': local_count},
+                            stats)['checkpoints']
+        for start in range(local_count, remote_count, batch_size):
+            end = min(start + batch_size, remote_count)
+            records = _call(transport, {'op': 'records', 'start': start, 'end': end},
+                            stats)['records']
+            stats['records_transferred'] += len(records)
+            for position, record in enumerate(records, start):
+                if record['status'] == 'revoked':
+                    # Appended active, then revoked by replaying the primary's event
+                    record['status'] = 'active'
+                    to_revoke.append(position)
+            backend.append(records, [cp for cp in checkpoints if start < cp['records'] <= end])
+            stats['appended'] += len(records)
+
+        if to_revoke:
+            events = _call(transport, {'op': 'revocations', 'positions': to_revoke},
+                           stats)['revocations']
+            by_position = {event['position']: event for event in events}
+            missing = [p for p in to_revoke if p not in by_position]
+            if missing:
+                # Revoked on the primary without an event: record it as such here
+                revoked_at = datetime.datetime.now().isoformat()
+                for position in missing:
+                    by_position[position] = {
+                        'credential_id': backend.get(position)['credential_id'],
+                        'position': position,
+                        'reason': 'Revoked on the primary (no revocation event)',
+                        'revoked_at': revoked_at
+                    }
+            backend.revoke([by_position[p] for p in sorted(by_position)])
+            stats['revoked'] = len(by_position)
+
+    replica.refresh()
+    digests.invalidate_revoked()
+    digests.save()
+    if isinstance(transport, LocalTransport):
+        transport.server.digests.save()
+    return stats
+
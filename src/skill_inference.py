@@ -8,38 +8,99 @@ import numpy as np
 from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 import json
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
 import re
 
 
 class SkillInferenceEngine:
     """AI-powered skill extraction and matching engine"""
     
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+    PROFILE_MODES = ('text', 'mean', 'weighted', 'recency')
+    
+    def __init__(self, model_name: str = 'all-MiniLM-L6-v2', normalizer=None,
+                 profile_mode: str = 'text'):
         """
         Initialize the skill inference engine
         
         Args:
             model_name: Sentence transformer model to use
+            normalizer: Optional SkillNormalizer that canonicalizes extracted skills
+            profile_mode: How employee profiles are embedded: 'text' encodes the
+                concatenated skills, 'mean' averages cached course embeddings,
+                'weighted' pools them using course level, duration and experience
+                (which raises the weight of higher-level courses) and 'recency'
+                additionally decays each course by completion age
         """
+        if profile_mode not in self.PROFILE_MODES:
+            raise ValueError(f"Unknown profile_mode: {profile_mode}")
         print(f"Loading sentence transformer model: {model_name}")
         self.model = SentenceTransformer(model_name)
+        self.normalizer = normalizer
         self.job_roles = None
         self.courses = None
         self.employees = None
         
+        # Semantic gap analysis: skill vocabulary embeddings and their similarity matrix
+        self.semantic_gap_threshold = 0.7
+        self._skill_index = {}
+        self._skill_embeddings = None
+        self._skill_similarity = None
+        
+        # Profile pooling: cached course/role embeddings and pooled employee profiles
+        self.profile_mode = profile_mode
+        self.profile_weights = {
+            'level': {'Beginner': 1.0, 'Intermediate': 1.5, 'Advanced': 2.0},
+            'duration_exponent': 0.5,
+            'experience_per_year': 0.05,
+            'experience_cap': 0.5
+        }
+        self._course_embeddings = None
+        self._role_embeddings = None
+        self._employee_course_matrix = None
+        self._completion_days = None
+        self._employee_rows = {}
+        self._profiles = {}
+        
+        # Recency decay: half-life in days, reference date (None = today) and the
+        # decay weight below which a course's skills are treated as stale
+        self.recency = {
+            'half_life_days': 365.0,
+            'as_of': None,
+            'stale_weight': 0.25
+        }
+        # Reference date (ordinal) the cached 'recency' profiles were computed for
+        self._recency_profiles_as_of = None
+        
+        # Profile source: 'csv' trusts completed_courses, 'ledger' uses verified credentials
+        self.profile_source = 'csv'
+        self.ledger = None
+        
     def load_data(self, job_roles_path: str, courses_path: str, employees_path: str):
         """Load datasets from CSV files"""
         print("Loading datasets...")
         self.job_roles = pd.read_csv(job_roles_path)
         self.courses = pd.read_csv(courses_path)
         self.employees = pd.read_csv(employees_path)
+        self._skill_index, self._skill_embeddings, self._skill_similarity = {}, None, None
+        self._course_embeddings = self._role_embeddings = None
+        self._employee_course_matrix = self._completion_days = None
+        self._profiles = {}
         print(f"Loaded {len(self.job_roles)} job roles, {len(self.courses)} courses, {len(self.employees)} employees")
         
+        if self.normalizer is not None:
+            # Normalize the whole skill corpus in one batched pass
+            corpus = ', '.join(self.courses['skills_taught'].tolist() +
+                               self.job_roles['required_skills'].tolist())
+            self.extract_skills(corpus)
+            print(f"Normalized skill vocabulary: {self.normalizer.vocabulary_size} canonical skills")
+        
     def extract_skills(self, text: str) -> List[str]:
         """
         Extract skills from text using simple pattern matching
         
+        When a normalizer is configured, skills are mapped to canonical ids
+        and duplicates that merge (e.g. "neural network(s)") are dropped.
+        
         Args:
             text: Text containing skills
             
@@ -49,8 +110,65 @@ class SkillInferenceEngine:
         # Simple extraction: split by common delimiters
         skills = re.split(r'[,;]', text.lower())
         skills = [s.strip() for s in skills if s.strip()]
+        
+        if self.normalizer is not None:
+            skills = list(dict.fromkeys(self.normalizer.normalize(skills)))
         return skills
     
+    def attach_ledger(self, ledger):
+        """
+        Build employee profiles from active ledger credentials
+        
+        Completed courses are taken from the ledger's employee index and joined
+        to the course catalogue by course_id. The engine subscribes to the
+        ledger so cached profiles follow new issuances and revocations
+        incrementally; those made by other processes sharing the ledger are
+        followed once ledger.refresh() picks them up.
+        
+        Args:
+            ledger: CredentialLedger instance
+        """
+        self.ledger = ledger
+        self.profile_source = 'ledger'
+        self._employee_course_matrix = self._completion_days = None
+        self._profiles = {}
+        ledger.add_listener(self._on_ledger_event)
+    
+    def _on_ledger_event(self, event: str, record: Dict):
+        """Refresh the cached completion row and profiles of one employee"""
+        employee_id = record['data']['employee_id']
+        row = self._employee_rows.get(employee_id)
+        if self._employee_course_matrix is None or row is None:
+            return
+        
+        # Never mix rows decayed to different dates into one cached matrix
+        self._drop_stale_recency_profiles()
+        self._employee_course_matrix[row], self._completion_days[row] = self._completion_row(employee_id)
+        for profile_mode, profiles in self._profiles.items():
+            profiles[row] = self._pool_profiles(profile_mode, np.array([row]))[0]
+    
+    def get_completed_courses(self, employee_id: str) -> Dict[str, Optional[str]]:
+        """
+        Get the courses an employee has completed
+        
+        Args:
+            employee_id: Employee identifier
+            
+        Returns:
+            Course id -> latest completion date, from active ledger credentials,
+            or course id -> None (undated) from employees.csv
+        """
+        if self.profile_source == 'ledger':
+            completions = {}
+            for credential in self.ledger.get_employee_credentials(employee_id):
+                course_id = credential['data']['course_id']
+                completion_date = credential['data']['completion_date']
+                completions[course_id] = max(completion_date, completions.get(course_id, completion_date))
+            return completions
+        
+        employee = self.employees[self.employees['employee_id'] == employee_id].iloc[0]
+        return {c.strip(): None for c in employee['completed_courses'].split(',')}
+    
     def get_employee_skills(self, employee_id: str) -> str:
         """
         Get aggregated skills for an employee based on completed courses
@@ -61,8 +179,7 @@ class SkillInferenceEngine:
         Returns:
             Concatenated skill description
         """
-        employee = self.employees[self.employees['employee_id'] == employee_id].iloc[0]
-        completed_course_ids = [c.strip() for c in employee['completed_courses'].split(',')]
+        completed_course_ids = self.get_completed_courses(employee_id)
         
         # Get skills from all completed courses
         employee_skills = []
@@ -74,25 +191,227 @@ class SkillInferenceEngine:
         
         return ', '.join(employee_skills)
     
-    def compute_role_similarity(self, employee_id: str) -> pd.DataFrame:
+    def set_profile_weights(self, level_weights: Optional[Dict[str, float]] = None,
+                            duration_exponent: Optional[float] = None,
+                            experience_per_year: Optional[float] = None,
+                            experience_cap: Optional[float] = None):
+        """
+        Configure the weights used by the 'weighted' profile mode
+        
+        A course contributes level_weights[level] ** (1 + experience) *
+        duration_hours ** duration_exponent, where experience is
+        min(years_experience * experience_per_year, experience_cap): the more
+        experienced the employee, the more their higher-level courses count.
+        
+        Args:
+            level_weights: Weight per course level
+            duration_exponent: Exponent applied to course duration in hours
+            experience_per_year: Level-weight exponent gained per year of experience
+            experience_cap: Upper bound on that exponent gain
+        """
+        if level_weights is not None:
+            self.profile_weights['level'] = dict(level_weights)
+        if duration_exponent is not None:
+            self.profile_weights['duration_exponent'] = duration_exponent
+        if experience_per_year is not None:
+            self.profile_weights['experience_per_year'] = experience_per_year
+        if experience_cap is not None:
+            self.profile_weights['experience_cap'] = experience_cap
+        self._profiles.pop('weighted', None)
+        self._profiles.pop('recency', None)
+    
+    def _get_course_embeddings(self) -> np.ndarray:
+        """Embed every course's skills once (rows follow self.courses)"""
+        if self._course_embeddings is None:
+            self._course_embeddings = self.model.encode(
+                self.courses['skills_taught'].tolist(), normalize_embeddings=True)
+        return self._course_embeddings
+    
+    def _get_role_embeddings(self) -> np.ndarray:
+        """Embed every role's required skills once (rows follow self.job_roles)"""
+        if self._role_embeddings is None:
+            self._role_embeddings = self.model.encode(
+                self.job_roles['required_skills'].tolist(), normalize_embeddings=True)
+        return self._role_embeddings
+    
+    def _completion_row(self, employee_id: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Completion indicator and completion day ordinal (NaN if undated) over courses"""
+        course_cols = {cid: j for j, cid in enumerate(self.courses['course_id'])}
+        row = np.zeros(len(self.courses))
+        days = np.full(len(self.courses), np.nan)
+        for course_id, completion_date in self.get_completed_courses(employee_id).items():
+            j = course_cols.get(course_id)
+            if j is not None:
+                row[j] = 1.0
+                if completion_date:
+                    days[j] = pd.Timestamp(completion_date).toordinal()
+        return row, days
+    
+    def _get_employee_course_matrix(self) -> np.ndarray:
+        """Build the employee x course completion matrix for the current profile source"""
+        if self._employee_course_matrix is None:
+            employee_ids = self.employees['employee_id'].tolist()
+            self._employee_rows = {eid: i for i, eid in enumerate(employee_ids)}
+            rows, days = zip(*[self._completion_row(eid) for eid in employee_ids])
+            self._employee_course_matrix = np.vstack(rows)
+            self._completion_days = np.vstack(days)
+        return self._employee_course_matrix
+    
+    def set_recency(self, half_life_days: Optional[float] = None, as_of=None,
+                    stale_weight: Optional[float] = None):
+        """
+        Configure the 'recency' profile mode
+        
+        Moving as_of forward only reweights cached course vectors; nothing is re-encoded.
+        
+        Args:
+            half_life_days: Age in days at which a course counts half
+            as_of: Reference date for ages (None = today)
+            stale_weight: Decay weight below which a course's skills count as gaps
+        """
+        if half_life_days is not None:
+            self.recency['half_life_days'] = float(half_life_days)
+        if as_of is not None:
+            self.recency['as_of'] = as_of
+        if stale_weight is not None:
+            self.recency['stale_weight'] = stale_weight
+        self._profiles.pop('recency', None)
+    
+    def _decay_weights(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Recency decay factors for the given employee rows
+        
+        Each completed course counts 0.5 ** (age_days / half_life_days);
+        undated completions (employees.csv source) are not decayed.
+        """
+        self._get_employee_course_matrix()
+        as_of = self._recency_as_of()
+        days = self._completion_days[rows]
+        ages = np.clip(as_of - days, 0, None)
+        decay = np.power(0.5, ages / self.recency['half_life_days'])
+        return np.where(np.isnan(days), 1.0, decay)
+    
+    def _recency_as_of(self) -> int:
+        """Ordinal of the recency reference date: the configured as_of, else today"""
+        return pd.Timestamp(self.recency['as_of'] or pd.Timestamp.today()).toordinal()
+    
+    def _drop_stale_recency_profiles(self):
+        """
+        Drop cached 'recency' profiles computed for another reference date
+        
+        With as_of unset the reference date is today, so profiles cached by a
+        long-running process are recomputed once the date changes.
+        """
+        if self._recency_profiles_as_of != self._recency_as_of():
+            self._profiles.pop('recency', None)
+    
+    def get_employee_skill_weights(self, employee_id: str) -> Dict[str, float]:
+        """
+        Get recency weights of an employee's skills
+        
+        Args:
+            employee_id: Employee identifier
+            
+        Returns:
+            Skill -> decay weight of the most recent course teaching it
+        """
+        row = self._get_employee_course_matrix()[self._employee_rows[employee_id]]
+        decay = self._decay_weights(np.array([self._employee_rows[employee_id]]))[0]
+        
+        skill_weights = {}
+        for j in np.flatnonzero(row):
+            for skill in self.extract_skills(self.courses.iloc[j]['skills_taught']):
+                skill_weights[skill] = max(skill_weights.get(skill, 0.0), float(decay[j]))
+        return skill_weights
+    
+    def _course_weights(self, profile_mode: str, rows: np.ndarray) -> np.ndarray:
+        """Pooling weights of every course for the given employee rows (employees x courses)"""
+        if profile_mode == 'mean':
+            return np.ones((len(rows), len(self.courses)))
+        
+        level_weights = self.profile_weights['level']
+        levels = self.courses['level'].map(lambda level: level_weights.get(level, 1.0))
+        durations = self.courses['duration_hours'].astype(float).clip(lower=1.0)
+        # Experience sharpens the level weights rather than adding any role's skills
+        experience = (self.employees.iloc[rows]['years_experience'].astype(float).to_numpy()
+                      * self.profile_weights['experience_per_year'])
+        experience = np.minimum(experience, self.profile_weights['experience_cap'])
+        return (levels.to_numpy(dtype=float)[None, :] ** (1.0 + experience[:, None])
+                * durations.to_numpy()[None, :] ** self.profile_weights['duration_exponent'])
+    
+    def compute_employee_profiles(self, profile_mode: Optional[str] = None) -> np.ndarray:
+        """
+        Pool cached course embeddings into one profile vector per employee
+        
+        All employees are computed at once as a single matrix product, and
+        results are cached per mode so 'mean' and 'weighted' share the same
+        course vectors.
+        
+        Args:
+            profile_mode: 'mean', 'weighted' or 'recency' (defaults to self.profile_mode)
+            
+        Returns:
+            Unit-normalized profile matrix (rows follow self.employees)
+        """
+        profile_mode = profile_mode or self.profile_mode
+        if profile_mode not in ('mean', 'weighted', 'recency'):
+            raise ValueError(f"Profile pooling is not available for mode: {profile_mode}")
+        if profile_mode == 'recency':
+            self._drop_stale_recency_profiles()
+        if profile_mode not in self._profiles:
+            rows = np.arange(len(self.employees))
+            if profile_mode == 'recency':
+                self._recency_profiles_as_of = self._recency_as_of()
+            self._profiles[profile_mode] = self._pool_profiles(profile_mode, rows)
+        return self._profiles[profile_mode]
+    
+    def _pool_profiles(self, profile_mode: str, rows: np.ndarray) -> np.ndarray:
+        """
+        Pool course embeddings for a subset of employees
+        
+        Args:
+            profile_mode: 'mean', 'weighted' or 'recency'
+            rows: Employee row positions in self.employees
+            
+        Returns:
+            Unit-normalized profiles for those rows
+        """
+        weights = self._get_employee_course_matrix()[rows] * self._course_weights(profile_mode, rows)
+        if profile_mode == 'recency':
+            weights = weights * self._decay_weights(rows)
+        totals = weights.sum(axis=1, keepdims=True)
+        profiles = (weights @ self._get_course_embeddings()) / np.where(totals > 0, totals, 1.0)
+        
+        norms = np.linalg.norm(profiles, axis=1, keepdims=True)
+        return profiles / np.where(norms > 0, norms, 1.0)
+    
+    def compute_role_similarity(self, employee_id: str,
+                                profile_mode: Optional[str] = None) -> pd.DataFrame:
         """
         Compute similarity between employee skills and all job roles
         
         Args:
             employee_id: Employee identifier
+            profile_mode: Overrides self.profile_mode for this call
             
         Returns:
             DataFrame with role recommendations sorted by similarity
         """
-        # Get employee skills
-        employee_skills = self.get_employee_skills(employee_id)
+        profile_mode = profile_mode or self.profile_mode
+        role_embeddings = self._get_role_embeddings()
         
-        # Create embeddings
-        employee_embedding = self.model.encode([employee_skills])
-        role_embeddings = self.model.encode(self.job_roles['required_skills'].tolist())
-        
-        # Compute cosine similarity
-        similarities = cosine_similarity(employee_embedding, role_embeddings)[0]
+        if profile_mode == 'text':
+            # Get employee skills
+            employee_skills = self.get_employee_skills(employee_id)
+            
+            # Create embeddings
+            employee_embedding = self.model.encode([employee_skills])
+            
+            # Compute cosine similarity
+            similarities = cosine_similarity(employee_embedding, role_embeddings)[0]
+        else:
+            profiles = self.compute_employee_profiles(profile_mode)
+            similarities = profiles[self._employee_rows[employee_id]] @ role_embeddings.T
         
         # Create results dataframe
         results = self.job_roles.copy()
@@ -102,6 +421,21 @@ class SkillInferenceEngine:
         
         return results[['role_id', 'role_title', 'required_skills', 'similarity_percentage']]
     
+    def compute_similarity_matrix(self, profile_mode: Optional[str] = None) -> pd.DataFrame:
+        """
+        Score every employee against every role in one matrix product
+        
+        Args:
+            profile_mode: 'mean', 'weighted' or 'recency' (defaults to self.profile_mode)
+            
+        Returns:
+            DataFrame of similarity percentages (employees x roles)
+        """
+        similarities = self.compute_employee_profiles(profile_mode) @ self._get_role_embeddings().T
+        return pd.DataFrame((similarities * 100).round(2),
+                            index=self.employees['employee_id'],
+                            columns=self.job_roles['role_id'])
+    
     def get_top_recommendations(self, employee_id: str, top_n: int = 3) -> pd.DataFrame:
         """
         Get top N role recommendations for an employee
@@ -116,34 +450,108 @@ class SkillInferenceEngine:
         all_recommendations = self.compute_role_similarity(employee_id)
         return all_recommendations.head(top_n)
     
-    def identify_skill_gaps(self, employee_id: str, target_role_id: str) -> Dict:
+    def _skill_similarity_block(self, row_skills: List[str], col_skills: List[str]) -> np.ndarray:
+        """Slice the cached skill-similarity matrix for two skill lists"""
+        rows = self._skill_ids(row_skills)
+        cols = self._skill_ids(col_skills)
+        return self._skill_similarity[np.ix_(rows, cols)]
+    
+    def _skill_ids(self, skills: List[str]) -> np.ndarray:
+        """
+        Map skills to rows of the cached skill-similarity matrix
+        
+        The vocabulary of all course and role skills is embedded once; skills
+        outside it are embedded on first sight and appended to the cache.
+        
+        Args:
+            skills: Extracted skill phrases
+            
+        Returns:
+            Array of vocabulary indices
+        """
+        if self._skill_embeddings is None:
+            corpus = ', '.join(self.courses['skills_taught'].tolist() +
+                               self.job_roles['required_skills'].tolist())
+            vocabulary = list(dict.fromkeys(self.extract_skills(corpus)))
+            self._skill_index = {skill: i for i, skill in enumerate(vocabulary)}
+            self._skill_embeddings = self.model.encode(vocabulary, normalize_embeddings=True)
+            self._skill_similarity = self._skill_embeddings @ self._skill_embeddings.T
+        
+        unseen = [s for s in dict.fromkeys(skills) if s not in self._skill_index]
+        if unseen:
+            new_embeddings = self.model.encode(unseen, normalize_embeddings=True)
+            cross = self._skill_embeddings @ new_embeddings.T
+            self._skill_similarity = np.block([[self._skill_similarity, cross],
+                                               [cross.T, new_embeddings @ new_embeddings.T]])
+            self._skill_embeddings = np.vstack([self._skill_embeddings, new_embeddings])
+            for skill in unseen:
+                self._skill_index[skill] = len(self._skill_index)
+        
+        return np.array([self._skill_index[s] for s in skills], dtype=int)
+    
+    def identify_skill_gaps(self, employee_id: str, target_role_id: str,
+                            gap_mode: str = 'exact',
+                            threshold: Optional[float] = None) -> Dict:
         """
         Identify skill gaps between employee and target role
         
         Args:
             employee_id: Employee identifier
             target_role_id: Target role identifier
+            gap_mode: 'exact' string matching, or 'semantic' to count a required
+                skill as covered when the employee's closest skill is similar enough
+            threshold: Cosine similarity needed for semantic coverage
+                (defaults to semantic_gap_threshold)
             
         Returns:
             Dictionary with skill gap analysis
         """
         # Get employee skills
-        employee_skills_text = self.get_employee_skills(employee_id)
-        employee_skills = set(self.extract_skills(employee_skills_text))
+        if self.profile_mode == 'recency':
+            # Skills only taught by stale courses no longer count
+            skill_weights = self.get_employee_skill_weights(employee_id)
+            employee_skills = [skill for skill, weight in skill_weights.items()
+                               if weight >= self.recency['stale_weight']]
+        else:
+            employee_skills_text = self.get_employee_skills(employee_id)
+            employee_skills = list(dict.fromkeys(self.extract_skills(employee_skills_text)))
         
         # Get target role skills
         target_role = self.job_roles[self.job_roles['role_id'] == target_role_id].iloc[0]
-        required_skills = set(self.extract_skills(target_role['required_skills']))
+        required_skills = list(dict.fromkeys(self.extract_skills(target_role['required_skills'])))
         
         # Compute gaps
-        skill_gaps = required_skills - employee_skills
-        matching_skills = employee_skills & required_skills
+        skill_matches = {}
+        if gap_mode == 'exact':
+            skill_gaps = set(required_skills) - set(employee_skills)
+            matching_skills = set(employee_skills) & set(required_skills)
+        elif gap_mode == 'semantic':
+            threshold = self.semantic_gap_threshold if threshold is None else threshold
+            matching_skills, skill_gaps = [], []
+            if not employee_skills:
+                # Nothing to match against, whatever the threshold
+                skill_gaps = list(required_skills)
+            else:
+                scores = self._skill_similarity_block(required_skills, employee_skills)
+                best = scores.argmax(axis=1)
+                best_scores = scores[np.arange(len(required_skills)), best]
+                for skill, match, score in zip(required_skills, best, best_scores):
+                    if score >= threshold:
+                        matching_skills.append(skill)
+                        skill_matches[skill] = {
+                            'matched_skill': employee_skills[match],
+                            'score': round(float(score), 4)
+                        }
+                    else:
+                        skill_gaps.append(skill)
+        else:
+            raise ValueError(f"Unknown gap_mode: {gap_mode}")
         
         # Get similarity score
         similarities = self.compute_role_similarity(employee_id)
         similarity_score = similarities[similarities['role_id'] == target_role_id]['similarity_percentage'].values[0]
         
-        return {
+        result = {
             'employee_id': employee_id,
             'target_role': target_role['role_title'],
             'target_role_id': target_role_id,
@@ -152,8 +560,13 @@ class SkillInferenceEngine:
             'skill_gaps': list(skill_gaps),
             'gap_count': len(skill_gaps)
         }
+        if gap_mode == 'semantic':
+            result['gap_mode'] = gap_mode
+            result['skill_matches'] = skill_matches
+        return result
     
-    def generate_recommendations_report(self, output_path: str = 'results/recommendations_report.json'):
+    def generate_recommendations_report(self, output_path: str = 'results/recommendations_report.json',
+                                        gap_mode: str = 'exact'):
         """Generate comprehensive recommendations report for all employees"""
         report = {}
         
@@ -167,7 +580,7 @@ class SkillInferenceEngine:
             
             # Get skill gaps for top recommendation
             top_role_id = top_recs.iloc[0]['role_id']
-            skill_gaps = self.identify_skill_gaps(emp_id, top_role_id)
+            skill_gaps = self.identify_skill_gaps(emp_id, top_role_id, gap_mode=gap_mode)
             
             report[emp_id] = {
                 'name': emp_name,
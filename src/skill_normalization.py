@@ -0,0 +1,83 @@
+"""
+SkillChain DX - Skill Normalization Module
+Lemmatizes and canonicalizes skill phrases with a batched spaCy pipeline
+"""
+
+from typing import Dict, Iterable, List
+
+try:
+    import spacy
+except ImportError:  # spaCy is optional; only needed when normalization is enabled
+    spacy = None
+
+
+class SkillNormalizer:
+    """Map free-text skill phrases to canonical skill ids"""
+
+    # Components needed for lemmas; everything else is disabled for speed
+    REQUIRED_COMPONENTS = ('tok2vec', 'tagger', 'attribute_ruler', 'lemmatizer')
+
+    def __init__(self, model_name: str = 'en_core_web_sm', batch_size: int = 256,
+                 n_process: int = 1):
+        """
+        Initialize the skill normalizer
+
+        Args:
+            model_name: spaCy pipeline to load
+            batch_size: Number of phrases per nlp.pipe batch
+            n_process: Worker processes used by nlp.pipe (1 = in-process);
+                calls with fewer uncached phrases than batch_size always run
+                in-process, as starting a pool would cost more than it saves
+        """
+        if spacy is None:
+            raise ImportError("Skill normalization requires spaCy: pip install spacy")
+
+        print(f"Loading spaCy pipeline: {model_name}")
+        self.nlp = spacy.load(model_name)
+        unneeded = [name for name in self.nlp.pipe_names
+                    if name not in self.REQUIRED_COMPONENTS]
+        self.nlp.select_pipes(disable=unneeded)
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self._cache: Dict[str, str] = {}
+
+    def _canonicalize(self, doc) -> str:
+        """
+        Build a canonical skill id from a parsed phrase
+
+        Only common nouns are lemmatized ("neural networks" -> "neural network"),
+        so tool names such as "pandas" or "Kubernetes" keep their spelling.
+        """
+        tokens = [token.lemma_.lower() if token.pos_ == 'NOUN' else token.lower_
+                  for token in doc if not (token.is_space or token.is_punct)]
+        return ' '.join(tokens) or doc.text.strip().lower()
+
+    def normalize(self, phrases: Iterable[str]) -> List[str]:
+        """
+        Normalize skill phrases, parsing each unique phrase only once
+
+        Args:
+            phrases: Skill phrases to normalize
+
+        Returns:
+            Canonical skill ids, in input order
+        """
+        phrases = [p.strip().lower() for p in phrases]
+        pending = list(dict.fromkeys(p for p in phrases if p not in self._cache))
+
+        if pending:
+            n_process = self.n_process if len(pending) >= self.batch_size else 1
+            docs = self.nlp.pipe(pending, batch_size=self.batch_size, n_process=n_process)
+            for phrase, doc in zip(pending, docs):
+                self._cache[phrase] = self._canonicalize(doc)
+
+        return [self._cache[p] for p in phrases]
+
+    def normalize_one(self, phrase: str) -> str:
+        """Normalize a single skill phrase"""
+        return self.normalize([phrase])[0]
+
+    @property
+    def vocabulary_size(self) -> int:
+        """Number of distinct canonical skill ids seen so far"""
+        return len(set(self._cache.values()))
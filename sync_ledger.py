@@ -0,0 +1,93 @@
+"""
+SkillChain DX - Ledger Replica Sync
+Brings a replica of the credential ledger up to date with the primary
+
+Usage:
+    python sync_ledger.py data/credential_ledger.json replicas/site_a.json
+    python sync_ledger.py replicas/site_a.json \
+        --remote "ssh primary python sync_ledger.py --serve data/credential_ledger.json"
+    python sync_ledger.py --serve data/credential_ledger.json
+"""
+
+import argparse
+import shlex
+import subprocess
+import sys
+import time
+
+from src.blockchain_verification import CredentialLedger
+from src.ledger_sync import StreamTransport, SyncServer, sync_ledger
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description='Synchronize a credential ledger replica by comparing range digests')
+    parser.add_argument('ledgers', nargs='+',
+                        help='PRIMARY REPLICA; just REPLICA with --remote, PRIMARY with --serve')
+    parser.add_argument('--remote',
+                        help='Command that runs `sync_ledger.py --serve` against the primary')
+    parser.add_argument('--serve', action='store_true',
+                        help='Answer sync requests for the ledger on stdin/stdout')
+    parser.add_argument('--primary-format', default='json',
+                        choices=CredentialLedger.STORAGE_FORMATS,
+                        help='Primary ledger storage format (default: json)')
+    parser.add_argument('--replica-format', default='json',
+                        choices=CredentialLedger.STORAGE_FORMATS,
+                        help='Replica ledger storage format (default: json)')
+    parser.add_argument('--range-size', type=int, default=4096,
+                        help='Records per top-level digest range (default: 4096)')
+    parser.add_argument('--batch-size', type=int, default=1000,
+                        help='Records per transfer request (default: 1000)')
+    args = parser.parse_args()
+    expected = 1 if args.serve or args.remote else 2
+    if len(args.ledgers) != expected:
+        parser.error(f"expected {expected} ledger path(s)")
+    return args
+
+
+def main():
+    """Serve a primary, or sync a replica from a local or remote primary"""
+    args = parse_args()
+
+    if args.serve:
+        ledger = CredentialLedger(args.ledgers[0], storage_format=args.primary_format)
+        try:
+            SyncServer(ledger, args.range_size).serve(sys.stdin, sys.stdout)
+        finally:
+            ledger.close()
+        return
+
+    start_time = time.time()
+    replica = CredentialLedger(args.ledgers[-1], storage_format=args.replica_format)
+    primary = remote = None
+    try:
+        if args.remote:
+            remote = subprocess.Popen(shlex.split(args.remote), stdin=subprocess.PIPE,
+                                      stdout=subprocess.PIPE, text=True)
+            source = StreamTransport(remote.stdout, remote.stdin)
+        else:
+            primary = CredentialLedger(args.ledgers[0], storage_format=args.primary_format)
+            source = primary
+        stats = sync_ledger(replica, source, range_size=args.range_size,
+                            batch_size=args.batch_size)
+    finally:
+        if remote is not None:
+            remote.stdin.close()
+            remote.wait()
+        if primary is not None:
+            primary.close()
+        replica.close()
+
+    elapsed = time.time() - start_time
+    print(f"✓ Synced replica in {elapsed:.2f} seconds: {stats['appended']} appended, "
+          f"{stats['revoked']} revoked, {stats['records_transferred']} records transferred "
+          f"in {stats['requests']} requests")
+    if stats['conflicts']:
+        print(f"✗ {len(stats['conflicts'])} records differ from the primary "
+              f"(first at position {stats['conflicts'][0]})", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""Tests for the asyncio ledger facade (src/async_ledger.py)"""
+
+import asyncio
+
+from src.async_ledger import AsyncCredentialLedger
+
+
+def test_facade_does_not_print(tmp_path, capsys):
+    async def run():
+        async with AsyncCredentialLedger(str(tmp_path / 'ledger.json')) as ledger:
+            records = await asyncio.gather(*(
+                ledger.issue(f'EMP{i:03d}', 'TC001', 'Python', '2024-03-15') for i in range(20)))
+            await ledger.issue_bulk([('EMP100', 'TC002', 'SQL', '2024-04-01')])
+            await ledger.revoke(records[0]['credential_id'], 'Issued in error')
+            await ledger.revoke_issuer('SkillChain DX Platform', 'Issuer compromised')
+            await ledger.generate_verification_report(str(tmp_path / 'report.json'))
+            return await ledger.count()
+
+    assert asyncio.run(run()) == 21
+    assert capsys.readouterr().out == ''
+
+
+def test_mixed_idempotent_issues_keep_submission_order(tmp_path):
+    async def run():
+        async with AsyncCredentialLedger(str(tmp_path / 'ledger.json')) as ledger:
+            return await asyncio.gather(*(
+                ledger.issue(f'EMP{i:03d}', 'TC001', 'Python', '2024-03-15', idempotent=i % 3 != 0)
+                for i in range(12)))
+
+    records = asyncio.run(run())
+    assert [record['data']['employee_id'] for record in records] == [
+        f'EMP{i:03d}' for i in range(12)]
+    assert [record['credential_id'] for record in records] == [
+        f'CRED_{i + 1:04d}' for i in range(12)]
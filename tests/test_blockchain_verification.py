@@ -0,0 +1,198 @@
+"""Tests for the credential ledger (src/blockchain_verification.py)"""
+
+import json
+import os
+import shutil
+
+import pytest
+
+from src.blockchain_verification import (CredentialLedger, _merkle_leaf, compute_credential_hash,
+                                         verify_inclusion_proof)
+
+CLAIM = ('EMP001', 'TC001', 'Python for Data Analysis', '2024-03-15')
+
+
+def test_revoked_credential_reported_after_bloom_rebuild(tmp_path):
+    path = str(tmp_path / 'ledger.json')
+    ledger = CredentialLedger(path, bloom_false_positive_rate=0.01)
+    record = ledger.issue_credential(*CLAIM)
+    ledger.revoke_credential(record['credential_id'], 'Issued in error')
+    ledger.close()
+
+    # Reopening without the sidecar rebuilds the filter from the records
+    os.remove(f"{path}.bloom")
+    ledger = CredentialLedger(path, bloom_false_positive_rate=0.01)
+    result = ledger.verify_credential(*CLAIM)
+    ledger.close()
+
+    assert result['verified'] is False
+    assert result['revoked'] is True
+    assert result['credential_id'] == record['credential_id']
+
+
+def test_json_revocation_logged_without_rewriting_document(tmp_path):
+    path = str(tmp_path / 'ledger.json')
+    ledger = CredentialLedger(path)
+    record = ledger.issue_credential(*CLAIM)
+    document = open(path).read()
+    ledger.revoke_credential(record['credential_id'], 'Issued in error')
+    assert open(path).read() == document
+    ledger.close()
+
+    reopened = CredentialLedger(path)
+    assert reopened.verify_credential(*CLAIM)['revoked'] is True
+    assert reopened.backend.count(status='revoked') == 1
+    reopened.close()
+
+
+def test_inclusion_proof_with_tampered_root_rejected(tmp_path):
+    ledger = CredentialLedger(str(tmp_path / 'ledger.json'), merkle_batch_size=4)
+    records = ledger.issue_credentials_bulk([(f'EMP{i:03d}', 'TC001', 'Python', '2024-03-15')
+                                             for i in range(4)])
+    proof = ledger.get_inclusion_proof(records[1]['credential_id'])
+    trusted_root = ledger.get_batch_root(proof['batch'])
+    ledger.close()
+    assert verify_inclusion_proof(proof['hash'], proof, trusted_root)
+
+    # A forged proof whose root is just its own leaf hashes up to that root
+    forged_hash = compute_credential_hash({'employee_id': 'EMP999'})
+    forged = dict(proof, hash=forged_hash, path=[], root=_merkle_leaf(forged_hash).hex())
+    assert not verify_inclusion_proof(forged_hash, forged, trusted_root)
+    assert not verify_inclusion_proof(forged_hash, forged, None)
+
+
+def _tamper_json_record(path, position):
+    with open(path) as f:
+        document = json.load(f)
+    document['credentials'][position]['data']['course_name'] = 'Forged Course'
+    with open(path, 'w') as f:
+        json.dump(document, f)
+
+
+def test_validate_chain_after_reopen_starts_from_genesis(tmp_path):
+    path = str(tmp_path / 'ledger.json')
+    ledger = CredentialLedger(path, checkpoint_every=100)
+    ledger.issue_credentials_bulk([(f'EMP{i:03d}', 'TC001', 'Python', '2024-03-15')
+                                   for i in range(250)])
+    ledger.close()
+    _tamper_json_record(path, 10)
+
+    # Stored checkpoints live in the file being checked, so they are not trusted
+    reopened = CredentialLedger(path, checkpoint_every=100)
+    result = reopened.validate_chain()
+    reopened.close()
+    assert result['valid'] is False
+    assert result['from_record'] == 0
+    assert result['failed_position'] == 10
+
+
+def test_validate_chain_resumes_from_saved_head(tmp_path):
+    path = str(tmp_path / 'ledger.json')
+    ledger = CredentialLedger(path, checkpoint_every=100)
+    ledger.issue_credentials_bulk([(f'EMP{i:03d}', 'TC001', 'Python', '2024-03-15')
+                                   for i in range(150)])
+    assert ledger.validate_chain()['checked_records'] == 150
+    ledger.issue_credentials_bulk([(f'EMP{i:03d}', 'TC002', 'SQL', '2024-04-01')
+                                   for i in range(100)])
+    ledger.close()
+    _tamper_json_record(path, 160)
+
+    reopened = CredentialLedger(path, checkpoint_every=100)
+    result = reopened.validate_chain()
+    assert result['valid'] is False
+    assert result['from_record'] == 150
+    assert result['failed_position'] == 160
+    reopened.close()
+
+
+def test_bloom_rebuilt_for_replaced_ledger_file(tmp_path):
+    path = str(tmp_path / 'ledger.json')
+    ledger = CredentialLedger(path, bloom_false_positive_rate=0.01)
+    ledger.issue_credential('EMP002', 'TC002', 'SQL Fundamentals', '2024-04-01')
+    ledger.close()
+
+    # Another ledger's file restored over this one, keeping the stale .bloom
+    other_path = str(tmp_path / 'other.json')
+    other = CredentialLedger(other_path)
+    other.issue_credential(*CLAIM)
+    other.close()
+    shutil.copyfile(other_path, path)
+
+    reopened = CredentialLedger(path, bloom_false_positive_rate=0.01)
+    assert reopened.verify_credential(*CLAIM)['verified'] is True
+    reopened.close()
+
+
+def _copy_from(source):
+    def tamper(records):
+        records[3]['data'] = dict(records[source]['data'])
+        records[3]['hash'] = records[source]['hash']
+    return tamper
+
+
+AUDIT_TAMPERING = {
+    'malformed_record': lambda records: records[3]['data'].pop('issuer'),
+    'hash_mismatch': lambda records: records[3]['data'].update(course_name='Forged Course'),
+    'invalid_status': lambda records: records[3].update(status='lost'),
+    'invalid_timestamp': lambda records: records[3].update(timestamp='yesterday'),
+    'timestamp_out_of_order': lambda records: records[3].update(timestamp='2000-01-01T00:00:00'),
+    'duplicate_credential_id': lambda records: records[3].update(
+        credential_id=records[1]['credential_id']),
+    'duplicate_active_hash': _copy_from(1),
+}
+
+
+@pytest.mark.parametrize('check', sorted(AUDIT_TAMPERING))
+def test_audit_reports_tampered_record(tmp_path, check):
+    path = str(tmp_path / 'ledger.json')
+    ledger = CredentialLedger(path)
+    ledger.issue_credentials_bulk([(f'EMP{i:03d}', 'TC001', 'Python', '2024-03-15')
+                                   for i in range(6)])
+    ledger.close()
+    with open(path) as f:
+        document = json.load(f)
+    AUDIT_TAMPERING[check](document['credentials'])
+    with open(path, 'w') as f:
+        json.dump(document, f)
+
+    reopened = CredentialLedger(path)
+    findings_path = str(tmp_path / 'audit.jsonl')
+    summary = reopened.audit(findings_path, workers=2, chunk_size=2)
+    reopened.close()
+    with open(findings_path) as f:
+        findings = [json.loads(line) for line in f]
+
+    assert summary['by_check'][check] == 1
+    assert [finding['position'] for finding in findings if finding['check'] == check] == [3]
+
+
+def test_audit_of_untouched_ledger_has_no_findings(tmp_path):
+    ledger = CredentialLedger(str(tmp_path / 'ledger.json'))
+    ledger.issue_credentials_bulk([(f'EMP{i:03d}', 'TC001', 'Python', '2024-03-15')
+                                   for i in range(6)])
+    summary = ledger.audit(str(tmp_path / 'audit.jsonl'), workers=2, chunk_size=2)
+    ledger.close()
+    assert summary['findings'] == 0
+
+
+@pytest.mark.parametrize('storage_format', ['json', 'sqlite'])
+def test_refresh_notifies_changes_from_another_process(tmp_path, storage_format):
+    path = str(tmp_path / f'ledger.{storage_format}')
+    ledger = CredentialLedger(path, storage_format=storage_format)
+    other = CredentialLedger(path, storage_format=storage_format)
+    events = []
+    ledger.add_listener(lambda event, record: events.append((event, record['credential_id'])))
+
+    record = other.issue_credential(*CLAIM, verbose=False)
+    other.revoke_credential(record['credential_id'], 'Issued in error', verbose=False)
+    assert events == []
+    ledger.refresh()
+    assert events == [('issued', record['credential_id']), ('revoked', record['credential_id'])]
+
+    # Each change is published once, and a local issuance publishes earlier outside ones first
+    ledger.refresh()
+    second = other.issue_credential('EMP002', *CLAIM[1:], verbose=False)
+    third = ledger.issue_credential('EMP003', *CLAIM[1:], verbose=False)
+    assert events[2:] == [('issued', second['credential_id']), ('issued', third['credential_id'])]
+    ledger.close()
+    other.close()
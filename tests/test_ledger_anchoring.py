@@ -0,0 +1,47 @@
+"""Tests for anchoring ledger batch roots to an EVM chain (src/ledger_anchoring.py)"""
+
+import pytest
+
+pytest.importorskip('web3')
+pytest.importorskip('eth_tester')
+
+from src.blockchain_verification import CredentialLedger, verify_inclusion_proof  # noqa: E402
+from src.ledger_anchoring import LedgerAnchor  # noqa: E402
+
+
+@pytest.fixture
+def anchored(tmp_path):
+    ledger = CredentialLedger(str(tmp_path / 'ledger.json'), merkle_batch_size=4)
+    records = ledger.issue_credentials_bulk([(f'EMP{i:03d}', 'TC001', 'Python', '2024-03-15')
+                                             for i in range(6)])
+    anchor = LedgerAnchor.local_chain(ledger)
+    yield ledger, anchor, records
+    ledger.close()
+
+
+def test_anchored_root_matches_inclusion_proof(anchored):
+    ledger, anchor, records = anchored
+    new = anchor.anchor_pending()
+    assert [entry['batch'] for entry in new] == [0]  # batch 1 is not sealed yet
+    assert anchor.anchor_pending() == []
+
+    on_chain = anchor.read_anchor(new[0]['tx_hash'])
+    proof = ledger.get_inclusion_proof(records[2]['credential_id'])
+    assert on_chain['root'] == proof['root'] == ledger.get_batch_root(0)
+    assert verify_inclusion_proof(proof['hash'], proof, on_chain['root'])
+
+    assert anchor.verify_credential(records[2]['credential_id'])['verified'] is True
+    assert anchor.verify_credential(records[5]['credential_id'])['verified'] is False
+
+
+def test_anchor_sent_by_another_account_rejected(anchored):
+    ledger, anchor, _ = anchored
+    root = bytes.fromhex(ledger.get_batch_root(0))
+    payload = LedgerAnchor.PAYLOAD.pack(LedgerAnchor.MAGIC, 0, 4, root)
+    eth = anchor.web3.eth
+    tx_hash = eth.send_transaction({'from': eth.accounts[1], 'to': anchor.anchor_address,
+                                    'value': 0, 'data': '0x' + payload.hex()})
+    eth.wait_for_transaction_receipt(tx_hash)
+
+    with pytest.raises(ValueError, match='not sent by the anchoring account'):
+        anchor.read_anchor(tx_hash.hex())
@@ -0,0 +1,228 @@
+"""Tests for the ledger storage backends (src/ledger_backends.py)"""
+
+import multiprocessing
+import os
+import pickle
+import sqlite3
+
+import pytest
+
+from src.blockchain_verification import CredentialLedger
+from src.ledger_backends import (BinaryLedgerFile, LedgerLog, SegmentedLedgerBackend,
+                                 SqliteLedgerBackend)
+
+
+def _write_log(path, count):
+    log = LedgerLog(str(path))
+    log.append([{'op': 'issue', 'index': i} for i in range(count)])
+    return log
+
+
+def test_log_replay_truncates_torn_final_line(tmp_path):
+    path = tmp_path / 'ledger.log'
+    log = _write_log(path, 3)
+    with open(path, 'ab') as f:
+        f.write(b'{"lsn": 4, "op"')
+
+    entries = []
+    LedgerLog(str(path)).replay(entries.append)
+    assert [entry['index'] for entry in entries] == [0, 1, 2]
+    assert os.path.getsize(path) == log.offset
+
+
+def test_log_replay_rejects_corruption_before_the_end(tmp_path):
+    path = tmp_path / 'ledger.log'
+    _write_log(path, 3)
+    lines = path.read_bytes().split(b'\n')
+    lines[1] = b'{"lsn": 2, "op'
+    path.write_bytes(b'\n'.join(lines))
+    size = os.path.getsize(path)
+
+    with pytest.raises(ValueError, match='Corrupt ledger log entry'):
+        LedgerLog(str(path)).replay(lambda entry: None)
+    assert os.path.getsize(path) == size
+
+
+def _issue_from_process(path, storage_format, worker, count, barrier):
+    ledger = CredentialLedger(path, storage_format)
+    barrier.wait()
+    for i in range(count):
+        ledger.issue_credential(f'EMP{worker:02d}{i:03d}', 'TC001', 'Python', '2024-03-15')
+    ledger.close()
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(),
+                    reason='needs the fork start method')
+@pytest.mark.parametrize('storage_format', CredentialLedger.STORAGE_FORMATS)
+def test_concurrent_issuance_across_processes(tmp_path, storage_format):
+    path = str(tmp_path / f'ledger.{storage_format}')
+    CredentialLedger(path, storage_format).close()
+    context = multiprocessing.get_context('fork')
+    workers, count = 4, 15
+    barrier = context.Barrier(workers)
+    processes = [context.Process(target=_issue_from_process,
+                                 args=(path, storage_format, worker, count, barrier))
+                 for worker in range(workers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+    assert [process.exitcode for process in processes] == [0] * workers
+
+    ledger = CredentialLedger(path, storage_format)
+    records = list(ledger.backend.iter_records())
+    assert len(ledger) == workers * count
+    assert [record['credential_id'] for record in records] == [
+        CredentialLedger._credential_id(position) for position in range(workers * count)]
+    assert len({record['data']['employee_id'] for record in records}) == workers * count
+    assert ledger.validate_chain(0)['valid'] is True
+    ledger.close()
+
+
+def _binary_ledger(path, count=40):
+    ledger = CredentialLedger(path, 'binary')
+    records = ledger.issue_credentials_bulk([
+        (f'EMP{i % 7:03d}', f'TC{i:03d}', 'Python', '2024-03-15' if i % 5 else 'Spring 2024')
+        for i in range(count)])
+    ledger.revoke_credential(records[7]['credential_id'], 'Issued in error')
+    ledger.compact()
+    ledger.close()
+    return records
+
+
+def test_binary_ledger_round_trip(tmp_path):
+    path = str(tmp_path / 'ledger.bin')
+    issued = _binary_ledger(path)
+
+    snapshot = BinaryLedgerFile(path)
+    assert snapshot.count == len(issued)
+    # Ids are found through the sorted id-key column
+    assert [snapshot.position_of(record['credential_id']) for record in issued] == list(
+        range(len(issued)))
+    assert snapshot.position_of('CRED_9999') is None
+    assert snapshot.status(7) == 'revoked'
+    snapshot.close()
+
+    ledger = CredentialLedger(path, 'binary')
+    stored = list(ledger.backend.iter_records())
+    expected = [dict(record, status='revoked' if position == 7 else 'active')
+                for position, record in enumerate(issued)]
+    assert stored == expected
+    assert ledger.verify_credential('EMP000', 'TC007', 'Python', '2024-03-15')['revoked'] is True
+    assert len(ledger.get_employee_credentials('EMP003')) == 6
+    assert ledger.backend.count(status='revoked') == 1
+    assert ledger.validate_chain(0)['valid'] is True
+    ledger.close()
+
+
+@pytest.mark.parametrize('damage', ['truncate_header', 'truncate_trailer', 'bad_magic'])
+def test_binary_ledger_rejects_damaged_file(tmp_path, damage):
+    path = str(tmp_path / 'ledger.bin')
+    _binary_ledger(path)
+    data = open(path, 'rb').read()
+    if damage == 'truncate_header':
+        data = data[:20]
+    elif damage == 'truncate_trailer':
+        data = data[:-10]
+    else:
+        data = b'SKCLBIN9' + data[8:]
+    open(path, 'wb').write(data)
+
+    with pytest.raises(ValueError, match='binary ledger file'):
+        BinaryLedgerFile(path)
+
+
+def test_sqlite_counts_by_status_through_an_index(tmp_path):
+    path = str(tmp_path / 'ledger.sqlite')
+    ledger = CredentialLedger(path, 'sqlite')
+    records = ledger.issue_credentials_bulk(
+        [(f'EMP{i:03d}', 'TC001', 'Python', '2024-03-15') for i in range(20)])
+    ledger.revoke_credential(records[3]['credential_id'], 'Issued in error')
+    ledger.close()
+
+    # Databases created before the status index get it when opened
+    with sqlite3.connect(path) as conn:
+        conn.execute('DROP INDEX idx_credentials_status')
+    backend = SqliteLedgerBackend(path)
+    plan = backend.conn.execute('EXPLAIN QUERY PLAN SELECT COUNT(*) FROM credentials '
+                                'WHERE status = ?', ('revoked',)).fetchall()
+    assert 'idx_credentials_status' in ' '.join(row[-1] for row in plan)
+    assert (backend.count(), backend.count(status='active'),
+            backend.count(status='revoked')) == (20, 19, 1)
+    backend.close()
+
+
+def test_sqlite_backend_pickles_as_its_path_and_mode(tmp_path):
+    path = str(tmp_path / 'ledger.sqlite')
+    with pytest.raises(ValueError, match='synchronous mode'):
+        SqliteLedgerBackend(path, synchronous='OFF')
+
+    ledger = CredentialLedger(path, 'sqlite')
+    ledger.issue_credential('EMP001', 'TC001', 'Python', '2024-03-15', verbose=False)
+    ledger.close()
+
+    backend = SqliteLedgerBackend(path, synchronous='NORMAL')
+    copy = pickle.loads(pickle.dumps(backend))
+    assert (copy.db_path, copy.synchronous) == (path, 'NORMAL')
+    assert copy.conn.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+    assert copy.get(0)['data']['employee_id'] == 'EMP001'
+    copy.close()
+    backend.close()
+
+
+def _issue_batches(ledger, batches, size=10):
+    return [record for batch in range(batches) for record in ledger.issue_credentials_bulk(
+        [(f'EMP{batch:02d}{i:02d}', 'TC001', 'Python', '2024-03-15') for i in range(size)])]
+
+
+def test_segmented_ledger_seals_and_reopens_from_manifest(tmp_path):
+    path = str(tmp_path / 'ledger.segments.json')
+    backend = SegmentedLedgerBackend(path, segment_bytes=4096, merge_below=0)
+    ledger = CredentialLedger(path, backend=backend)
+    issued = _issue_batches(ledger, 6)
+    ledger.revoke_credential(issued[3]['credential_id'], 'Issued in error')
+    sealed = backend.sealed_segments()
+    ledger.close()
+
+    # Each seal lists one more immutable segment; the log only holds the active one
+    assert len(sealed) >= 2
+    assert [segment['start'] for segment in sealed] == sorted(
+        segment['start'] for segment in sealed)
+    assert os.path.getsize(f"{path}.log") < 4096
+
+    reopened = CredentialLedger(path, 'segmented', segment_bytes=4096)
+    assert reopened.backend.sealed_segments() == sealed
+    assert reopened.backend.verify_segments() == []
+    assert len(reopened) == len(issued)
+    assert [reopened.backend.position_of(r['credential_id']) for r in issued] == list(
+        range(len(issued)))
+    assert reopened.backend.is_revoked(3)
+    assert reopened.validate_chain(0)['valid'] is True
+    reopened.close()
+
+
+def test_segmented_ledger_seals_by_age(tmp_path):
+    path = str(tmp_path / 'ledger.segments.json')
+    backend = SegmentedLedgerBackend(path, segment_seconds=0, merge_below=0)
+    ledger = CredentialLedger(path, backend=backend)
+    _issue_batches(ledger, 3)
+    assert [segment['count'] for segment in backend.sealed_segments()] == [10, 10, 10]
+    ledger.close()
+
+
+def test_segmented_ledger_merges_small_segments_in_background(tmp_path):
+    path = str(tmp_path / 'ledger.segments.json')
+    backend = SegmentedLedgerBackend(path, segment_seconds=0, background_merge=True)
+    ledger = CredentialLedger(path, backend=backend)
+    issued = _issue_batches(ledger, 5)
+    ledger.close()  # waits for the merge thread
+
+    reopened = SegmentedLedgerBackend(path)
+    segments = reopened.sealed_segments()
+    assert len(segments) < 5
+    assert sum(segment['count'] for segment in segments) == len(issued)
+    assert sorted(os.listdir(f"{path}.segments")) == sorted(s['file'] for s in segments)
+    assert reopened.verify_segments() == []
+    assert [record['credential_id'] for record in reopened.iter_records()] == [
+        record['credential_id'] for record in issued]
+    reopened.close()
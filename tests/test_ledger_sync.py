@@ -0,0 +1,95 @@
+"""Tests for replica sync by range digests (src/ledger_sync.py)"""
+
+import os
+
+import pytest
+
+from src import ledger_sync
+from src.blockchain_verification import CredentialLedger
+from src.ledger_sync import sync_ledger
+
+
+def _issue(ledger, prefix, count):
+    return ledger.issue_credentials_bulk([(f'{prefix}{i:03d}', 'TC001', 'Python', '2024-03-15')
+                                          for i in range(count)])
+
+
+def _assert_converged(primary, replica):
+    assert list(replica.backend.iter_records()) == list(primary.backend.iter_records())
+    assert ({event['position'] for event in replica.backend.revocations}
+            == {event['position'] for event in primary.backend.revocations})
+    assert replica.validate_chain(0)['valid'] is True
+
+
+@pytest.mark.parametrize('storage_format', ['json', 'sqlite', 'binary'])
+def test_sync_converges_after_changes_on_both_sides(tmp_path, storage_format):
+    primary = CredentialLedger(str(tmp_path / 'primary.json'), checkpoint_every=25)
+    replica = CredentialLedger(str(tmp_path / f'replica.{storage_format}'), storage_format,
+                               checkpoint_every=25)
+    issued = _issue(primary, 'EMP', 100)
+    assert sync_ledger(replica, primary, range_size=16, leaf_size=4)['appended'] == 100
+
+    # Primary: new issuances, revocations in the synced range and among the new records
+    issued += _issue(primary, 'NEW', 30)
+    for position in (5, 40, 110):
+        primary.revoke_credential(issued[position]['credential_id'], 'Issued in error')
+    # Replica: the same revocation of record 40 already arrived by another route
+    replica.revoke_credential(issued[40]['credential_id'], 'Issued in error')
+
+    stats = sync_ledger(replica, primary, range_size=16, leaf_size=4)
+    assert stats['appended'] == 30
+    assert stats['revoked'] == 2
+    assert stats['conflicts'] == []
+    _assert_converged(primary, replica)
+
+    # Nothing left to do: no records move
+    again = sync_ledger(replica, primary, range_size=16, leaf_size=4)
+    assert (again['appended'], again['revoked'], again['records_transferred']) == (0, 0, 0)
+    primary.close()
+    replica.close()
+
+
+def test_sync_reports_replica_only_changes_as_conflicts(tmp_path):
+    primary = CredentialLedger(str(tmp_path / 'primary.json'))
+    replica = CredentialLedger(str(tmp_path / 'replica.json'))
+    issued = _issue(primary, 'EMP', 40)
+    sync_ledger(replica, primary, range_size=16, leaf_size=4)
+
+    # A revocation only the replica holds is left alone and reported
+    replica.revoke_credential(issued[7]['credential_id'], 'Revoked on the replica')
+    assert sync_ledger(replica, primary, range_size=16, leaf_size=4)['conflicts'] == [7]
+
+    # Issuing on the replica puts it ahead of the primary
+    _issue(replica, 'LOCAL', 5)
+    with pytest.raises(ValueError, match='diverged'):
+        sync_ledger(replica, primary, range_size=16, leaf_size=4)
+    primary.close()
+    replica.close()
+
+
+def test_sync_reuses_persisted_digests_after_restart(tmp_path, monkeypatch):
+    primary_path = str(tmp_path / 'primary.json')
+    replica_path = str(tmp_path / 'replica.json')
+    primary = CredentialLedger(primary_path)
+    replica = CredentialLedger(replica_path)
+    _issue(primary, 'EMP', 100)
+    sync_ledger(replica, primary, range_size=16)
+    sync_ledger(replica, primary, range_size=16)  # digests both sides now hold
+    primary.close()
+    replica.close()
+    assert os.path.exists(f"{primary_path}.digests")
+    assert os.path.exists(f"{replica_path}.digests")
+
+    hashed = []
+    record_digest = ledger_sync.record_digest
+    monkeypatch.setattr(ledger_sync, 'record_digest',
+                        lambda record: hashed.append(record) or record_digest(record))
+
+    # Fresh ledger objects load the saved digests; only the partial last range is hashed
+    primary = CredentialLedger(primary_path)
+    replica = CredentialLedger(replica_path)
+    stats = sync_ledger(replica, primary, range_size=16)
+    assert stats['records_transferred'] == 0
+    assert len(hashed) == 2 * (100 % 16)
+    primary.close()
+    replica.close()
@@ -0,0 +1,112 @@
+"""Tests for the skill inference engine (src/skill_inference.py)"""
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('sentence_transformers')
+
+from src.skill_inference import SkillInferenceEngine
+
+DATA = Path(__file__).resolve().parent.parent / 'data'
+
+
+@pytest.fixture(scope='module')
+def engine(tmp_path_factory):
+    # An extra employee whose only course is not in the catalog has no skills
+    employees = pd.read_csv(DATA / 'employees.csv')
+    employees.loc[len(employees)] = ['EMP900', 'New Hire', 'Intern', 'TC999', 0]
+    employees_path = tmp_path_factory.mktemp('data') / 'employees.csv'
+    employees.to_csv(employees_path, index=False)
+
+    engine = SkillInferenceEngine()
+    engine.load_data(str(DATA / 'job_roles.csv'), str(DATA / 'training_courses.csv'),
+                     str(employees_path))
+    return engine
+
+
+@pytest.mark.parametrize('threshold', [0.0, -1.0, None])
+def test_semantic_gaps_without_employee_skills(engine, threshold):
+    result = engine.identify_skill_gaps('EMP900', 'JR001', gap_mode='semantic',
+                                        threshold=threshold)
+    required = engine.extract_skills(
+        engine.job_roles.set_index('role_id').loc['JR001', 'required_skills'])
+
+    assert result['matching_skills'] == []
+    assert result['skill_matches'] == {}
+    assert result['skill_gaps'] == list(dict.fromkeys(required))
+
+
+def test_recency_profiles_follow_the_reference_date(engine, monkeypatch):
+    day = [738000]
+    monkeypatch.setattr(engine, '_recency_as_of', lambda: day[0])
+    profiles = engine.compute_employee_profiles('recency')
+    assert engine.compute_employee_profiles('recency') is profiles
+
+    # A new day (as_of unset in a long-running process) recomputes the cache
+    day[0] += 1
+    assert engine.compute_employee_profiles('recency') is not profiles
+
+
+def _with_employees(engine, monkeypatch, employees):
+    """Point the engine at an edited employee table, restoring its caches afterwards"""
+    for name, value in (('employees', employees), ('_employee_course_matrix', None),
+                        ('_completion_days', None), ('_employee_rows', {}), ('_profiles', {})):
+        monkeypatch.setattr(engine, name, value)
+
+
+def test_weighted_ranking_does_not_favour_the_current_role(engine, monkeypatch):
+    employees = engine.employees.copy()
+    rankings = []
+    for role_title in engine.job_roles['role_title'][:2]:
+        employees.loc[0, 'current_role'] = role_title
+        _with_employees(engine, monkeypatch, employees.copy())
+        ranking = engine.compute_role_similarity(employees.loc[0, 'employee_id'], 'weighted')
+        rankings.append(ranking['role_id'].tolist())
+    assert rankings[0] == rankings[1]
+
+
+def test_experience_shifts_weight_to_advanced_courses(engine, monkeypatch):
+    courses = engine.courses.set_index('course_id')
+    assert (courses.loc['TC005', 'level'], courses.loc['TC006', 'level']) == ('Beginner', 'Advanced')
+    course_embeddings = engine._get_course_embeddings()
+    beginner = course_embeddings[courses.index.get_loc('TC005')]
+    advanced = course_embeddings[courses.index.get_loc('TC006')]
+
+    employees = engine.employees.copy()
+    employees.loc[0, 'completed_courses'] = 'TC005, TC006'
+    similarities = []
+    for years in (0, 10):
+        employees.loc[0, 'years_experience'] = years
+        _with_employees(engine, monkeypatch, employees.copy())
+        profile = engine.compute_employee_profiles('weighted')[0]
+        similarities.append((profile @ beginner, profile @ advanced))
+
+    (beginner_new, advanced_new), (beginner_senior, advanced_senior) = similarities
+    assert advanced_senior > advanced_new
+    assert beginner_senior < beginner_new
+
+
+def test_ledger_profiles_follow_another_process_after_refresh(engine, monkeypatch, tmp_path):
+    from src.blockchain_verification import CredentialLedger
+
+    _with_employees(engine, monkeypatch, engine.employees)
+    monkeypatch.setattr(engine, 'ledger', None)
+    monkeypatch.setattr(engine, 'profile_source', 'csv')
+    path = str(tmp_path / 'ledger.json')
+    ledger, other = CredentialLedger(path), CredentialLedger(path)
+    engine.attach_ledger(ledger)
+    employee_id = engine.employees.loc[0, 'employee_id']
+    assert not engine.compute_employee_profiles('mean')[0].any()
+
+    record = other.issue_credential(employee_id, 'TC001', 'Python for Data Analysis',
+                                    '2024-03-15', verbose=False)
+    ledger.refresh()
+    assert engine.compute_employee_profiles('mean')[0].any()
+
+    other.revoke_credential(record['credential_id'], 'Issued in error', verbose=False)
+    ledger.refresh()
+    assert not engine.compute_employee_profiles('mean')[0].any()
+    ledger.close()
+    other.close()
@@ -0,0 +1,43 @@
+"""Tests for skill phrase normalization (src/skill_normalization.py)"""
+
+import pytest
+
+pytest.importorskip('spacy')
+pytest.importorskip('en_core_web_sm')
+
+from src.skill_normalization import SkillNormalizer
+
+
+@pytest.fixture(scope='module')
+def normalizer():
+    return SkillNormalizer(batch_size=4, n_process=2)
+
+
+@pytest.fixture
+def pipe_calls(normalizer, monkeypatch):
+    """Record the n_process of every nlp.pipe call"""
+    calls = []
+    pipe = normalizer.nlp.pipe
+
+    def spy(texts, **kwargs):
+        calls.append(kwargs['n_process'])
+        return pipe(texts, **kwargs)
+
+    monkeypatch.setattr(normalizer.nlp, 'pipe', spy)
+    monkeypatch.setattr(normalizer, '_cache', {})
+    return calls
+
+
+def test_nouns_lemmatized_and_tool_names_kept(normalizer, pipe_calls):
+    result = normalizer.normalize(['Neural Networks', ' pandas ', 'neural networks'])
+    assert result == ['neural network', 'pandas', 'neural network']
+
+    # Cached phrases are not parsed again
+    assert normalizer.normalize_one('Neural networks') == 'neural network'
+    assert len(pipe_calls) == 1
+
+
+def test_small_calls_do_not_start_a_process_pool(normalizer, pipe_calls):
+    normalizer.normalize(['SQL', 'Data Pipelines'])
+    normalizer.normalize([f'skill {i}' for i in range(normalizer.batch_size)])
+    assert pipe_calls == [1, normalizer.n_process]
@@ -0,0 +1,71 @@
+"""
+SkillChain DX - Bulk Credential Verification
+Verifies a CSV or JSON Lines file of claimed credentials against the ledger
+
+Usage:
+    python verify_credentials.py claims.csv --output results/verification_results.jsonl
+    python verify_credentials.py claims.jsonl --ledger data/ledger.db --storage-format sqlite
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from src.blockchain_verification import CredentialLedger, read_claims
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description='Verify claimed credentials in bulk against the credential ledger')
+    parser.add_argument('claims', help="CSV or JSON Lines file of claims ('-' for stdin)")
+    parser.add_argument('--claims-format', choices=('csv', 'jsonl'),
+                        help='Claims file format (default: from the file extension)')
+    parser.add_argument('--ledger', default='data/credential_ledger.json',
+                        help='Ledger path (default: data/credential_ledger.json)')
+    parser.add_argument('--storage-format', default='json',
+                        choices=CredentialLedger.STORAGE_FORMATS,
+                        help='Ledger storage format (default: json)')
+    parser.add_argument('--output', default='-',
+                        help="JSON Lines file for results ('-' for stdout, the default)")
+    parser.add_argument('--workers', type=int, default=4, help='Worker threads (default: 4)')
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help='Claims per worker task (default: 1000)')
+    parser.add_argument('--bloom-fpr', type=float, default=None,
+                        help='Use a Bloom filter with this false-positive rate')
+    return parser.parse_args()
+
+
+def main():
+    """Stream verification results for every claim and print a summary"""
+    args = parse_args()
+    start_time = time.time()
+
+    ledger = CredentialLedger(args.ledger, storage_format=args.storage_format,
+                              bloom_false_positive_rate=args.bloom_fpr)
+    output = sys.stdout if args.output == '-' else open(args.output, 'w')
+
+    total = verified = malformed = 0
+    try:
+        results = ledger.verify_credentials_bulk(
+            read_claims(args.claims, args.claims_format),
+            workers=args.workers, chunk_size=args.chunk_size)
+        for result in results:
+            output.write(json.dumps(result) + '\n')
+            total += 1
+            verified += result['verified']
+            malformed += 'hash' not in result
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        ledger.close()
+
+    # Keep stdout clean for results; the summary goes to stderr
+    elapsed = time.time() - start_time
+    print(f"✓ Verified {verified}/{total} claims in {elapsed:.2f} seconds "
+          f"({malformed} malformed)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()